@@ -67,6 +67,7 @@ def _install_python_dependencies():
 from . import models
 from . import controllers
 from . import wizards
+from . import cli
 
 
 def post_init_hook(env):
@@ -66,6 +66,8 @@ Requirements:
         # Data
         'data/otk_rental_sequence.xml',
         'data/otk_rental_data.xml',
+        'data/otk_rental_cron.xml',
+        'data/otk_rental_mail_templates.xml',
         
         # Views - QR Features
         'views/qr_scanner_views.xml',
@@ -74,9 +76,15 @@ Requirements:
         'views/otk_rental_equipment_views.xml',
         'views/otk_rental_equipment_category_views.xml',
         'views/otk_rental_equipment_serial_views.xml',
+        'views/otk_rental_rate_card_views.xml',
+        'views/otk_rental_availability_report_views.xml',
+        'views/otk_rental_stock_ledger_views.xml',
+        'views/otk_rental_hold_views.xml',
+        'views/otk_rental_waitlist_views.xml',
         
         # Views - Settings
         'views/res_config_settings_views.xml',
+        'views/res_partner_views.xml',
         
         # Wizards
         'wizards/otk_rental_return_wizard_views.xml',
@@ -86,6 +94,7 @@ Requirements:
         'wizards/otk_rental_pickup_wizard_views.xml',  # NEW
         'wizards/otk_rental_partial_return_wizard_views.xml',  # NEW
         'wizards/add_signature_wizard_views.xml',  # ADD THIS LINE
+        'wizards/otk_rental_transfer_wizard_views.xml',
         
         # Views - Projects
         'views/otk_rental_project_views.xml',
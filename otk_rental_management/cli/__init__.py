@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+# odoo-bin subcommands (discovered by odoo-bin through this folder)
+from . import otk_rental_dataset
@@ -0,0 +1,59 @@
+# Key Features:
+
+# odoo-bin command - `odoo-bin otk_rental_dataset -c odoo.conf -d bench --serials 50000 --projects 20000`
+# Deterministic - Same --seed and --anchor-date give the same dataset, for comparing benchmark runs
+# One transaction - The dataset is committed only if the whole load succeeds
+
+import logging
+import optparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+
+class OtkRentalDataset(Command):
+    """Load a synthetic rental dataset (equipment, serials, projects, history) for load tests"""
+    name = 'otk_rental_dataset'
+
+    def run(self, cmdargs):
+        parser = odoo.tools.config.parser
+        parser.prog = f'{Path(sys.argv[0]).name} {self.name}'
+        group = optparse.OptionGroup(parser, "Rental Dataset Configuration")
+        group.add_option("--serials", dest="otk_serials", type="int", default=50000,
+                         help="Number of serial numbers (default: %default)")
+        group.add_option("--projects", dest="otk_projects", type="int", default=20000,
+                         help="Number of rental projects (default: %default)")
+        group.add_option("--history", dest="otk_history", type="int", default=200000,
+                         help="Approximate number of status history rows (default: %default)")
+        group.add_option("--seed", dest="otk_seed", type="int", default=42,
+                         help="Random seed (default: %default)")
+        group.add_option("--days", dest="otk_days", type="int", default=730,
+                         help="How many days back project start dates go (default: %default)")
+        group.add_option("--anchor-date", dest="otk_anchor_date", default=None,
+                         help="Date the dataset is built around, YYYY-MM-DD (default: today)")
+        parser.add_option_group(group)
+        opt = odoo.tools.config.parse_config(cmdargs, setup_logging=True)
+
+        dbname = odoo.tools.config['db_name']
+        if not dbname:
+            sys.exit("A database is required (-d)")
+        registry = Registry(dbname)
+        with registry.cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            if 'otk.rental.dataset' not in env:
+                sys.exit(f"otk_rental_management is not installed in {dbname}")
+            counts = env['otk.rental.dataset']._generate(
+                serials=opt.otk_serials,
+                projects=opt.otk_projects,
+                history=opt.otk_history,
+                seed=opt.otk_seed,
+                days=opt.otk_days,
+                anchor_date=opt.otk_anchor_date,
+            )
+        for model, count in counts.items():
+            print(f"{model}: {count}")
@@ -3,7 +3,7 @@
 # Full API key authentication - Using Odoo's native API keys
 # Equipment endpoints - List, get details, check availability
 # Project CRUD - Create, read, list projects
-# Project lifecycle - Reserve, start, return, invoice
+# Project lifecycle - Reserve, start, return, invoice, site-to-site transfer
 # SERIAL ENDPOINTS - Check status, quick rent, quick return via Serial Number (for scanner integration)
 # Error handling - Comprehensive try-catch blocks
 # Standard responses - Consistent success/error format
@@ -11,15 +11,118 @@
 # Logging - All operations logged
 # Flexible input - Accepts JSON or form data
 # User context - All actions attributed to authenticated user
+# Quotes - Price and availability of a basket without creating records, briefly cached
+# Availability timeline - Daily free/reserved/rented counts per equipment or category
+# Checkout holds - Hold a basket for a few minutes, then confirm it into a reservation or release it
+# Instrumentation - Wall, SQL and JSON encoding time per route: Server-Timing header, timing log lines
+#                   and a per-worker latency histogram for managers (/api/rental/metrics)
 
 from odoo import http, fields, _
 from odoo.http import request
+import bisect
+import functools
 import json
 import logging
+import os
+import threading
+import time
 from datetime import date, datetime
 from odoo.exceptions import AccessError, UserError
 
 _logger = logging.getLogger(__name__)
+# One line per API request; silence with --log-handler odoo.addons.otk_rental_management.controllers.main.timing:WARNING
+_timing_logger = logging.getLogger(__name__ + '.timing')
+
+# Identical quotes within this window are served from memory (per worker)
+QUOTE_CACHE_TTL = 30
+QUOTE_CACHE_SIZE = 256
+
+# Longest date range served by the availability timeline
+TIMELINE_MAX_DAYS = 366
+_quote_cache = {}
+# Threaded workers share the cache: eviction iterates it while others write
+_quote_cache_lock = threading.Lock()
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket holds slower requests
+TIMING_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Route -> aggregated timings since the worker started (per process, like the quote cache)
+_route_metrics = {}
+_route_metrics_lock = threading.Lock()
+_route_metrics_since = time.time()
+# JSON encoding time of the request being served by this thread
+_timing = threading.local()
+
+
+def _record_route_metrics(route, status, wall, sql_count, sql_time, size):
+    with _route_metrics_lock:
+        metrics = _route_metrics.get(route)
+        if metrics is None:
+            metrics = _route_metrics[route] = {
+                'count': 0, 'errors': 0, 'wall_ms': 0.0, 'max_ms': 0.0,
+                'sql_count': 0, 'sql_ms': 0.0, 'bytes': 0,
+                'buckets': [0] * (len(TIMING_BUCKETS_MS) + 1),
+            }
+        wall_ms = wall * 1000
+        metrics['count'] += 1
+        metrics['errors'] += status >= 400
+        metrics['wall_ms'] += wall_ms
+        metrics['max_ms'] = max(metrics['max_ms'], wall_ms)
+        metrics['sql_count'] += sql_count
+        metrics['sql_ms'] += sql_time * 1000
+        metrics['bytes'] += size
+        metrics['buckets'][bisect.bisect_left(TIMING_BUCKETS_MS, wall_ms)] += 1
+
+
+def _histogram_percentile(metrics, rank):
+    """Upper bound of the bucket holding the given percentile (max for the open bucket)"""
+    threshold = metrics['count'] * rank / 100
+    seen = 0
+    for bound, count in zip(TIMING_BUCKETS_MS, metrics['buckets']):
+        seen += count
+        if seen >= threshold:
+            return min(bound, round(metrics['max_ms'], 1))
+    return round(metrics['max_ms'], 1)
+
+
+def _instrumented(endpoint):
+    """
+    Time a RentalAPI route: wall time, SQL queries and time (counted by the
+    cursors on the request thread), JSON encoding time and response bytes.
+    """
+    @functools.wraps(endpoint)
+    def wrapper(self, *args, **kwargs):
+        thread = threading.current_thread()
+        query_count = getattr(thread, 'query_count', 0)
+        query_time = getattr(thread, 'query_time', 0.0)
+        _timing.encode = 0.0
+        started = time.perf_counter()
+        response = None
+        try:
+            response = endpoint(self, *args, **kwargs)
+        finally:
+            wall = time.perf_counter() - started
+            sql_count = getattr(thread, 'query_count', 0) - query_count
+            sql_time = getattr(thread, 'query_time', 0.0) - query_time
+            encode = _timing.encode
+            status = response.status_code if response is not None else 500
+            size = (response.calculate_content_length() or 0) if response is not None else 0
+            python_time = max(wall - sql_time - encode, 0.0)
+            if response is not None:
+                response.headers['Server-Timing'] = (
+                    f'app;dur={python_time * 1000:.1f};desc="Python", '
+                    f'sql;dur={sql_time * 1000:.1f};desc="{sql_count} queries", '
+                    f'json;dur={encode * 1000:.1f}, '
+                    f'total;dur={wall * 1000:.1f}'
+                )
+            _record_route_metrics(endpoint.__name__, status, wall, sql_count, sql_time, size)
+            _timing_logger.info(
+                "route=%s method=%s status=%s wall_ms=%.1f sql_count=%d sql_ms=%.1f json_ms=%.1f bytes=%d",
+                endpoint.__name__, request.httprequest.method, status,
+                wall * 1000, sql_count, sql_time * 1000, encode * 1000, size,
+            )
+        return response
+    return wrapper
+
 
 class DateTimeEncoder(json.JSONEncoder):
     """Custom JSON encoder for date/datetime objects"""
@@ -38,19 +141,11 @@ class RentalAPI(http.Controller):
             return False
 
         try:
-            # Direct database query to get non-expired API keys
-            request.env.cr.execute("""
-                SELECT id, user_id, key, name, expiration_date
-                FROM res_users_apikeys
-                WHERE key = %s
-                  AND (expiration_date IS NULL OR expiration_date >= current_timestamp)
-            """, [api_key])
-            result = request.env.cr.fetchone()
-            
-            if result:
-                api_key_id, user_id, key, name, expiration_date = result
-                # Log in the user associated with the API key
-                request.session.authenticate(request.session.db, user_id, api_key) 
+            # Keys are stored hashed: let Odoo match them (expired keys are rejected)
+            user_id = request.env['res.users.apikeys'].sudo()._check_credentials(scope='rpc', key=api_key)
+            if user_id:
+                # Run the request as the key's user, without opening a session
+                request.update_env(user=user_id)
                 return request.env['res.users'].sudo().browse(user_id)
             
             return False
@@ -79,14 +174,21 @@ class RentalAPI(http.Controller):
             return json.loads(request.httprequest.data)
         return request.params
 
+    def _json_dumps(self, payload):
+        """Encode a response body, adding the time spent to the request's timings"""
+        started = time.perf_counter()
+        body = json.dumps(payload, cls=DateTimeEncoder)
+        _timing.encode = getattr(_timing, 'encode', 0.0) + time.perf_counter() - started
+        return body
+
     def _success_response(self, data=None, message='Success', status=200):
         """Standard success JSON response."""
         return request.make_response(
-            json.dumps({
+            self._json_dumps({
                 'status': 'success',
                 'message': message,
                 'data': data or {}
-            }, cls=DateTimeEncoder),
+            }),
             headers={'Content-Type': 'application/json'},
             status=status
         )
@@ -94,18 +196,59 @@ class RentalAPI(http.Controller):
     def _error_response(self, message, status=400):
         """Standard error JSON response."""
         return request.make_response(
-            json.dumps({
+            self._json_dumps({
                 'status': 'error',
                 'message': message,
                 'data': {}
-            }, cls=DateTimeEncoder),
+            }),
             headers={'Content-Type': 'application/json'},
             status=status
         )
 
+    # ==================== Instrumentation ====================
+
+    @http.route('/api/rental/metrics', type='http', auth='public', methods=['GET'])
+    def metrics(self, **kwargs):
+        """Latency histogram and SQL/size averages per route, for rental managers (this worker only)."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        user = request.env.user
+        if not (user.has_group('otk_rental_management.group_otk_rental_manager') or user.has_group('base.group_system')):
+            return self._error_response('Only rental managers and administrators can read the API metrics.', 403)
+
+        with _route_metrics_lock:
+            snapshot = {route: dict(metrics, buckets=list(metrics['buckets']))
+                        for route, metrics in _route_metrics.items()}
+        routes = {}
+        for route, metrics in sorted(snapshot.items()):
+            count = metrics['count']
+            routes[route] = {
+                'count': count,
+                'errors': metrics['errors'],
+                'error_rate': round(metrics['errors'] / count, 4),
+                'mean_ms': round(metrics['wall_ms'] / count, 1),
+                'p50_ms': _histogram_percentile(metrics, 50),
+                'p95_ms': _histogram_percentile(metrics, 95),
+                'p99_ms': _histogram_percentile(metrics, 99),
+                'max_ms': round(metrics['max_ms'], 1),
+                'mean_sql_count': round(metrics['sql_count'] / count, 1),
+                'mean_sql_ms': round(metrics['sql_ms'] / count, 1),
+                'mean_bytes': round(metrics['bytes'] / count),
+                'histogram': dict(zip([f'<={bound}' for bound in TIMING_BUCKETS_MS] + [f'>{TIMING_BUCKETS_MS[-1]}'],
+                                      metrics['buckets'])),
+            }
+        return self._success_response(data={
+            'pid': os.getpid(),
+            'since': datetime.fromtimestamp(_route_metrics_since),
+            'buckets_ms': TIMING_BUCKETS_MS,
+            'routes': routes,
+        }, message='API metrics of this worker')
+
     # ==================== Serial Number Endpoints (NEW FOR SCANNER) ====================
     
     @http.route('/api/rental/serial/<string:serial_number>', type='http', auth='public', methods=['GET'])
+    @_instrumented
     def serial_get_status(self, serial_number, **kwargs):
         """Get detailed status and current project of a single serial number."""
         auth_error = self._check_auth()
@@ -139,6 +282,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
 
     @http.route('/api/rental/serial/rent', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def serial_quick_rent(self, **kwargs):
         """Quickly mark a serial number as 'rented' and assign it to a project."""
         auth_error = self._check_auth()
@@ -173,11 +317,25 @@ class RentalAPI(http.Controller):
             if not project_item.exists():
                 return self._error_response(f"Equipment '{serial.equipment_name}' is not listed in project {project.name}.", 400)
 
-            # Assign and set status to rented
-            serial.write({
-                'status': 'rented', 
-                'current_project_id': project.id
-            })
+            # Taking a free serial must leave enough units for the checkout holds
+            if serial.status in ('available', 'returned'):
+                request.env['otk.rental.equipment'].sudo()._check_allocatable(
+                    {serial.equipment_id: 1}, project.start_date, project.end_date)
+
+            # Reserve for the project, then rent (serials held by another project are refused)
+            if serial.status != 'rented':
+                serial._transition(
+                    'reserved',
+                    {'current_project_id': project.id},
+                    project=project,
+                    notes=f'Serial {serial_number} reserved via API',
+                )
+            serial._transition(
+                'rented',
+                {'current_project_id': project.id},
+                project=project,
+                notes=f'Serial {serial_number} rented via API',
+            )
             
             # Link the serial to the project line item (if not already linked)
             project_item.write({'assigned_serial_ids': [(4, serial.id)]})
@@ -194,6 +352,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
 
     @http.route('/api/rental/serial/return', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def serial_quick_return(self, **kwargs):
         """Quickly mark a serial number as 'available' or 'damaged' and remove from project."""
         auth_error = self._check_auth()
@@ -216,7 +375,6 @@ class RentalAPI(http.Controller):
                 return self._error_response(f'Serial number {serial_number} not found', 404)
 
             # Get the current project to update
-            project_id = serial.current_project_id.id
             project_name = serial.current_project_id.name
             
             new_status = 'available'
@@ -224,23 +382,26 @@ class RentalAPI(http.Controller):
             if damage_status == 'damaged':
                 new_status = 'damaged'
             elif damage_status == 'lost':
-                new_status = 'lost'
-
-            # 1. Update Serial Status and remove project link
-            serial.write({
-                'status': new_status,
-                'current_project_id': False # Clear association
-            })
-            
-            # 2. Log status change with damage info if applicable
-            if new_status in ['damaged', 'lost']:
-                request.env['otk.rental.project.item.status'].sudo().create({
-                    'project_id': project_id,
-                    'equipment_id': serial.equipment_id.id,
-                    'serial_id': serial.id,
-                    'status': new_status,
-                    'damage_description': damage_desc if new_status == 'damaged' else f'Marked as {new_status.upper()} via API',
-                })
+                # Lost units leave the fleet ('lost' is not a serial status)
+                new_status = 'disposed'
+
+            # Rented units come back through 'returned' before they are available again
+            if new_status == 'available' and serial.status == 'rented':
+                serial._transition(
+                    'returned',
+                    {'current_project_id': False},
+                    notes=f'Returned via API as {damage_status}',
+                )
+
+            # Update serial status, remove project link and log the change
+            serial._transition(
+                new_status,
+                {'current_project_id': False},  # Clear association
+                notes=f'Returned via API as {damage_status}',
+                history_vals={
+                    'damage_description': damage_desc if new_status == 'damaged' else f'Marked as {damage_status.upper()} via API',
+                } if new_status != 'available' else None,
+            )
             
             message = f"Serial {serial_number} returned as '{new_status.upper()}'."
             if project_name:
@@ -260,6 +421,7 @@ class RentalAPI(http.Controller):
     # ==================== Equipment Endpoints ====================
 
     @http.route('/api/rental/equipment/list', type='http', auth='public', methods=['GET'])
+    @_instrumented
     def equipment_list(self, **kwargs):
         """List all available equipment."""
         auth_error = self._check_auth()
@@ -274,9 +436,11 @@ class RentalAPI(http.Controller):
                 'id': eq.id,
                 'code': eq.code,
                 'name': eq.name,
-                'category': eq.category_id.name,
+                'category': eq.category_ids[:1].name or None,
                 'total_stock': eq.total_stock,
                 'available_stock': eq.available_stock,
+                'next_available_date': eq.next_available_date or None,
+                'next_available_qty': eq.next_available_qty,
             } for eq in equipment_records]
             
             return self._success_response(data=data, message='Equipment list retrieved successfully')
@@ -286,6 +450,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
 
     @http.route('/api/rental/equipment/<int:equipment_id>', type='http', auth='public', methods=['GET'])
+    @_instrumented
     def equipment_details(self, equipment_id, **kwargs):
         """Get details of a specific equipment item."""
         auth_error = self._check_auth()
@@ -299,19 +464,33 @@ class RentalAPI(http.Controller):
             if not eq.exists():
                 return self._error_response('Equipment not found', 404)
             
+            Location = request.env['stock.location'].sudo()
             data = {
                 'id': eq.id,
                 'code': eq.code,
                 'name': eq.name,
                 'description': eq.description,
-                'category': eq.category_id.name,
-                'is_serialized': eq.is_serialized,
-                'rate_day': eq.rate_day,
-                'rate_week': eq.rate_week,
-                'rate_month': eq.rate_month,
+                'category': eq.category_ids[:1].name or None,
+                'is_serialized': eq.has_serials,
+                'rate_day': eq.daily_rate,
+                'rate_week': eq.weekly_rate,
+                'rate_month': eq.monthly_rate,
                 'total_stock': eq.total_stock,
                 'available_stock': eq.available_stock,
-                'serials': [{'id': s.id, 'serial_number': s.serial_number, 'status': s.status} for s in eq.serial_ids],
+                'next_available_date': eq.next_available_date or None,
+                'next_available_qty': eq.next_available_qty,
+                # Serial counts per depot and status
+                'stock_by_location': [{
+                    'location_id': location_id or None,
+                    'location': Location.browse(location_id).complete_name or None,
+                    'counts': counts,
+                } for (_equipment_id, location_id), counts in eq._get_stock_by_location().items()],
+                'serials': [{
+                    'id': s.id,
+                    'serial_number': s.serial_number,
+                    'status': s.status,
+                    'location': s.location_id.complete_name or None,
+                } for s in eq.serial_ids],
             }
             
             return self._success_response(data=data, message='Equipment details retrieved successfully')
@@ -320,9 +499,249 @@ class RentalAPI(http.Controller):
             _logger.error(f"Error in equipment_details: {str(e)}", exc_info=True)
             return self._error_response(str(e))
             
+    @http.route('/api/rental/availability/timeline', type='http', auth='public', methods=['GET'])
+    @_instrumented
+    def availability_timeline(self, **kwargs):
+        """Daily free/reserved/rented counts for equipment or a category subtree."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        try:
+            # Required: date_from, date_to and equipment_ids (comma separated) and/or category_id
+            if not kwargs.get('date_from') or not kwargs.get('date_to'):
+                return self._error_response('Missing required fields: date_from and date_to', 400)
+            if not kwargs.get('equipment_ids') and not kwargs.get('category_id'):
+                return self._error_response('Provide equipment_ids or category_id', 400)
+            
+            date_from = fields.Date.to_date(kwargs['date_from'])
+            date_to = fields.Date.to_date(kwargs['date_to'])
+            if date_to < date_from:
+                return self._error_response('date_to cannot be before date_from', 400)
+            if (date_to - date_from).days >= TIMELINE_MAX_DAYS:
+                return self._error_response(f'Date range cannot exceed {TIMELINE_MAX_DAYS} days', 400)
+            
+            env = request.env(su=True)
+            equipment = env['otk.rental.equipment']
+            if kwargs.get('equipment_ids'):
+                equipment = equipment.browse([int(eq_id) for eq_id in kwargs['equipment_ids'].split(',')])
+            category = env['otk.rental.equipment.category']
+            if kwargs.get('category_id'):
+                category = category.browse(int(kwargs['category_id'])).exists()
+                if not category:
+                    return self._error_response('Category not found', 404)
+            
+            data = env['otk.rental.availability.report']._get_timeline(
+                date_from, date_to, equipment=equipment, category=category
+            )
+            return self._success_response(data=data, message='Availability timeline retrieved successfully')
+            
+        except ValueError as e:
+            return self._error_response(f'Invalid timeline request: {e}', 400)
+        except Exception as e:
+            _logger.error(f"Error in availability_timeline: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+
+    # ==================== Quote Endpoint ====================
+
+    def _get_cached_quote(self, key):
+        with _quote_cache_lock:
+            entry = _quote_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _set_cached_quote(self, key, quote):
+        now = time.monotonic()
+        with _quote_cache_lock:
+            if len(_quote_cache) >= QUOTE_CACHE_SIZE:
+                # Drop expired entries first, then the oldest ones
+                for stale_key in [k for k, (expiry, _quote) in _quote_cache.items() if expiry <= now]:
+                    del _quote_cache[stale_key]
+                while len(_quote_cache) >= QUOTE_CACHE_SIZE:
+                    del _quote_cache[next(iter(_quote_cache))]
+            _quote_cache[key] = (now + QUOTE_CACHE_TTL, quote)
+
+    @http.route('/api/rental/quote', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
+    def quote(self, **kwargs):
+        """Price a basket and check availability without creating a project."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        data = self._get_input_data()
+        
+        try:
+            # Required fields: start_date, end_date, lines (list of {equipment_id, quantity})
+            if not data.get('start_date') or not data.get('end_date') or not data.get('lines'):
+                return self._error_response('Missing required fields: start_date, end_date and lines', 400)
+            
+            start_date = fields.Date.to_date(data['start_date'])
+            end_date = fields.Date.to_date(data['end_date'])
+            if end_date < start_date:
+                return self._error_response('end_date cannot be before start_date', 400)
+            
+            partner_id = int(data.get('partner_id') or 0)
+            lines = [(int(line['equipment_id']), int(line.get('quantity', 1))) for line in data['lines']]
+            if any(qty <= 0 for _eq, qty in lines):
+                return self._error_response('Line quantity must be positive', 400)
+            
+            key = (request.env.cr.dbname, partner_id, start_date, end_date, tuple(lines))
+            quote = self._get_cached_quote(key)
+            if quote is None:
+                env = request.env(su=True)
+                equipment = env['otk.rental.equipment'].browse({eq_id for eq_id, _qty in lines}).exists()
+                missing = {eq_id for eq_id, _qty in lines} - set(equipment.ids)
+                if missing:
+                    return self._error_response(f'Equipment not found: {sorted(missing)}', 404)
+                
+                partner = env['res.partner'].browse(partner_id).exists()
+                quote = env['otk.rental.project']._get_quote(
+                    partner,
+                    start_date,
+                    end_date,
+                    [(equipment.browse(eq_id), qty) for eq_id, qty in lines],
+                )
+                self._set_cached_quote(key, quote)
+            
+            return self._success_response(data=quote, message='Quote computed successfully')
+            
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error_response(f'Invalid quote request: {e}', 400)
+        except Exception as e:
+            _logger.error(f"Error in quote: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+
+    # ==================== Checkout Hold Endpoints ====================
+
+    def _hold_data(self, holds):
+        return {
+            'reference': holds[:1].reference,
+            'expires_at': min(holds.mapped('expires_at')) if holds else None,
+            'lines': [{
+                'equipment_id': hold.equipment_id.id,
+                'quantity': hold.quantity,
+                'start_date': hold.start_date,
+                'end_date': hold.end_date,
+            } for hold in holds],
+        }
+
+    @http.route('/api/rental/hold', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
+    def hold_create(self, **kwargs):
+        """Hold a basket while the customer checks out (adds to an existing checkout with reference)."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        data = self._get_input_data()
+        
+        try:
+            # Required fields: start_date, end_date, lines (list of {equipment_id, quantity})
+            if not data.get('start_date') or not data.get('end_date') or not data.get('lines'):
+                return self._error_response('Missing required fields: start_date, end_date and lines', 400)
+            
+            start_date = fields.Date.to_date(data['start_date'])
+            end_date = fields.Date.to_date(data['end_date'])
+            if end_date < start_date:
+                return self._error_response('end_date cannot be before start_date', 400)
+            
+            lines = [(int(line['equipment_id']), int(line.get('quantity', 1))) for line in data['lines']]
+            if any(qty <= 0 for _eq, qty in lines):
+                return self._error_response('Line quantity must be positive', 400)
+            
+            env = request.env(su=True)
+            equipment = env['otk.rental.equipment'].browse({eq_id for eq_id, _qty in lines}).exists()
+            missing = {eq_id for eq_id, _qty in lines} - set(equipment.ids)
+            if missing:
+                return self._error_response(f'Equipment not found: {sorted(missing)}', 404)
+            
+            Hold = env['otk.rental.hold']
+            reference = data.get('reference')
+            if reference:
+                # Adding to a checkout keeps all of its holds alive together
+                Hold.search([('reference', '=', reference)])._extend()
+            holds = Hold._place(
+                env['res.partner'].browse(int(data.get('partner_id') or 0)).exists(),
+                start_date,
+                end_date,
+                [(equipment.browse(eq_id), qty) for eq_id, qty in lines],
+                reference=reference,
+            )
+            
+            return self._success_response(
+                data=self._hold_data(Hold.search([('reference', '=', holds[:1].reference)])),
+                message='Equipment held successfully'
+            )
+            
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error_response(f'Invalid hold request: {e}', 400)
+        except UserError as e:
+            return self._error_response(str(e), 409)
+        except Exception as e:
+            _logger.error(f"Error in hold_create: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+
+    @http.route('/api/rental/hold/<string:reference>/confirm', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
+    def hold_confirm(self, reference, **kwargs):
+        """Convert the holds of a checkout into a reserved project."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        data = self._get_input_data()
+        
+        try:
+            env = request.env(su=True)
+            holds = env['otk.rental.hold'].search([('reference', '=', reference)])
+            if not holds:
+                return self._error_response('Hold not found or expired', 404)
+            
+            partner = env['res.partner'].browse(int(data.get('partner_id') or 0)).exists()
+            project = holds._convert_to_reservation(
+                partner=partner or None,
+                project_vals={'reference': data['project_reference']} if data.get('project_reference') else None,
+            )
+            
+            return self._success_response(
+                data={'id': project.id, 'name': project.name, 'state': project.state},
+                message=f'Project {project.name} reserved successfully'
+            )
+            
+        except (TypeError, ValueError) as e:
+            return self._error_response(f'Invalid confirm request: {e}', 400)
+        except UserError as e:
+            return self._error_response(str(e), 409)
+        except Exception as e:
+            _logger.error(f"Error in hold_confirm: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+
+    @http.route('/api/rental/hold/<string:reference>/release', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
+    def hold_release(self, reference, **kwargs):
+        """Release the holds of an abandoned checkout."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        try:
+            holds = request.env['otk.rental.hold'].sudo().search([('reference', '=', reference)])
+            holds.action_release()
+            return self._success_response(
+                data={'reference': reference, 'released': len(holds)},
+                message='Hold released successfully'
+            )
+            
+        except Exception as e:
+            _logger.error(f"Error in hold_release: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+
     # ==================== Project Endpoints ====================
 
     @http.route('/api/rental/project/list', type='http', auth='public', methods=['GET'])
+    @_instrumented
     def project_list(self, **kwargs):
         """List all rental projects."""
         auth_error = self._check_auth()
@@ -350,6 +769,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
 
     @http.route('/api/rental/project/create', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def project_create(self, **kwargs):
         """Create a new rental project (Draft state)."""
         auth_error = self._check_auth()
@@ -394,6 +814,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
     
     @http.route('/api/rental/project/<int:project_id>/reserve', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def project_reserve(self, project_id, **kwargs):
         """Move project to Reserved status and assign serials."""
         auth_error = self._check_auth()
@@ -420,6 +841,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
             
     @http.route('/api/rental/project/<int:project_id>/start', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def project_start(self, project_id, **kwargs):
         """Move project to Ongoing status."""
         auth_error = self._check_auth()
@@ -446,6 +868,7 @@ class RentalAPI(http.Controller):
             return self._error_response(str(e))
 
     @http.route('/api/rental/project/<int:project_id>/return', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def project_return(self, project_id, **kwargs):
         """Move project to Returned status (Does NOT handle damage/return wizard)"""
         auth_error = self._check_auth()
@@ -476,8 +899,61 @@ class RentalAPI(http.Controller):
         except Exception as e:
             _logger.error(f"Error in project_return: {str(e)}", exc_info=True)
             return self._error_response(str(e))
+
+    @http.route('/api/rental/project/<int:project_id>/transfer', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
+    def project_transfer(self, project_id, **kwargs):
+        """Move rented serials straight to another project, without a warehouse return."""
+        auth_error = self._check_auth()
+        if auth_error:
+            return auth_error
+        
+        data = self._get_input_data()
+        
+        try:
+            # Required fields: target_project_id, serial_numbers (list)
+            if not data.get('target_project_id') or not data.get('serial_numbers'):
+                return self._error_response('Missing required fields: target_project_id and serial_numbers', 400)
+            
+            Project = request.env['otk.rental.project'].sudo()
+            project = Project.browse(project_id)
+            target = Project.browse(int(data['target_project_id']))
+            if not project.exists() or not target.exists():
+                return self._error_response('Project not found', 404)
+            
+            serial_numbers = list(data['serial_numbers'])
+            serials = request.env['otk.rental.equipment.serial'].sudo().search([('serial_number', 'in', serial_numbers)])
+            missing = set(serial_numbers) - set(serials.mapped('serial_number'))
+            if missing:
+                return self._error_response(f'Serial numbers not found: {sorted(missing)}', 404)
+            
+            transfer_date = fields.Date.to_date(data['transfer_date']) if data.get('transfer_date') else None
+            # A refused transfer must not keep the serial dates and invoice written before the error
+            with request.env.cr.savepoint():
+                invoice = project._transfer_serials(serials, target, transfer_date)
+            
+            return self._success_response(
+                data={
+                    'id': project.id,
+                    'state': project.state,
+                    'target_project_id': target.id,
+                    'target_state': target.state,
+                    'transferred': len(serials),
+                    'invoice_id': invoice.id or None,
+                },
+                message=f'{len(serials)} serial(s) transferred from {project.name} to {target.name}'
+            )
+            
+        except (TypeError, ValueError) as e:
+            return self._error_response(f'Invalid transfer request: {e}', 400)
+        except UserError as e:
+            return self._error_response(str(e), 400)
+        except Exception as e:
+            _logger.error(f"Error in project_transfer: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
     
     @http.route('/api/rental/project/<int:project_id>/invoice', type='http', auth='public', methods=['POST'], csrf=False)
+    @_instrumented
     def project_create_invoice(self, project_id, **kwargs):
         """Create invoice for project"""
         auth_error = self._check_auth()
@@ -7,12 +7,15 @@
 
 # STEP 1: Import utility modules (no Odoo model dependencies)
 from . import qr_generator  # Pure utility - no model imports
+from . import otk_rental_settings  # Cached otk_rental.* config parameters
 
 # STEP 2: Import base models (no dependencies on other rental models)
 from . import otk_rental_equipment_category  # No dependencies
 
 # STEP 3: Import models with single-level dependencies
 from . import otk_rental_equipment  # Depends on: category
+from . import otk_rental_kit  # Depends on: equipment
+from . import otk_rental_rate_card  # Depends on: equipment, category
 
 # STEP 4: Import models that depend on equipment
 from . import otk_rental_equipment_serial  # Depends on: equipment, qr_generator
@@ -28,10 +31,17 @@ from . import otk_rental_project_item_status  # Depends on: project, equipment,
 
 # STEP 8: Import scan log (depends on serial and equipment)
 from . import otk_rental_scan_log  # Depends on: equipment, serial, project
+from . import otk_rental_stock_ledger  # Depends on: equipment, project, item
+from . import otk_rental_hold  # Depends on: equipment, project
+from . import otk_rental_waitlist  # Depends on: project, item, serial
+from . import otk_rental_availability_report  # SQL view over serials and projects
+from . import otk_rental_dataset  # Synthetic dataset generator (load tests)
 
 # STEP 9: Import configuration/settings (can reference any model)
 from . import res_config_settings  # Can reference company, etc.
 
 from . import company_qr_extension  # If you have company logo feature
 
+from . import res_partner  # Rental billing mode on customers
+
 from . import otk_rental_project_signature  # ADD THIS LINE
\ No newline at end of file
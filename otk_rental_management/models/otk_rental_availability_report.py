@@ -0,0 +1,156 @@
+# Key Features:
+
+# Daily availability - Free, reserved and rented quantities per equipment and day
+# Single aggregate - generate_series x bookings, no per-day Python loops
+# Category subtree - Filter equipment by category and all sub-categories (parent_path)
+# Rolling window - Backend pivot/graph covers the last 30 and next 365 days
+# API timeline - Same query with an explicit date range for the REST endpoint
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+# Days covered by the backend report around today
+REPORT_DAYS_BEFORE = 30
+REPORT_DAYS_AFTER = 365
+
+
+class OtkRentalAvailabilityReport(models.Model):
+    _name = 'otk.rental.availability.report'
+    _description = 'Rental Availability Timeline'
+    _auto = False
+    _order = 'date, equipment_id'
+
+    date = fields.Date('Date', readonly=True)
+    equipment_id = fields.Many2one('otk.rental.equipment', 'Equipment', readonly=True)
+    total_qty = fields.Integer('Total', readonly=True, aggregator='sum')
+    free_qty = fields.Integer('Free', readonly=True, aggregator='sum')
+    reserved_qty = fields.Integer('Reserved', readonly=True, aggregator='sum')
+    rented_qty = fields.Integer('Rented', readonly=True, aggregator='sum')
+
+    @api.model
+    def _timeline_query(self, date_from, date_to, equipment_ids=None):
+        """
+        Per-day free/reserved/rented serial counts.
+
+        Stock counts in-service serials (not damaged, under repair or disposed).
+        Reserved projects hold their serials from start to end date, ongoing
+        projects until returned, so overdue rentals keep occupying today.
+        """
+        equipment_filter = SQL()
+        if equipment_ids is not None:
+            equipment_filter = SQL("AND s.equipment_id = ANY(%s)", list(equipment_ids))
+        return SQL("""
+            WITH days AS (
+                SELECT day::date AS day
+                  FROM generate_series((%(date_from)s)::date, (%(date_to)s)::date, interval '1 day') AS day
+            ),
+            stock AS (
+                SELECT s.equipment_id, COUNT(*) AS total_qty
+                  FROM otk_rental_equipment_serial s
+                 WHERE s.active
+                   AND s.status NOT IN ('damaged', 'repairing', 'disposed')
+                   %(equipment_filter)s
+                 GROUP BY s.equipment_id
+            ),
+            bookings AS (
+                SELECT s.equipment_id,
+                       p.state,
+                       p.start_date,
+                       CASE WHEN p.state = 'ongoing'
+                            THEN GREATEST(p.end_date, CURRENT_DATE)
+                            ELSE p.end_date
+                       END AS end_date,
+                       COUNT(DISTINCT s.id) AS qty
+                  FROM otk_rental_project p
+                  JOIN otk_rental_project_item i ON i.project_id = p.id
+                  JOIN otk_rental_project_item_serial_rel rel ON rel.item_id = i.id
+                  JOIN otk_rental_equipment_serial s ON s.id = rel.serial_id
+                 WHERE p.state IN ('reserved', 'ongoing')
+                   AND s.status IN ('reserved', 'rented')
+                   AND p.start_date <= (%(date_to)s)::date
+                   AND (p.end_date >= (%(date_from)s)::date OR p.state = 'ongoing')
+                   %(equipment_filter)s
+                 GROUP BY 1, 2, 3, 4
+            )
+            SELECT stock.equipment_id,
+                   days.day AS date,
+                   stock.total_qty,
+                   COALESCE(SUM(b.qty) FILTER (WHERE b.state = 'reserved'), 0) AS reserved_qty,
+                   COALESCE(SUM(b.qty) FILTER (WHERE b.state = 'ongoing'), 0) AS rented_qty
+              FROM stock
+             CROSS JOIN days
+              LEFT JOIN bookings b
+                     ON b.equipment_id = stock.equipment_id
+                    AND days.day BETWEEN b.start_date AND b.end_date
+             GROUP BY stock.equipment_id, days.day, stock.total_qty
+        """, date_from=date_from, date_to=date_to, equipment_filter=equipment_filter)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT ROW_NUMBER() OVER (ORDER BY t.date, t.equipment_id) AS id,
+                       t.date,
+                       t.equipment_id,
+                       t.total_qty,
+                       t.total_qty - t.reserved_qty - t.rented_qty AS free_qty,
+                       t.reserved_qty,
+                       t.rented_qty
+                  FROM (%s) t
+            )
+        """, SQL.identifier(self._table), self._timeline_query(
+            SQL("CURRENT_DATE - %s", REPORT_DAYS_BEFORE),
+            SQL("CURRENT_DATE + %s", REPORT_DAYS_AFTER),
+        )))
+
+    @api.model
+    def _get_timeline(self, date_from, date_to, equipment=None, category=None):
+        """
+        Availability timeline for the API, one row of daily counts per equipment.
+
+        Args:
+            equipment: otk.rental.equipment records to include
+            category: otk.rental.equipment.category, includes its sub-categories
+
+        Returns:
+            dict with the list of days and {free, reserved, rented} arrays per equipment
+        """
+        Equipment = self.env['otk.rental.equipment']
+        if category:
+            # child_of on a _parent_store model is resolved through parent_path
+            equipment = (equipment or Equipment) | Equipment.search([('category_ids', 'child_of', category.ids)])
+
+        self.env['otk.rental.equipment.serial'].flush_model(['equipment_id', 'status', 'active'])
+        self.env['otk.rental.project.item'].flush_model(['project_id', 'assigned_serial_ids'])
+        self.env['otk.rental.project'].flush_model(['state', 'start_date', 'end_date'])
+        self.env.cr.execute(SQL(
+            "%s ORDER BY stock.equipment_id, days.day",
+            self._timeline_query(date_from, date_to, equipment.ids if equipment is not None else None),
+        ))
+
+        days = [fields.Date.add(date_from, days=offset) for offset in range((date_to - date_from).days + 1)]
+        timeline = {}
+        for equipment_id, day, total, reserved, rented in self.env.cr.fetchall():
+            row = timeline.get(equipment_id)
+            if row is None:
+                row = timeline[equipment_id] = {
+                    'equipment_id': equipment_id,
+                    'total': total,
+                    'free': [],
+                    'reserved': [],
+                    'rented': [],
+                }
+            row['free'].append(total - reserved - rented)
+            row['reserved'].append(reserved)
+            row['rented'].append(rented)
+
+        names = dict(Equipment.browse(list(timeline)).mapped(lambda eq: (eq.id, eq.display_name)))
+        for row in timeline.values():
+            row['name'] = names[row['equipment_id']]
+
+        return {
+            'date_from': date_from,
+            'date_to': date_to,
+            'days': days,
+            'equipment': list(timeline.values()),
+        }
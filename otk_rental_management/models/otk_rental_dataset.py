@@ -0,0 +1,452 @@
+# Key Features:
+
+# Synthetic dataset - Production-scale equipment, serials, projects, lines and status history
+# Deterministic - One seeded random generator and a fixed anchor date give the same rows on every run
+# Realistic shape - Skewed equipment popularity, rental lengths, lead times, late returns and project states
+# Consistent - Serials are never double-booked, current projects hold reserved/rented serials
+# COPY loading - Rows are streamed with COPY FROM STDIN, ids are reserved from the table sequences
+# Stored computes - Written with the rows (prices are locked), equipment stock recomputed once at the end
+# Entry points - `odoo-bin otk_rental_dataset -d <db>` or env['otk.rental.dataset']._generate() from a shell
+
+import csv
+import heapq
+import io
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from .otk_rental_equipment_serial import ALLOCATION_STRATEGIES
+
+_logger = logging.getLogger(__name__)
+
+# Prefix of every generated code, serial number and project name
+DATASET_PREFIX = 'SYN'
+
+# Category tree: top level -> sub categories
+DATASET_CATEGORIES = {
+    'Audio': ['Speakers', 'Microphones', 'Mixers', 'Amplifiers'],
+    'Lighting': ['Moving Heads', 'LED Pars', 'Followspots', 'Lighting Desks'],
+    'Video': ['Projectors', 'LED Walls', 'Cameras', 'Switchers'],
+    'Staging': ['Platforms', 'Risers', 'Barriers', 'Truss'],
+    'Power': ['Generators', 'Distribution', 'UPS', 'Cable Ramps'],
+    'Rigging': ['Motors', 'Shackles', 'Spansets', 'Controllers'],
+    'Effects': ['Hazers', 'Confetti', 'Low Fog', 'Sparkulars'],
+    'IT': ['Laptops', 'Radios', 'Access Points', 'Switches'],
+}
+
+# Average serials per equipment model (popularity skews the actual counts)
+SERIALS_PER_EQUIPMENT = 40
+# Rental length in days -> weight
+DURATION_WEIGHTS = {1: 20, 2: 18, 3: 16, 5: 12, 7: 14, 14: 9, 30: 7, 60: 3, 90: 1}
+# Final status of serials that are not out on a current project -> weight
+IDLE_STATUS_WEIGHTS = {'available': 93, 'damaged': 3, 'repairing': 2, 'disposed': 2}
+# History rows written per rental of a serial (reserved, rented, returned)
+HISTORY_ROWS_PER_RENTAL = 3
+
+
+class OtkRentalDataset(models.AbstractModel):
+    _name = 'otk.rental.dataset'
+    _description = 'Rental Synthetic Dataset Generator'
+
+    @api.model
+    def _generate(self, serials=50000, projects=20000, history=200000, seed=42, days=730, anchor_date=None):
+        """
+        Load a synthetic dataset for load tests and benchmarks.
+
+        The same arguments always produce the same rows (ids aside), so
+        measurements can be compared across commits. Serial QR codes are not
+        rendered; use the bulk QR action on the serials if a run needs them.
+
+        Args:
+            serials: number of serial numbers
+            projects: number of rental projects
+            history: approximate number of status history rows
+            seed: random seed
+            days: how far back project start dates go
+            anchor_date: date the dataset is built around (default: today)
+
+        Returns:
+            dict: number of rows created per model
+        """
+        if serials <= 0 or projects <= 0:
+            raise UserError(_('The dataset needs at least one serial and one project.'))
+        Serial = self.env['otk.rental.equipment.serial']
+        if Serial.with_context(active_test=False).search_count(
+                [('serial_number', '=like', f'{DATASET_PREFIX}-%')], limit=1):
+            raise UserError(_('A synthetic dataset already exists in this database.'))
+
+        started = time.monotonic()
+        rng = random.Random(seed)
+        anchor_date = fields.Date.to_date(anchor_date) or fields.Date.context_today(self)
+        self.env.flush_all()
+
+        categories = self._generate_categories()
+        partners = self._generate_partners(rng, max(1, projects // 20))
+        equipment = self._generate_equipment(rng, categories, max(1, serials // SERIALS_PER_EQUIPMENT))
+        serial_rows = self._generate_serials(rng, equipment, serials)
+        project_counts = self._generate_projects(
+            rng, partners, equipment, serial_rows, projects, history, days, anchor_date)
+
+        # Stored computes that depend on the final serial statuses
+        self.env.invalidate_all()
+        records = self.env['otk.rental.equipment'].browse([eq['id'] for eq in equipment])
+        for fname in ('total_stock', 'available_stock', 'reserved_stock', 'rented_stock',
+                      'next_available_date', 'next_available_qty'):
+            self.env.add_to_compute(records._fields[fname], records)
+        self.env.flush_all()
+
+        counts = {
+            'otk.rental.equipment.category': len(categories),
+            'res.partner': len(partners),
+            'otk.rental.equipment': len(equipment),
+            'otk.rental.equipment.serial': len(serial_rows),
+            **project_counts,
+        }
+        _logger.info("Synthetic rental dataset (seed %s) loaded in %.1fs: %s",
+                     seed, time.monotonic() - started, counts)
+        return counts
+
+    # Loading helpers
+
+    def _reserve_ids(self, table, count):
+        """Take `count` ids from the table's sequence so rows can be COPY'ed with their ids"""
+        self.env.cr.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [table, count],
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _copy(self, table, columns, rows, audit=True):
+        """Stream rows into a table with COPY, adding the audit columns unless the rows carry them"""
+        if not rows:
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if audit:
+            now = fields.Datetime.now()
+            uid = self.env.uid
+            columns = (*columns, 'create_uid', 'create_date', 'write_uid', 'write_date')
+            rows = ((*row, uid, now, uid, now) for row in rows)
+        writer.writerows(rows)
+        buffer.seek(0)
+        self.env.cr.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    # Generators
+
+    def _generate_categories(self):
+        """Small category tree, created through the ORM (parent paths)"""
+        Category = self.env['otk.rental.equipment.category']
+        parents = Category.create([
+            {'name': f'{DATASET_PREFIX} {name}', 'sequence': index}
+            for index, name in enumerate(DATASET_CATEGORIES)
+        ])
+        return Category.create([
+            {'name': child, 'parent_id': parent.id, 'sequence': index}
+            for parent, children in zip(parents, DATASET_CATEGORIES.values())
+            for index, child in enumerate(children)
+        ]).ids
+
+    def _generate_partners(self, rng, count):
+        kinds = ('Productions', 'Events', 'Studios', 'Live', 'Media', 'Theatre', 'Festivals', 'AV')
+        return self.env['res.partner'].with_context(tracking_disable=True).create([{
+            'name': f'{DATASET_PREFIX} Customer {index:05d} {rng.choice(kinds)}',
+            'is_company': True,
+            'customer_rank': 1,
+        } for index in range(1, count + 1)]).ids
+
+    def _generate_equipment(self, rng, categories, count):
+        """Equipment models with skewed popularity and log-normal daily rates"""
+        ids = self._reserve_ids('otk_rental_equipment', count)
+        strategies = [code for code, _label in ALLOCATION_STRATEGIES]
+        equipment, rows, category_rows = [], [], []
+        for index, equipment_id in enumerate(ids, start=1):
+            category_id = rng.choice(categories)
+            daily_rate = round(rng.lognormvariate(3.4, 0.8), 2)
+            eq = {
+                'id': equipment_id,
+                'name': f'{DATASET_PREFIX} Equipment {index:05d}',
+                'code': f'{DATASET_PREFIX}-{index:05d}',
+                'daily_rate': daily_rate,
+                'weekly_rate': round(daily_rate * 5, 2),
+                'monthly_rate': round(daily_rate * 18, 2),
+                # Pareto weights: a few models get most serials and most bookings
+                'popularity': rng.paretovariate(1.2),
+            }
+            equipment.append(eq)
+            rows.append((
+                equipment_id, eq['name'], eq['code'], round(daily_rate * rng.uniform(15, 40), 2),
+                True, False, False, rng.choices(strategies, weights=(6, 3, 1))[0],
+                daily_rate, eq['weekly_rate'], eq['monthly_rate'], 10, True,
+            ))
+            category_rows.append((equipment_id, category_id))
+            if rng.random() < 0.1:
+                other = rng.choice(categories)
+                if other != category_id:
+                    category_rows.append((equipment_id, other))
+        self._copy('otk_rental_equipment', (
+            'id', 'name', 'code', 'item_value', 'has_serials', 'auto_generate_serials', 'is_kit',
+            'allocation_strategy', 'daily_rate', 'weekly_rate', 'monthly_rate', 'sequence', 'active',
+        ), rows)
+        self._copy('otk_rental_equipment_category_rel', ('equipment_id', 'category_id'), category_rows, audit=False)
+        return equipment
+
+    def _generate_serials(self, rng, equipment, count):
+        """
+        Serial numbers spread over the equipment by popularity.
+
+        Only ids and equipment are decided here: status, dates and usage
+        counters follow from the projects and are written with the rows later.
+        """
+        picks = rng.choices(equipment, weights=[eq['popularity'] for eq in equipment], k=count)
+        # Every equipment model gets at least one unit
+        for index, eq in enumerate(equipment[:count]):
+            picks[index] = eq
+        picks.sort(key=lambda eq: eq['id'])
+        ids = self._reserve_ids('otk_rental_equipment_serial', count)
+        self.env.cr.execute("SELECT id FROM stock_location WHERE usage = 'internal' AND active ORDER BY id")
+        locations = [row[0] for row in self.env.cr.fetchall()] or [None]
+        numbers = defaultdict(int)
+        serials = []
+        for serial_id, eq in zip(ids, picks):
+            numbers[eq['id']] += 1
+            serials.append({
+                'id': serial_id,
+                'equipment': eq,
+                'serial_number': f"{eq['code']}-{numbers[eq['id']]:05d}",
+                'location_id': rng.choice(locations),
+                'status': 'available',
+                'project': None,
+                'usage_days': 0,
+                'usage_count': 0,
+                'last_rental_date': None,
+                'last_project': None,
+            })
+        return serials
+
+    def _generate_projects(self, rng, partners, equipment, serials, count, history, days, anchor_date):
+        """
+        Projects in start date order, with lines, serial assignments and history.
+
+        Serials are allocated from a per-equipment heap keyed on the date they
+        come back, so no serial is booked twice over overlapping periods.
+        """
+        pools = defaultdict(list)
+        for serial in serials:
+            pools[serial['equipment']['id']].append((date.min, serial['id'], serial))
+        by_id = {eq['id']: eq for eq in equipment}
+        cum_weights = list(itertools.accumulate(eq['popularity'] for eq in equipment))
+        durations, duration_weights = zip(*DURATION_WEIGHTS.items())
+        # Serials per booked project so the history lands near the requested size
+        mean_serials = max(1.0, history / HISTORY_ROWS_PER_RENTAL / (count * 0.95))
+
+        project_ids = self._reserve_ids('otk_rental_project', count)
+        starts = sorted(
+            anchor_date - timedelta(days=rng.randint(-30, days))
+            for _index in range(count)
+        )
+        projects, items, assignments, events = [], [], [], []
+        for number, (project_id, start_date) in enumerate(zip(project_ids, starts), start=1):
+            duration = rng.choices(durations, weights=duration_weights)[0]
+            end_date = start_date + timedelta(days=duration)
+            state = self._pick_state(rng, start_date, end_date, anchor_date)
+            return_date = None
+            if state in ('returned', 'invoiced'):
+                late = rng.randint(1, 5) if rng.random() < 0.1 else 0
+                return_date = min(end_date + timedelta(days=late), anchor_date)
+            project = {
+                'id': project_id,
+                'name': f'{DATASET_PREFIX}/{number:06d}',
+                'partner_id': rng.choice(partners),
+                'start_date': start_date,
+                'end_date': end_date,
+                'return_date': return_date,
+                'state': state,
+                'duration': duration,
+                'total': 0.0,
+            }
+
+            # Lines: a skewed number of units spread over 1-5 equipment models
+            units = max(1, round(rng.expovariate(1 / mean_serials)))
+            lines = defaultdict(int)
+            for eq in rng.choices(equipment, cum_weights=cum_weights, k=min(units, rng.randint(1, 5))):
+                lines[eq['id']] += 1
+            for _extra in range(units - sum(lines.values())):
+                lines[rng.choice(list(lines))] += 1
+
+            booked = state not in ('draft', 'cancelled')
+            busy_until = return_date if return_date else date.max
+            project_items = []
+            for equipment_id, quantity in lines.items():
+                taken = []
+                if booked:
+                    pool = pools[equipment_id]
+                    while pool and len(taken) < quantity and pool[0][0] < start_date:
+                        taken.append(heapq.heappop(pool)[2])
+                    quantity = len(taken)
+                    if not quantity:
+                        continue
+                unit_price = round(self._list_price(by_id[equipment_id], duration), 2)
+                project_items.append((equipment_id, quantity, unit_price, taken))
+                for serial in taken:
+                    heapq.heappush(pools[equipment_id], (busy_until, serial['id'], serial))
+            if booked and not project_items:
+                # Nothing was free for the whole period
+                project['state'] = state = 'cancelled'
+
+            for sequence, (equipment_id, quantity, unit_price, taken) in enumerate(project_items, start=1):
+                item_id = len(items)
+                items.append((project, equipment_id, quantity, unit_price, 10 * sequence))
+                project['total'] += quantity * unit_price
+                for serial in taken:
+                    assignments.append((item_id, serial['id']))
+                    events.extend(self._rent_serial(rng, serial, project))
+            projects.append(project)
+
+        events.extend(self._settle_serials(rng, serials, anchor_date))
+        self._write_projects(projects, anchor_date)
+        item_ids = self._write_items(items)
+        self._write_serials(serials, anchor_date)
+        self._copy_assignments([(item_ids[index], serial_id) for index, serial_id in assignments])
+        self._write_history(events)
+        return {
+            'otk.rental.project': len(projects),
+            'otk.rental.project.item': len(items),
+            'otk_rental_project_item_serial_rel': len(assignments),
+            'otk.rental.project.item.status': len(events),
+        }
+
+    @api.model
+    def _pick_state(self, rng, start_date, end_date, anchor_date):
+        if start_date > anchor_date:
+            return 'reserved' if rng.random() < 0.7 else 'draft'
+        if end_date >= anchor_date:
+            return 'ongoing'
+        roll = rng.random()
+        if roll < 0.02:
+            return 'ongoing'  # overdue
+        if roll < 0.06:
+            return 'cancelled'
+        return 'invoiced' if roll < 0.30 else 'returned'
+
+    @api.model
+    def _list_price(self, eq, duration):
+        """Same fallback as the rate cards: best equipment rate for the duration"""
+        if duration >= 30 and eq['monthly_rate']:
+            return eq['monthly_rate'] * duration / 30
+        if duration >= 7 and eq['weekly_rate']:
+            return eq['weekly_rate'] * duration / 7
+        return eq['daily_rate'] * duration
+
+    @api.model
+    def _rent_serial(self, rng, serial, project):
+        """Apply one booking to a serial; returns its history events"""
+        start = datetime.combine(project['start_date'], dt_time(9))
+        booked_at = start - timedelta(days=rng.randint(1, 21), hours=rng.randint(0, 8))
+        events = [(project, serial, 'reserved', booked_at)]
+        if project['state'] == 'reserved':
+            serial.update(status='reserved', project=project)
+            return events
+        events.append((project, serial, 'rented', start + timedelta(minutes=rng.randint(0, 240))))
+        serial['last_rental_date'] = project['start_date']
+        if project['state'] == 'ongoing':
+            serial.update(status='rented', project=project, pickup_date=project['start_date'])
+            return events
+        serial['usage_days'] += (project['return_date'] - project['start_date']).days
+        serial['usage_count'] += 1
+        serial['last_project'] = project
+        returned_at = datetime.combine(project['return_date'], dt_time(17)) + timedelta(minutes=rng.randint(0, 120))
+        events.append((project, serial, 'returned', returned_at))
+        return events
+
+    @api.model
+    def _settle_serials(self, rng, serials, anchor_date):
+        """Final status of serials that are not on a current project"""
+        statuses, status_weights = zip(*IDLE_STATUS_WEIGHTS.items())
+        events = []
+        for serial in serials:
+            if serial['project']:
+                continue
+            status = rng.choices(statuses, weights=status_weights)[0]
+            serial['status'] = status
+            project = serial['last_project']
+            if status in ('damaged', 'repairing') and project:
+                # Found damaged on its last return
+                damaged_at = datetime.combine(project['return_date'], dt_time(18))
+                events.append((project, serial, 'damaged', damaged_at))
+                if status == 'repairing':
+                    events.append((project, serial, 'repairing', damaged_at + timedelta(days=rng.randint(1, 3))))
+        return events
+
+    # Writers
+
+    def _write_projects(self, projects, anchor_date):
+        rows = []
+        for project in projects:
+            overdue = project['state'] == 'ongoing' and project['end_date'] < anchor_date
+            total = round(project['total'], 2)
+            rows.append((
+                project['id'], project['name'], project['partner_id'], project['start_date'],
+                project['end_date'], project['return_date'], project['duration'], overdue,
+                total, False, 0.0, 0.0, False, 0.0, total,
+                'paid' if project['state'] == 'invoiced' else 'unpaid',
+                project['state'], 'none', 10, 0,
+            ))
+        self._copy('otk_rental_project', (
+            'id', 'name', 'partner_id', 'start_date', 'end_date', 'actual_return_date', 'duration_days',
+            'is_overdue', 'total_amount', 'late_fee_enabled', 'late_fee_amount', 'damage_fee', 'has_damage',
+            'discount_amount', 'grand_total', 'payment_status', 'state', 'billing_cycle', 'sequence', 'color',
+        ), rows)
+
+    def _write_items(self, items):
+        """Project lines with locked prices; returns their ids in input order"""
+        ids = self._reserve_ids('otk_rental_project_item', len(items))
+        self._copy('otk_rental_project_item', (
+            'id', 'project_id', 'project_state', 'equipment_id', 'quantity', 'unit_price',
+            'price_locked', 'price_snapshot_date', 'subtotal', 'sequence',
+        ), [
+            (item_id, project['id'], project['state'], equipment_id, quantity, unit_price, True,
+             datetime.combine(project['start_date'], dt_time(9)), round(quantity * unit_price, 2), sequence)
+            for item_id, (project, equipment_id, quantity, unit_price, sequence) in zip(ids, items)
+        ])
+        return ids
+
+    def _write_serials(self, serials, anchor_date):
+        rows = []
+        for serial in serials:
+            eq = serial['equipment']
+            project = serial['project']
+            pickup_date = project['start_date'] if serial['status'] == 'rented' else None
+            rental_days = (anchor_date - pickup_date).days if pickup_date else 0
+            rows.append((
+                serial['id'], eq['id'], eq['name'], serial['serial_number'], serial['status'],
+                serial['location_id'], project['id'] if project else None, pickup_date,
+                rental_days, round(rental_days * eq['daily_rate'], 2), serial['usage_days'],
+                serial['usage_count'], serial['last_rental_date'], 10, True,
+                f"QR_{serial['serial_number']}.png",
+            ))
+        self._copy('otk_rental_equipment_serial', (
+            'id', 'equipment_id', 'equipment_name', 'serial_number', 'status', 'location_id',
+            'current_project_id', 'actual_pickup_date', 'rental_days', 'rental_charge', 'usage_days',
+            'usage_count', 'last_rental_date', 'sequence', 'active', 'qr_code_filename',
+        ), rows)
+
+    def _copy_assignments(self, rows):
+        self._copy('otk_rental_project_item_serial_rel', ('item_id', 'serial_id'), rows, audit=False)
+
+    def _write_history(self, events):
+        """History rows dated at their event, like the transition engine would have written them"""
+        uid = self.env.uid
+        self._copy('otk_rental_project_item_status', (
+            'project_id', 'project_name', 'equipment_id', 'equipment_name', 'serial_id', 'serial_number',
+            'quantity', 'status', 'user_id', 'create_uid', 'create_date', 'write_uid', 'write_date',
+        ), [
+            (project['id'], project['name'], serial['equipment']['id'], serial['equipment']['name'],
+             serial['id'], serial['serial_number'], 1, status, uid, uid, at, uid, at)
+            for project, serial, status, at in events
+        ], audit=False)
@@ -3,13 +3,21 @@
 # Mail tracking - Activity feed and chatter
 # Serial tracking - Optional with auto-generation
 # Stock computation - Real-time available/reserved/rented counts
+# Next available date - Stored earliest return date of reserved/rented units
 # Multiple pricing - Daily, weekly, monthly rates
 # Validation - At least one rate must be set
 # Smart buttons - View serials and rental history
 # Availability check - Method for date-based availability
+# Stock by location - Availability and counters per depot
+# Kits - Bundles of component equipment, availability is the minimum over components
+# Quantity ledger - Non-serialized stock from ledger snapshots plus recent moves
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+from collections import defaultdict
+
+from .otk_rental_equipment_serial import ALLOCATION_STRATEGIES
 
 
 class OtkRentalEquipment(models.Model):
@@ -35,29 +43,61 @@ class OtkRentalEquipment(models.Model):
         default=False,
         help='Automatically generate serial numbers when added to projects'
     )
+    is_kit = fields.Boolean(
+        'Is a Kit',
+        default=False,
+        help='A bundle of other equipment, rented and priced as one line'
+    )
+    kit_line_ids = fields.One2many(
+        'otk.rental.kit.line',
+        'kit_id',
+        string='Kit Components'
+    )
+    allocation_strategy = fields.Selection(
+        ALLOCATION_STRATEGIES,
+        string='Serial Allocation',
+        help='Which free serials are picked on auto-assignment. Leave empty to use the global setting.'
+    )
     
     # Stock Management
     total_stock = fields.Integer(
         'Total Stock', 
         compute='_compute_stock', 
         store=True,
+        recursive=True,
         help='Total number of units/serials'
     )
     available_stock = fields.Integer(
         'Available Stock', 
         compute='_compute_stock', 
         store=True,
+        recursive=True,
         help='Number of available units/serials'
     )
     reserved_stock = fields.Integer(
         'Reserved Stock',
         compute='_compute_stock',
-        store=True
+        store=True,
+        recursive=True
     )
     rented_stock = fields.Integer(
         'Currently Rented',
         compute='_compute_stock',
-        store=True
+        store=True,
+        recursive=True
+    )
+    next_available_date = fields.Date(
+        'Next Available',
+        compute='_compute_next_available',
+        store=True,
+        index=True,
+        help='Earliest date a reserved or rented unit comes back (day after its project ends)'
+    )
+    next_available_qty = fields.Integer(
+        'Units Coming Back',
+        compute='_compute_next_available',
+        store=True,
+        help='Number of units coming back on the next available date'
     )
     
     # Pricing
@@ -84,6 +124,11 @@ class OtkRentalEquipment(models.Model):
         'equipment_id',
         'Serial Numbers'
     )
+    stock_move_ids = fields.One2many(
+        'otk.rental.stock.move',
+        'equipment_id',
+        'Quantity Ledger'
+    )
     project_item_ids = fields.One2many(
         'otk.rental.project.item',
         'equipment_id',
@@ -104,23 +149,68 @@ class OtkRentalEquipment(models.Model):
         compute='_compute_rental_count'
     )
     
-    @api.depends('serial_ids', 'serial_ids.status')
+    @api.depends('serial_ids', 'serial_ids.status', 'is_kit', 'kit_line_ids.quantity',
+                 'kit_line_ids.component_id.total_stock', 'kit_line_ids.component_id.available_stock',
+                 'stock_move_ids')
     def _compute_stock(self):
         """Calculate stock levels based on serial statuses"""
+        # Non-serialized equipment: ledger balances in one query
+        quantity_tracked = self.filtered(lambda e: not e.has_serials and not e.is_kit and e.id)
+        balances = self.env['otk.rental.stock.snapshot']._get_balances(quantity_tracked.ids)
         for equipment in self:
-            if equipment.has_serials:
+            serialized_lines = equipment.kit_line_ids.filtered('component_id.has_serials') if equipment.is_kit else False
+            if serialized_lines:
+                # Kits: as many as the scarcest serialized component allows
+                equipment.total_stock = min(line.component_id.total_stock // line.quantity for line in serialized_lines)
+                equipment.available_stock = min(line.component_id.available_stock // line.quantity for line in serialized_lines)
+                equipment.reserved_stock = 0
+                equipment.rented_stock = 0
+            elif equipment.has_serials:
                 serials = equipment.serial_ids
                 equipment.total_stock = len(serials)
                 equipment.available_stock = len(serials.filtered(lambda s: s.status == 'available' or s.status == 'returned'))
                 equipment.reserved_stock = len(serials.filtered(lambda s: s.status == 'reserved'))
                 equipment.rented_stock = len(serials.filtered(lambda s: s.status == 'rented'))
+            elif equipment.id in balances:
+                on_hand, reserved, rented = balances[equipment.id]
+                equipment.total_stock = on_hand
+                equipment.available_stock = on_hand - reserved - rented
+                equipment.reserved_stock = reserved
+                equipment.rented_stock = rented
             else:
-                # For non-serialized items, set to 0 or implement quantity-based logic
+                # Non-serialized items without ledger history are not stock-tracked
                 equipment.total_stock = 0
                 equipment.available_stock = 1
                 equipment.reserved_stock = 0
                 equipment.rented_stock = 0
     
+    @api.depends('serial_ids.status', 'serial_ids.current_project_id.end_date')
+    def _compute_next_available(self):
+        """
+        Earliest return date of held serials, from their current project's end date.
+        Units of overdue rentals are expected tomorrow at the earliest, never in the past.
+        """
+        result = {}
+        equipment_ids = [equipment_id for equipment_id in self.ids if equipment_id]
+        if equipment_ids:
+            self.env['otk.rental.equipment.serial'].flush_model(['equipment_id', 'status', 'current_project_id'])
+            self.env['otk.rental.project'].flush_model(['end_date'])
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (s.equipment_id)
+                       s.equipment_id, GREATEST(p.end_date + 1, CURRENT_DATE + 1) AS day, COUNT(*)
+                  FROM otk_rental_equipment_serial s
+                  JOIN otk_rental_project p ON p.id = s.current_project_id
+                 WHERE s.equipment_id = ANY(%s)
+                   AND s.status IN ('reserved', 'rented')
+                   AND p.end_date IS NOT NULL
+                 GROUP BY s.equipment_id, day
+                 ORDER BY s.equipment_id, day
+            """, [equipment_ids])
+            result = {equipment_id: (day, qty) for equipment_id, day, qty in self.env.cr.fetchall()}
+
+        for equipment in self:
+            equipment.next_available_date, equipment.next_available_qty = result.get(equipment.id, (False, 0))
+    
     def _compute_serial_count(self):
         """Count total serials"""
         for equipment in self:
@@ -145,6 +235,12 @@ class OtkRentalEquipment(models.Model):
             vals['code'] = self.env['ir.sequence'].next_by_code('otk.rental.equipment') or 'EQ-NEW'
         return super().create(vals)
     
+    def write(self, vals):
+        # Prices resolved earlier in the transaction may come from these rates or categories
+        if {'daily_rate', 'weekly_rate', 'monthly_rate', 'category_ids'} & set(vals):
+            self.env['otk.rental.rate.card']._clear_lookup_cache()
+        return super().write(vals)
+    
     def action_view_serials(self):
         """Open serials list for this equipment"""
         self.ensure_one()
@@ -195,14 +291,234 @@ class OtkRentalEquipment(models.Model):
         """Check if equipment is available for given dates and quantity"""
         self.ensure_one()
         
-        if not self.has_serials:
-            # For non-serialized items, simple stock check
-            return self.available_stock >= quantity
-        
-        # For serialized items, check available serials
-        available_serials = self.serial_ids.filtered(lambda s: s.status == 'available' or s.status == 'returned')
+        if self.is_kit:
+            available = self._get_kit_available_quantities(start_date, end_date)[self.id]
+            return available is None or available >= quantity
         
-        # TODO: Check if any reserved/rented serials will be available in the date range
-        # This requires checking project dates
+        if not self.has_serials:
+            # For non-serialized items, check the quantity ledger when there is one
+            available = self._get_ledger_available_quantities(start_date, end_date)[self.id]
+            return (self.available_stock if available is None else available) >= quantity
         
-        return len(available_serials) >= quantity
\ No newline at end of file
+        # For serialized items, count serials not booked in the date range
+        return self._get_available_quantities(start_date, end_date)[self.id] >= quantity
+
+    def _get_available_quantities(self, start_date, end_date, exclude_project_ids=(), by_location=False):
+        """
+        Count serials free for the whole date range, for all equipment in self.
+
+        A serial is free unless it is out of service (damaged, under repair, disposed)
+        or still held by a project overlapping the range: reserved and ongoing
+        projects, and draft projects the waitlist reserved serials for. Ongoing
+        projects hold their serials until returned, even past their end date.
+        Unexpired checkout holds overlapping the range are subtracted (except the
+        holds being converted, see _get_converting_hold_ids). Holds are not tied
+        to a depot: per location, a depot offers its free serials as long as the
+        other depots can still cover the holds.
+
+        Returns:
+            dict: {equipment_id: available quantity}, or
+                  {(equipment_id, location_id): available quantity} with by_location
+        """
+        if not self:
+            return {}
+        self.env['otk.rental.equipment.serial'].flush_model(['equipment_id', 'location_id', 'status', 'active'])
+        self.env['otk.rental.project.item'].flush_model(['project_id', 'equipment_id', 'assigned_serial_ids'])
+        self.env['otk.rental.project'].flush_model(['state', 'start_date', 'end_date'])
+        self.env['otk.rental.hold'].flush_model(['equipment_id', 'quantity', 'start_date', 'end_date', 'expires_at'])
+        self.env.cr.execute(SQL("""
+            WITH free AS (
+                SELECT s.equipment_id, %(location)s AS location_id, COUNT(*) AS qty
+                  FROM otk_rental_equipment_serial s
+                 WHERE s.equipment_id = ANY(%(equipment_ids)s)
+                   AND s.active
+                   AND s.status NOT IN ('damaged', 'repairing', 'disposed')
+                   AND NOT EXISTS (
+                        SELECT 1
+                          FROM otk_rental_project_item_serial_rel rel
+                          JOIN otk_rental_project_item i ON i.id = rel.item_id
+                          JOIN otk_rental_project p ON p.id = i.project_id
+                         WHERE rel.serial_id = s.id
+                           AND s.status IN ('reserved', 'rented')
+                           AND p.state IN ('draft', 'reserved', 'ongoing')
+                           AND p.id != ALL(%(exclude_project_ids)s)
+                           AND p.start_date <= %(end_date)s
+                           AND (p.end_date >= %(start_date)s OR p.state = 'ongoing')
+                   )
+                 GROUP BY 1, 2
+            ), held AS (
+                SELECT h.equipment_id, SUM(h.quantity) AS qty
+                  FROM otk_rental_hold h
+                 WHERE h.equipment_id = ANY(%(equipment_ids)s)
+                   AND h.expires_at > NOW() AT TIME ZONE 'UTC'
+                   AND h.start_date <= %(end_date)s
+                   AND h.end_date >= %(start_date)s
+                   AND h.id != ALL(%(exclude_hold_ids)s)
+                 GROUP BY 1
+            )
+            SELECT free.equipment_id, free.location_id,
+                   GREATEST(LEAST(free.qty, SUM(free.qty) OVER (PARTITION BY free.equipment_id)
+                                            - COALESCE(held.qty, 0)), 0)::int
+              FROM free
+              LEFT JOIN held ON held.equipment_id = free.equipment_id
+        """,
+            location=SQL("s.location_id") if by_location else SQL("NULL::int"),
+            equipment_ids=self.ids,
+            exclude_project_ids=list(exclude_project_ids),
+            exclude_hold_ids=self._get_converting_hold_ids(),
+            start_date=start_date,
+            end_date=end_date,
+        ))
+        if by_location:
+            return {
+                (equipment_id, location_id): qty
+                for equipment_id, location_id, qty in self.env.cr.fetchall()
+            }
+        available = dict.fromkeys(self.ids, 0)
+        available.update((equipment_id, qty) for equipment_id, _location_id, qty in self.env.cr.fetchall())
+        return available
+
+    def _get_ledger_available_quantities(self, start_date, end_date, exclude_project_ids=()):
+        """
+        Free quantity of non-serialized equipment for the whole date range:
+        current on-hand balance (snapshot + recent moves) minus the quantities
+        still reserved or out on reserved/ongoing projects overlapping the range
+        and unexpired checkout holds.
+
+        Returns:
+            dict: {equipment_id: available quantity, or None without ledger history}
+        """
+        balances = self.env['otk.rental.stock.snapshot']._get_balances(self.ids)
+        result = dict.fromkeys(self.ids)
+        if not balances:
+            return result
+        self.env['otk.rental.project'].flush_model(['state', 'start_date', 'end_date'])
+        self.env['otk.rental.hold'].flush_model(['equipment_id', 'quantity', 'start_date', 'end_date', 'expires_at'])
+        self.env.cr.execute("""
+            SELECT equipment_id, SUM(qty)
+              FROM (
+                    SELECT m.equipment_id, m.reserved_delta + m.rented_delta AS qty
+                      FROM otk_rental_stock_move m
+                      JOIN otk_rental_project p ON p.id = m.project_id
+                     WHERE m.equipment_id = ANY(%(equipment_ids)s)
+                       AND p.state IN ('reserved', 'ongoing')
+                       AND p.id != ALL(%(exclude_project_ids)s)
+                       AND p.start_date <= %(end_date)s
+                       AND (p.end_date >= %(start_date)s OR p.state = 'ongoing')
+                    UNION ALL
+                    SELECT h.equipment_id, h.quantity
+                      FROM otk_rental_hold h
+                     WHERE h.equipment_id = ANY(%(equipment_ids)s)
+                       AND h.expires_at > NOW() AT TIME ZONE 'UTC'
+                       AND h.start_date <= %(end_date)s
+                       AND h.end_date >= %(start_date)s
+                       AND h.id != ALL(%(exclude_hold_ids)s)
+              ) booked
+             GROUP BY equipment_id
+        """, {
+            'equipment_ids': list(balances),
+            'exclude_project_ids': list(exclude_project_ids),
+            'exclude_hold_ids': self._get_converting_hold_ids(),
+            'start_date': start_date,
+            'end_date': end_date,
+        })
+        booked = dict(self.env.cr.fetchall())
+        for equipment_id, (on_hand, reserved, rented) in balances.items():
+            result[equipment_id] = on_hand - booked.get(equipment_id, 0)
+        return result
+
+    def _get_converting_hold_ids(self):
+        """Holds being turned into the reservation in progress: their units are that reservation's"""
+        return list(self.env.context.get('otk_rental_converting_hold_ids') or [])
+
+    def _lock_for_allocation(self):
+        """
+        Lock these equipment rows until the transaction ends, so concurrent
+        checkouts and reservations of the same equipment are serialized.
+        """
+        self.env.cr.execute(
+            "SELECT id FROM otk_rental_equipment WHERE id = ANY(%s) ORDER BY id FOR UPDATE",
+            [self.ids],
+        )
+
+    @api.model
+    def _check_allocatable(self, quantities, start_date, end_date, exclude_project_ids=()):
+        """
+        Raise unless serials can be allocated for the date range without
+        taking units that unexpired checkout holds guarantee.
+
+        Serial allocation picks units by status only, so every allocation path
+        checks here first, with the equipment rows locked as in
+        otk.rental.hold._place. Equipment generating its serials on demand
+        cannot run short and is not checked.
+
+        Args:
+            quantities: {serialized equipment record: quantity to allocate}
+            exclude_project_ids: projects whose own serials count as free
+        """
+        equipment = self.union(*(eq for eq, qty in quantities.items() if qty > 0)).filtered(
+            lambda e: not e.auto_generate_serials)
+        if not equipment:
+            return
+        equipment._lock_for_allocation()
+        available = equipment._get_available_quantities(start_date, end_date, exclude_project_ids)
+        shortages = [
+            _('%s: requested %d, available %d') % (eq.name, quantities[eq], available[eq.id])
+            for eq in equipment
+            if available[eq.id] < quantities[eq]
+        ]
+        if shortages:
+            raise UserError(_(
+                'Not enough free units for these dates (checkout holds included):\n%s'
+            ) % '\n'.join(shortages))
+
+    def _get_kit_available_quantities(self, start_date, end_date, exclude_project_ids=()):
+        """
+        Kits available for the whole date range: for each kit, the minimum over
+        its serialized components of free units // units per kit. Availability
+        of all components of all kits comes from one query.
+
+        Returns:
+            dict: {kit_id: available kits, or None when no component is serialized}
+        """
+        kit_lines = self.kit_line_ids.filtered('component_id.has_serials')
+        available = kit_lines.component_id._get_available_quantities(start_date, end_date, exclude_project_ids)
+        result = dict.fromkeys(self.ids)
+        for line in kit_lines:
+            kits = available[line.component_id.id] // line.quantity
+            current = result[line.kit_id.id]
+            result[line.kit_id.id] = kits if current is None else min(current, kits)
+        return result
+
+    def _get_stock_by_location(self):
+        """
+        Serial counts per equipment, location and status in one aggregate.
+
+        Returns:
+            dict: {(equipment_id, location_id): {status: count}}
+        """
+        stock = defaultdict(dict)
+        groups = self.env['otk.rental.equipment.serial']._read_group(
+            [('equipment_id', 'in', self.ids)],
+            ['equipment_id', 'location_id', 'status'],
+            ['__count'],
+        )
+        for equipment, location, status, count in groups:
+            stock[equipment.id, location.id][status] = count
+        return dict(stock)
+
+    def action_view_stock_by_location(self):
+        """Serial stock of this equipment per location and status"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Stock by Location'),
+            'res_model': 'otk.rental.equipment.serial',
+            'view_mode': 'pivot,list,form',
+            'domain': [('equipment_id', '=', self.id)],
+            'context': {
+                'default_equipment_id': self.id,
+                'pivot_row_groupby': ['location_id'],
+                'pivot_column_groupby': ['status'],
+            },
+        }
@@ -3,21 +3,48 @@
 # Unique serial numbers - SQL constraint enforces uniqueness
 # Auto-generation - Can auto-generate serials based on equipment code
 # Status workflow - 7 statuses (Available → Reserved → Rented → Returned → etc.)
-# Status history - Automatic logging when status changes
+# Status history - Logged in bulk by the transition engine
 # Current project tracking - Know which project has this serial
 # Action buttons - Quick status changes (Set Available, Set Damaged, etc.)
 # Validation - Status must match project assignment
 # Smart name_get - Shows equipment name and status in selections
+# Usage tracking - Cumulative rental days/count for wear-balanced allocation
+# Allocation strategies - Pick serials by sequence, least used or round-robin (indexed ORDER BY)
+# Multi-location - Depot location per serial, allocation prefers the project's pickup location
+# Transition engine - Allowed status changes declared once, applied per batch with bulk history
 
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError, ValidationError
 
 import base64
 import logging
 _logger = logging.getLogger(__name__)
 
+# Serial allocation strategies and the ORDER BY picking serials for each
+ALLOCATION_STRATEGIES = [
+    ('sequence', 'Sequence'),
+    ('least_used', 'Least Rental Days'),
+    ('round_robin', 'Round-Robin (Least Recently Rented)'),
+]
+ALLOCATION_ORDERS = {
+    'sequence': 'sequence, serial_number, id',
+    'least_used': 'usage_days, usage_count, id',
+    'round_robin': 'last_rental_date asc nulls first, id',
+}
+
+# Serial status -> statuses it may move to (see _transition)
+SERIAL_TRANSITIONS = {
+    'available': {'reserved', 'damaged', 'repairing', 'disposed'},
+    'reserved': {'available', 'rented', 'returned', 'damaged', 'disposed'},
+    'rented': {'returned', 'damaged', 'repairing', 'disposed'},
+    'returned': {'available', 'reserved', 'damaged', 'repairing', 'disposed'},
+    'damaged': {'repairing', 'available', 'disposed'},
+    'repairing': {'available', 'damaged', 'disposed'},
+    'disposed': set(),
+}
+
 class OtkRentalEquipmentSerial(models.Model):
     _name = 'otk.rental.equipment.serial'
     _description = 'Equipment Serial Number'
@@ -82,6 +109,16 @@ class OtkRentalEquipmentSerial(models.Model):
         ('disposed', 'Disposed')
     ], string='Status', default='available', required=True, tracking=True, index=True)
     
+    # Depot holding this unit
+    location_id = fields.Many2one(
+        'stock.location',
+        'Location',
+        domain=[('usage', '=', 'internal')],
+        index=True,
+        tracking=True,
+        help='Depot where this unit is stored when not rented'
+    )
+    
     # Current rental information
     current_project_id = fields.Many2one(
         'otk.rental.project',
@@ -94,6 +131,24 @@ class OtkRentalEquipmentSerial(models.Model):
         readonly=True
     )
     
+    # Usage counters (maintained on rent/return, used by allocation strategies)
+    usage_days = fields.Integer(
+        'Cumulative Rental Days',
+        readonly=True,
+        copy=False,
+        help='Total days this serial has been out on completed rentals'
+    )
+    usage_count = fields.Integer(
+        'Rental Count',
+        readonly=True,
+        copy=False
+    )
+    last_rental_date = fields.Date(
+        'Last Rented',
+        readonly=True,
+        copy=False
+    )
+    
     # Status history
     status_history_ids = fields.One2many(
         'otk.rental.project.item.status',
@@ -140,25 +195,6 @@ class OtkRentalEquipmentSerial(models.Model):
         
         return super().create(vals)
     
-    def write(self, vals):
-        """Track status changes"""
-        result = super().write(vals)
-        
-        # If status changed, log it in history
-        if 'status' in vals:
-            for serial in self:
-                if serial.current_project_id:
-                    # Create status history entry
-                    self.env['otk.rental.project.item.status'].create({
-                        'project_id': serial.current_project_id.id,
-                        'equipment_id': serial.equipment_id.id,
-                        'serial_id': serial.id,
-                        'status': vals['status'],
-                        'notes': f"Status changed to {dict(self._fields['status'].selection).get(vals['status'])}"
-                    })
-        
-        return result
-
     # NEW METHODS - Add these right after write()
     def unlink(self):
         """
@@ -198,16 +234,13 @@ class OtkRentalEquipmentSerial(models.Model):
         self.ensure_one()
         
         # Check if serial has been used
-        has_history = bool(serial.status_history_ids)
-        is_in_project = bool(serial.current_project_id)
-        is_not_available = serial.status != 'available'
+        has_history = bool(self.status_history_ids)
+        is_in_project = bool(self.current_project_id)
+        is_not_available = self.status != 'available'
         
         if has_history or is_in_project or is_not_available:
             # Deactivate instead of delete
-            self.write({
-                'active': False,
-                'status': 'disposed'
-            })
+            self._transition('disposed', {'active': False})
             
             return {
                 'type': 'ir.actions.client',
@@ -237,25 +270,19 @@ class OtkRentalEquipmentSerial(models.Model):
         
     def action_set_available(self):
         """Mark serial as available"""
-        self.write({
-            'status': 'available',
-            'current_project_id': False
-        })
+        self._transition('available', {'current_project_id': False})
     
     def action_set_damaged(self):
         """Mark serial as damaged"""
-        self.write({'status': 'damaged'})
+        self._transition('damaged')
     
     def action_set_repairing(self):
         """Mark serial as under repair"""
-        self.write({'status': 'repairing'})
+        self._transition('repairing')
     
     def action_set_disposed(self):
         """Mark serial as disposed"""
-        self.write({
-            'status': 'disposed',
-            'active': False
-        })
+        self._transition('disposed', {'active': False})
     
     def action_view_status_history(self):
         """View status history for this serial"""
@@ -314,6 +341,142 @@ class OtkRentalEquipmentSerial(models.Model):
                 serial.rental_charge = serial.rental_days * serial.equipment_id.daily_rate
             else:
                 serial.rental_charge = 0.0
+
+    def init(self):
+        # Stock per equipment, location and status (availability and counters)
+        tools.create_index(
+            self._cr,
+            'otk_rental_equipment_serial_equipment_location_status_index',
+            self._table,
+            ['equipment_id', 'location_id', 'status'],
+        )
+        # Allocation queries filter free serials of one equipment and order by usage
+        for name, column in [
+            ('otk_rental_equipment_serial_alloc_usage_index', 'usage_days'),
+            ('otk_rental_equipment_serial_alloc_last_rental_index', 'last_rental_date'),
+        ]:
+            tools.create_index(
+                self._cr, name, self._table, ['equipment_id', column],
+                where="active AND status IN ('available', 'returned')",
+            )
+
+    def _update_usage(self, new_status):
+        """Count rentals when serials go out and add the days when they come back"""
+        today = fields.Date.context_today(self)
+        starting = self.filtered(lambda s: s.status != 'rented' and new_status == 'rented')
+        ending = self.filtered(lambda s: s.status == 'rented' and new_status != 'rented')
+        if not (starting or ending):
+            return
+        self.flush_recordset(['actual_pickup_date', 'last_rental_date', 'usage_days', 'usage_count'])
+        if starting:
+            self.env.cr.execute("""
+                UPDATE otk_rental_equipment_serial
+                   SET usage_count = COALESCE(usage_count, 0) + 1,
+                       last_rental_date = %s
+                 WHERE id = ANY(%s)
+            """, [today, starting.ids])
+        if ending:
+            self.env.cr.execute("""
+                UPDATE otk_rental_equipment_serial
+                   SET usage_days = COALESCE(usage_days, 0)
+                                    + GREATEST(%s - COALESCE(actual_pickup_date, last_rental_date, %s), 0)
+                 WHERE id = ANY(%s)
+            """, [today, today, ending.ids])
+        self.invalidate_recordset(['usage_days', 'usage_count', 'last_rental_date'])
+
+    def _check_transition(self, new_status, vals=None):
+        """
+        Raise if any serial may not move to new_status. Staying put is allowed,
+        but not to change hands: a serial keeping its status cannot be moved
+        to another project by `vals`.
+        """
+        labels = dict(self._fields['status'].selection)
+        if new_status not in labels:
+            raise UserError(_('Unknown serial status: %s') % new_status)
+        invalid = self.filtered(lambda s: s.status != new_status and new_status not in SERIAL_TRANSITIONS[s.status])
+        if invalid:
+            raise UserError(_('Cannot change serial status to %s:\n%s') % (labels[new_status], '\n'.join(
+                '%s (%s)' % (serial.serial_number, labels[serial.status]) for serial in invalid
+            )))
+        project_id = (vals or {}).get('current_project_id')
+        if project_id:
+            taken = self.filtered(lambda s: s.status == new_status and s.current_project_id
+                                  and s.current_project_id.id != project_id)
+            if taken:
+                raise UserError(_('These serials are already %s for another project:\n%s') % (
+                    labels[new_status].lower(), '\n'.join(
+                        '%s (%s)' % (serial.serial_number, serial.current_project_id.name) for serial in taken
+                    )))
+
+    def _transition(self, new_status, vals=None, project=None, notes=None, history_vals=None):
+        """
+        Move a batch of serials to new_status.
+
+        The whole recordset is validated against SERIAL_TRANSITIONS and updated
+        with a single write (one UPDATE per batch, dependent fields recomputed
+        once), then one history row per serial is created in a single call.
+
+        Args:
+            vals: other serial values written together with the status
+            project: project for the history rows, defaults to each serial's
+                current project before the change; serials without one get no row
+            notes: history note, a string or a function of the serial
+            history_vals: extra values for every history row (signature, damage...)
+
+        Returns:
+            self
+        """
+        if not self:
+            return self
+        self._check_transition(new_status, vals)
+        projects = {serial.id: project or serial.current_project_id for serial in self}
+        self.with_context(otk_rental_transition=True).write(dict(vals or {}, status=new_status))
+
+        label = dict(self._fields['status'].selection)[new_status]
+        self.env['otk.rental.project.item.status'].create([{
+            'project_id': projects[serial.id].id,
+            'equipment_id': serial.equipment_id.id,
+            'serial_id': serial.id,
+            'quantity': 1,
+            'status': new_status,
+            'notes': notes(serial) if callable(notes) else notes or f'Status changed to {label}',
+            **(history_vals or {}),
+        } for serial in self if projects[serial.id]])
+        return self
+
+    @api.model
+    def _get_allocation_strategy(self, equipment):
+        return equipment.allocation_strategy or self.env['otk.rental.settings'].get('serial_allocation_strategy')
+
+    @api.model
+    def _allocate(self, equipment, quantity, exclude=None, strategy=None, location=None):
+        """
+        Pick free serials of an equipment with the configured allocation strategy.
+
+        The database does the ordering and the limit, using the partial
+        allocation indexes, so only the selected serials are loaded. With a
+        location, serials stored there (or in its sub-locations) come first
+        and other depots only fill the shortage.
+        """
+        if quantity <= 0:
+            return self.browse()
+        strategy = strategy or self._get_allocation_strategy(equipment)
+        order = ALLOCATION_ORDERS.get(strategy, ALLOCATION_ORDERS['sequence'])
+        domain = [
+            ('equipment_id', '=', equipment.id),
+            ('status', 'in', ['available', 'returned']),
+        ]
+        if exclude:
+            domain.append(('id', 'not in', exclude.ids))
+
+        serials = self.browse()
+        if location:
+            serials = self.search(domain + [('location_id', 'child_of', location.id)], order=order, limit=quantity)
+            if len(serials) >= quantity:
+                return serials
+            domain.append(('id', 'not in', serials.ids))
+        return serials + self.search(domain, order=order, limit=quantity - len(serials))
+
 # ========== QR CODE METHODS ==========
     
     @api.depends('serial_number')
@@ -341,7 +504,11 @@ class OtkRentalEquipmentSerial(models.Model):
     
     def write(self, vals):
         """Regenerate QR code if serial number changes"""
-        result = super(RentalEquipmentSerial, self).write(vals)
+        if 'status' in vals:
+            if not self.env.context.get('otk_rental_transition'):
+                self._check_transition(vals['status'], vals)
+            self._update_usage(vals['status'])
+        result = super().write(vals)
         
         # Regenerate QR if serial_number changes
         if 'serial_number' in vals:
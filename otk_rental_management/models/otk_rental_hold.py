@@ -0,0 +1,182 @@
+# Key Features:
+
+# Checkout holds - Quantity of equipment kept aside for a window while a customer checks out
+# Availability - Unexpired holds are subtracted by the serial and ledger availability queries
+# TTL - Holds expire after a configurable number of minutes (Settings > Checkout hold duration)
+# Cheap expiry - The sweep cron releases every stale hold in one DELETE
+# Conversion - A checkout's holds become a reserved project without another availability scan
+
+import uuid
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError, ValidationError
+
+
+class OtkRentalHold(models.Model):
+    _name = 'otk.rental.hold'
+    _description = 'Rental Checkout Hold'
+    _order = 'expires_at, id'
+    _rec_name = 'reference'
+
+    reference = fields.Char(
+        'Checkout Reference',
+        required=True,
+        index=True,
+        copy=False,
+        default=lambda self: uuid.uuid4().hex,
+        help='Groups the holds of one checkout; used to confirm or release them together'
+    )
+    partner_id = fields.Many2one('res.partner', 'Customer', index=True)
+    equipment_id = fields.Many2one(
+        'otk.rental.equipment',
+        'Equipment',
+        required=True,
+        ondelete='cascade',
+        domain=[('is_kit', '=', False)]
+    )
+    quantity = fields.Integer('Quantity', required=True, default=1)
+    start_date = fields.Date('Start Date', required=True)
+    end_date = fields.Date('End Date', required=True)
+    expires_at = fields.Datetime('Expires At', required=True, index=True)
+    is_expired = fields.Boolean('Expired', compute='_compute_is_expired')
+
+    def init(self):
+        # Held quantities per equipment (availability queries filter on expiry)
+        tools.create_index(self._cr, 'otk_rental_hold_equipment_expires_index', self._table, ['equipment_id', 'expires_at'])
+
+    @api.depends('expires_at')
+    def _compute_is_expired(self):
+        now = fields.Datetime.now()
+        for hold in self:
+            hold.is_expired = bool(hold.expires_at) and hold.expires_at <= now
+
+    @api.constrains('quantity', 'start_date', 'end_date', 'equipment_id')
+    def _check_hold(self):
+        for hold in self:
+            if hold.quantity <= 0:
+                raise ValidationError(_('Hold quantity must be positive.'))
+            if hold.end_date < hold.start_date:
+                raise ValidationError(_('End date cannot be before start date.'))
+            if hold.equipment_id.is_kit:
+                raise ValidationError(_('Kits cannot be held directly (%s). Hold their components instead.') % (
+                    hold.equipment_id.name))
+
+    @api.model
+    def _get_expiry(self):
+        minutes = self.env['otk.rental.settings'].get('hold_ttl_minutes')
+        return fields.Datetime.now() + timedelta(minutes=max(minutes, 1))
+
+    @api.model
+    def _place(self, partner, start_date, end_date, lines, reference=None):
+        """
+        Hold a basket for a checkout after checking it is still available.
+
+        Equipment rows are locked until the transaction ends so concurrent
+        checkouts of the same equipment cannot both take the last units.
+
+        Args:
+            partner: res.partner record (may be empty)
+            start_date, end_date: rental period
+            lines: list of (equipment record, quantity)
+            reference: checkout reference to add to; a new one is generated if empty
+
+        Returns:
+            otk.rental.hold records created
+        """
+        requested = {}
+        for equipment, qty in lines:
+            if equipment.is_kit:
+                raise UserError(_('Kits cannot be held directly (%s). Hold their components instead.') % equipment.name)
+            requested[equipment] = requested.get(equipment, 0) + qty
+        equipment = self.env['otk.rental.equipment'].union(*requested)
+
+        equipment._lock_for_allocation()
+        available = equipment.filtered('has_serials')._get_available_quantities(start_date, end_date)
+        quantity_tracked = equipment.filtered(lambda e: not e.has_serials)
+        if quantity_tracked:
+            available.update(quantity_tracked._get_ledger_available_quantities(start_date, end_date))
+
+        shortages = [
+            _('%s: requested %d, available %d') % (eq.name, qty, available.get(eq.id, 0))
+            for eq, qty in requested.items()
+            if (eq.has_serials or available.get(eq.id) is not None) and available.get(eq.id, 0) < qty
+        ]
+        if shortages:
+            raise UserError(_('Not enough equipment to hold:\n%s') % '\n'.join(shortages))
+
+        expires_at = self._get_expiry()
+        reference = reference or uuid.uuid4().hex
+        return self.create([{
+            'reference': reference,
+            'partner_id': partner.id,
+            'equipment_id': eq.id,
+            'quantity': qty,
+            'start_date': start_date,
+            'end_date': end_date,
+            'expires_at': expires_at,
+        } for eq, qty in requested.items()])
+
+    def _extend(self):
+        """Restart the TTL of live holds (customer still checking out)"""
+        self.filtered(lambda h: not h.is_expired).write({'expires_at': self._get_expiry()})
+
+    def _convert_to_reservation(self, partner=None, project_vals=None):
+        """
+        Turn the holds of one checkout into a reserved project.
+
+        The units were checked when the holds were placed and have been
+        subtracted from availability since. Reserving checks availability
+        again with these holds excluded, since their units are the ones taken.
+
+        Returns:
+            otk.rental.project record
+        """
+        if not self:
+            raise UserError(_('Nothing to confirm: the checkout has no holds.'))
+        if any(hold.is_expired for hold in self):
+            raise UserError(_('The checkout hold has expired. Please check availability again.'))
+        windows = set(self.mapped(lambda h: (h.start_date, h.end_date)))
+        if len(windows) > 1:
+            raise UserError(_('All held items of a checkout must share the same rental period.'))
+        partner = partner or self.partner_id[:1]
+        if not partner:
+            raise UserError(_('A customer is required to confirm the checkout.'))
+
+        start_date, end_date = windows.pop()
+        # All or nothing: a failed reservation leaves no draft project and keeps the holds
+        with self.env.cr.savepoint():
+            project = self.env['otk.rental.project'].create({
+                'partner_id': partner.id,
+                'start_date': start_date,
+                'end_date': end_date,
+                **(project_vals or {}),
+                'item_ids': [(0, 0, {
+                    'equipment_id': hold.equipment_id.id,
+                    'quantity': hold.quantity,
+                }) for hold in self],
+            })
+            project.with_context(otk_rental_converting_hold_ids=self.ids).action_reserve()
+            # The holds are only released once reserving succeeded
+            self.unlink()
+        return project
+
+    def action_convert_to_reservation(self):
+        """Backend: confirm the selected checkout into a reserved project"""
+        project = self._convert_to_reservation()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'otk.rental.project',
+            'res_id': project.id,
+            'view_mode': 'form',
+        }
+
+    def action_release(self):
+        self.unlink()
+
+    @api.model
+    def _cron_expire_holds(self):
+        """Release every expired hold in a single statement"""
+        self.flush_model(['expires_at'])
+        self.env.cr.execute("DELETE FROM otk_rental_hold WHERE expires_at <= NOW() AT TIME ZONE 'UTC'")
+        self.invalidate_model()
@@ -0,0 +1,62 @@
+# Key Features:
+
+# Kit definitions - A kit equipment made of component equipment and quantities
+# Composed availability - Kits available = minimum over components for the window
+# Lead component - First serialized component drives kit billing (kit count and dates)
+# Validation - No nested kits, no self-reference, positive quantities
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class OtkRentalKitLine(models.Model):
+    _name = 'otk.rental.kit.line'
+    _description = 'Rental Kit Component'
+    _order = 'kit_id, sequence, id'
+
+    kit_id = fields.Many2one(
+        'otk.rental.equipment',
+        'Kit',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    component_id = fields.Many2one(
+        'otk.rental.equipment',
+        'Component',
+        required=True,
+        ondelete='restrict',
+        index=True,
+        domain=[('is_kit', '=', False)]
+    )
+    quantity = fields.Integer(
+        'Quantity',
+        required=True,
+        default=1,
+        help='Units of this component in one kit'
+    )
+    sequence = fields.Integer(
+        'Sequence',
+        default=10,
+        help='The first serialized component is the lead: its pickup/return dates drive kit billing'
+    )
+    component_has_serials = fields.Boolean(
+        'Has Serials',
+        related='component_id.has_serials',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('component_unique', 'unique(kit_id, component_id)', 'A component can only be listed once per kit!'),
+    ]
+
+    @api.constrains('kit_id', 'component_id', 'quantity')
+    def _check_component(self):
+        for line in self:
+            if line.quantity <= 0:
+                raise ValidationError(_('Component quantity must be positive.'))
+            if line.component_id == line.kit_id:
+                raise ValidationError(_('A kit cannot contain itself.'))
+            if line.component_id.is_kit:
+                raise ValidationError(_('Kit %s cannot contain another kit (%s).') % (
+                    line.kit_id.name, line.component_id.name))
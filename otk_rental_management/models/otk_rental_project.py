@@ -11,9 +11,14 @@
 # Status history - Track all changes
 # Mail integration - Activity tracking and chatter
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError, UserError
+from collections import defaultdict
 from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+
+import logging
+_logger = logging.getLogger(__name__)
 
 
 class OtkRentalProject(models.Model):
@@ -57,10 +62,20 @@ class OtkRentalProject(models.Model):
     end_date = fields.Date(
         'Expected End Date',
         required=True,
-        tracking=True
+        tracking=True,
+        index=True
     )
     actual_return_date = fields.Date('Actual Return Date', tracking=True)
     
+    # Depot the customer picks up from (serial allocation prefers its stock)
+    pickup_location_id = fields.Many2one(
+        'stock.location',
+        'Pickup Location',
+        domain=[('usage', '=', 'internal')],
+        tracking=True,
+        help='Depot the equipment is picked up from. Serials stored there are allocated first.'
+    )
+    
     # Duration Calculations
     duration_days = fields.Integer(
         'Duration (Days)',
@@ -75,6 +90,26 @@ class OtkRentalProject(models.Model):
     )
     is_overdue = fields.Boolean('Is Overdue', compute='_compute_overdue', store=True)
     
+    # Notification tracking (used by the reminder/overdue cron)
+    reminder_sent_date = fields.Date(
+        'Reminder Sent On',
+        copy=False,
+        readonly=True,
+        help='Date the end-of-rental reminder was queued for the customer'
+    )
+    overdue_notice_date = fields.Date(
+        'Last Overdue Notice',
+        copy=False,
+        readonly=True,
+        help='Date the last overdue notification was queued for the customer'
+    )
+    invoicing_failed_date = fields.Datetime(
+        'Automatic Invoicing Failed On',
+        copy=False,
+        readonly=True,
+        help='Automatic invoicing skips this project until it is edited (see chatter for the error)'
+    )
+    
     # Special Requirements
     special_programming = fields.Text(
         'Special Programming/Configuration',
@@ -91,7 +126,7 @@ class OtkRentalProject(models.Model):
     )
     late_fee_enabled = fields.Boolean(
         'Apply Late Fees',
-        default=lambda self: self.env['ir.config_parameter'].sudo().get_param('otk_rental.default_late_fee_enabled', False),
+        default=lambda self: self.env['otk.rental.settings'].get('default_late_fee_enabled'),
         tracking=True
     )
     late_fee_amount = fields.Float(
@@ -148,6 +183,57 @@ class OtkRentalProject(models.Model):
     invoice_id = fields.Many2one('account.move', 'Invoice', copy=False)
     invoice_count = fields.Integer('Invoice Count', compute='_compute_invoice_count')
     
+    # Recurring billing (long-running rentals)
+    billing_cycle = fields.Selection([
+        ('none', 'Bill at End'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly')
+    ], string='Billing Cycle', default='none', required=True, tracking=True,
+       help='Invoice ongoing rentals every week or month instead of once at the end')
+    billing_cursor_date = fields.Date(
+        'Billed Until',
+        copy=False,
+        readonly=True,
+        help='Rental days before this date have already been invoiced by billing cycles'
+    )
+    next_billing_date = fields.Date(
+        'Next Billing Date',
+        compute='_compute_next_billing_date',
+        store=True,
+        index=True,
+        help='Date the next billing cycle closes and gets invoiced'
+    )
+    cycle_invoice_ids = fields.Many2many(
+        'account.move',
+        'otk_rental_project_cycle_invoice_rel',
+        'project_id',
+        'move_id',
+        string='Cycle Invoices',
+        copy=False,
+        readonly=True
+    )
+    
+    # Partial return invoicing
+    partial_invoice_ids = fields.Many2many(
+        'account.move',
+        'otk_rental_project_partial_invoice_rel',
+        'project_id',
+        'move_id',
+        string='Partial Return Invoices',
+        copy=False,
+        readonly=True
+    )
+    billed_serial_ids = fields.Many2many(
+        'otk.rental.equipment.serial',
+        'otk_rental_project_billed_serial_rel',
+        'project_id',
+        'serial_id',
+        string='Serials Already Billed',
+        copy=False,
+        readonly=True,
+        help='Serials invoiced at their partial return; left out of later invoices'
+    )
+    
     # ADD THIS AFTER invoice_id field (around line 139)
     signature_ids = fields.One2many(
         'otk.rental.project.signature',
@@ -225,6 +311,7 @@ class OtkRentalProject(models.Model):
 
     @api.depends('item_ids.subtotal', 'late_fee_amount', 'damage_fee', 'discount_amount')
     def _compute_amounts(self):
+        """Totals from the line subtotals (rate cards, locked at booking), as invoices and quotes"""
         for project in self:
             project.total_amount = sum(project.item_ids.mapped('subtotal'))
             project.grand_total = (
@@ -236,26 +323,193 @@ class OtkRentalProject(models.Model):
 
     @api.depends('days_overdue', 'late_fee_enabled', 'total_amount')
     def _compute_late_fee(self):
-        IrConfigParam = self.env['ir.config_parameter'].sudo()
-        daily_rate = float(IrConfigParam.get_param('otk_rental.late_fee_daily_rate', 0))
-        percentage = float(IrConfigParam.get_param('otk_rental.late_fee_percentage', 0))
+        # Settings are read once for the whole recordset, not per project
+        settings = self.env['otk.rental.settings']._get_settings()
         
         for project in self:
             if project.late_fee_enabled and project.days_overdue > 0:
-                # Option 1: Fixed daily rate
-                fee_by_day = daily_rate * project.days_overdue
-                
-                # Option 2: Percentage of total per day
-                fee_by_percentage = (project.total_amount * percentage / 100) * project.days_overdue
-                
-                # Use whichever is greater
-                project.late_fee_amount = max(fee_by_day, fee_by_percentage)
+                project.late_fee_amount = self._calculate_late_fee(
+                    settings, project.days_overdue, project.total_amount
+                )
             else:
                 project.late_fee_amount = 0.0
 
+    # Late Fee Engine
+
+    @api.model
+    def _calculate_late_fee(self, settings, days_overdue, total_amount):
+        """Apply the configured calculation method (daily, percentage or maximum)"""
+        # Option 1: Fixed daily rate
+        fee_by_day = settings['late_fee_daily_rate'] * days_overdue
+        
+        # Option 2: Percentage of total per day
+        fee_by_percentage = (total_amount * settings['late_fee_percentage'] / 100) * days_overdue
+        
+        method = settings['late_fee_calculation_method']
+        if method == 'daily':
+            return fee_by_day
+        if method == 'percentage':
+            return fee_by_percentage
+        # Use whichever is greater
+        return max(fee_by_day, fee_by_percentage)
+
+    @api.model
+    def _cron_update_overdue(self):
+        """
+        Nightly overdue run.
+        Overdue days grow with the calendar, so the stored overdue flag and
+        late fees are refreshed here for every running rental in one pass.
+        The equipment's next available date, which never lies in the past,
+        moves with them.
+        """
+        today = fields.Date.today()
+        Equipment = self.env['otk.rental.equipment']
+        stale = Equipment.search([('next_available_date', '<=', today)])
+        if stale:
+            for fname in ('next_available_date', 'next_available_qty'):
+                self.env.add_to_compute(Equipment._fields[fname], stale)
+            stale.flush_recordset(['next_available_date', 'next_available_qty'])
+        projects = self.search([
+            '|',
+            ('is_overdue', '=', True),
+            '&', ('state', '=', 'ongoing'), ('end_date', '<', today),
+        ])
+        if not projects:
+            return
+        
+        for fname in ('is_overdue', 'late_fee_amount', 'total_amount', 'grand_total'):
+            self.env.add_to_compute(self._fields[fname], projects)
+        projects.flush_recordset(['is_overdue', 'late_fee_amount', 'total_amount', 'grand_total'])
+
+    # Notifications
+
+    @api.model
+    def _cron_send_rental_notifications(self, batch_size=100, mail_limit=500):
+        """
+        Queue reminder and overdue emails, one digest per customer.
+        Due/overdue projects are selected with a single indexed query, digests
+        are rendered in batches and at most `mail_limit` mails are queued per
+        run; customers left over are picked up by the next run.
+        """
+        settings = self.env['otk.rental.settings']._get_settings()
+        send_reminder = settings['send_reminder_email']
+        send_overdue = settings['send_overdue_email']
+        if not send_reminder and not send_overdue:
+            return
+        
+        today = fields.Date.today()
+        reminder_date = today + timedelta(days=settings['reminder_days_before'])
+        
+        self.flush_model(['state', 'end_date', 'partner_id', 'reminder_sent_date', 'overdue_notice_date'])
+        self.env['res.partner'].flush_model(['email'])
+        # Customers without an email get nothing and are not stamped, so they
+        # are left out here rather than taking a slot of every run
+        self.env.cr.execute("""
+            SELECT p.partner_id, p.id, p.end_date < %(today)s AS overdue
+              FROM otk_rental_project p
+              JOIN res_partner rp ON rp.id = p.partner_id
+             WHERE p.state = 'ongoing'
+               AND COALESCE(rp.email, '') != ''
+               AND (
+                    (%(send_reminder)s
+                     AND p.end_date BETWEEN %(today)s AND %(reminder_date)s
+                     AND p.reminder_sent_date IS NULL)
+                 OR (%(send_overdue)s
+                     AND p.end_date < %(today)s
+                     AND (p.overdue_notice_date IS NULL OR p.overdue_notice_date < %(today)s))
+               )
+             ORDER BY p.partner_id, p.end_date
+        """, {
+            'today': today,
+            'reminder_date': reminder_date,
+            'send_reminder': send_reminder,
+            'send_overdue': send_overdue,
+        })
+        
+        # partner_id -> {'reminder': [project ids], 'overdue': [project ids]}
+        groups = defaultdict(lambda: {'reminder': [], 'overdue': []})
+        for partner_id, project_id, overdue in self.env.cr.fetchall():
+            groups[partner_id]['overdue' if overdue else 'reminder'].append(project_id)
+        if not groups:
+            return
+        
+        partner_ids = list(groups)[:mail_limit]
+        remaining = len(groups) - len(partner_ids)
+        Mail = self.env['mail.mail'].sudo()
+        
+        for start in range(0, len(partner_ids), batch_size):
+            batch_partner_ids = partner_ids[start:start + batch_size]
+            batch_project_ids = [
+                project_id
+                for partner_id in batch_partner_ids
+                for project_id in groups[partner_id]['reminder'] + groups[partner_id]['overdue']
+            ]
+            # One prefetch set for the whole batch
+            batch_projects = self.browse(batch_project_ids)
+            
+            mail_vals_list = []
+            notified = self.browse()
+            for partner in self.env['res.partner'].browse(batch_partner_ids):
+                reminder_projects = batch_projects.browse(groups[partner.id]['reminder'])
+                overdue_projects = batch_projects.browse(groups[partner.id]['overdue'])
+                if partner.email:
+                    mail_vals_list.append(
+                        self._prepare_notification_mail_vals(partner, reminder_projects, overdue_projects)
+                    )
+                    notified |= reminder_projects | overdue_projects
+            Mail.create(mail_vals_list)
+            
+            # Only projects whose customer actually got a mail are stamped
+            reminded = notified.filtered(lambda p: p.end_date >= today)
+            (notified - reminded).write({'overdue_notice_date': today})
+            reminded.write({'reminder_sent_date': today})
+        
+        if remaining:
+            # Ask the scheduler to run again soon for the customers left over
+            self.env['ir.cron']._notify_progress(done=len(partner_ids), remaining=remaining)
+
+    @api.model
+    def _prepare_notification_mail_vals(self, partner, reminder_projects, overdue_projects):
+        """Render the digest mail for one customer"""
+        company = self.env.company
+        body = self.env['ir.qweb']._render('otk_rental_management.rental_notification_digest', {
+            'partner': partner,
+            'company': company,
+            'reminder_projects': reminder_projects,
+            'overdue_projects': overdue_projects,
+        })
+        
+        if overdue_projects:
+            subject = _('%(company)s: %(count)s overdue rental(s)', company=company.name, count=len(overdue_projects))
+        else:
+            subject = _('%(company)s: rental return reminder', company=company.name)
+        
+        return {
+            'subject': subject,
+            'body_html': body,
+            'email_from': company.email_formatted or self.env.user.email_formatted,
+            'recipient_ids': [(4, partner.id)],
+            'auto_delete': True,
+        }
+
     def _compute_invoice_count(self):
         for project in self:
-            project.invoice_count = 1 if project.invoice_id else 0
+            project.invoice_count = len(project.invoice_id | project.cycle_invoice_ids | project.partial_invoice_ids)
+
+    @api.depends('billing_cycle', 'billing_cursor_date', 'start_date')
+    def _compute_next_billing_date(self):
+        for project in self:
+            if project.billing_cycle == 'none' or not project.start_date:
+                project.next_billing_date = False
+            else:
+                anchor = project.billing_cursor_date or project.start_date
+                project.next_billing_date = anchor + project._get_billing_cycle_delta()
+
+    def _get_billing_cycle_delta(self):
+        self.ensure_one()
+        if self.billing_cycle == 'weekly':
+            return relativedelta(weeks=1)
+        return relativedelta(months=1)
 
     # ADD THIS COMPUTE METHOD after _compute_invoice_count (around line 257)
     def _compute_signature_count(self):
@@ -269,6 +523,29 @@ class OtkRentalProject(models.Model):
             vals['name'] = self.env['ir.sequence'].next_by_code('otk.rental.project') or 'RENT/NEW'
         return super().create(vals)
 
+    def write(self, vals):
+        # A moved end date deserves a fresh reminder
+        if 'end_date' in vals and 'reminder_sent_date' not in vals:
+            vals = dict(vals, reminder_sent_date=False)
+        # An edited project gets another chance at automatic invoicing
+        if not vals.keys() <= {'invoicing_failed_date', 'reminder_sent_date', 'overdue_notice_date'}:
+            vals = dict(vals, invoicing_failed_date=False)
+        return super().write(vals)
+
+    def unlink(self):
+        # Lines are deleted by the database cascade, which skips their unlink
+        self.item_ids._release_waitlisted_serials()
+        return super().unlink()
+
+    def init(self):
+        # Covers the notification cron lookup (state + end_date range)
+        tools.create_index(
+            self._cr,
+            'otk_rental_project_state_end_date_index',
+            self._table,
+            ['state', 'end_date'],
+        )
+
     # Constraints
     @api.constrains('start_date', 'end_date')
     def _check_dates(self):
@@ -290,16 +567,34 @@ class OtkRentalProject(models.Model):
         for project in self:
             if not project.item_ids:
                 raise UserError(_('Cannot reserve project without items.'))
+            project._check_serials_allocatable()
             
-            # Reserve serials for each item
-            for item in project.item_ids:
+            # Reserve serials for each item (kit lines reserve their components)
+            for item in project.item_ids.filtered(lambda i: not i.kit_item_id):
                 item.action_reserve_serials()
             
+            # Snapshot prices at booking time
+            project.item_ids._lock_prices()
+            
             project.write({
                 'state': 'reserved',
                 'pickup_signature_date': fields.Datetime.now()
             })
 
+    def _check_serials_allocatable(self):
+        """Check the serials to reserve (kit components included) are not guaranteed to checkout holds"""
+        self.ensure_one()
+        requested = defaultdict(int)
+        for item in self.item_ids:
+            if item.equipment_is_kit:
+                if not item.kit_component_ids:
+                    for line in item.equipment_id.kit_line_ids.filtered('component_id.has_serials'):
+                        requested[line.component_id] += item.quantity * line.quantity
+            elif item.equipment_has_serials:
+                requested[item.equipment_id] += item.quantity
+        self.env['otk.rental.equipment']._check_allocatable(
+            requested, self.start_date, self.end_date, exclude_project_ids=self.ids)
+
     def action_start_rental(self):
         """Start the rental - equipment leaves warehouse"""
         for project in self:
@@ -335,21 +630,191 @@ class OtkRentalProject(models.Model):
         for item in self.item_ids:
             item.action_complete_return()
         
+        # Freed serials go to draft projects waiting for them
+        self.env['otk.rental.waitlist']._allocate_freed(self.item_ids.assigned_serial_ids)
+        
         self.write({
             'state': 'returned',
             'actual_return_date': fields.Date.today(),
             'return_signature_date': fields.Datetime.now()
         })
 
+    def _transfer_serials(self, serials, target, transfer_date=None):
+        """
+        Move rented serials straight from this project to another customer site.
+
+        This project's interval ends at the transfer date: the serials are
+        billed right away, as at a partial return, and leave its lines, which
+        shrink accordingly (emptied lines are removed). The
+        target project's interval starts the same day: the serials join its
+        lines as rented, replacing units it still had reserved for the same
+        equipment, and one history row is written per serial. Nothing goes
+        through the returned/available round trip.
+
+        A reserved target is started with action_start_rental() (its other
+        lines are picked up too), and a source with nothing left on site is
+        closed with action_complete_return().
+
+        Returns:
+            account.move: this project's invoice for the closed intervals (may be empty)
+        """
+        self.ensure_one()
+        target.ensure_one()
+        transfer_date = transfer_date or fields.Date.context_today(self)
+        if target == self:
+            raise UserError(_('Serials can only be transferred to another project.'))
+        if self.state != 'ongoing':
+            raise UserError(_('Only serials of an ongoing rental can be transferred.'))
+        if target.state not in ('reserved', 'ongoing'):
+            raise UserError(_('The target project must be reserved or ongoing.'))
+        if not serials:
+            raise UserError(_('Please select at least one serial to transfer.'))
+        wrong = serials.filtered(lambda s: s.status != 'rented' or s.current_project_id != self)
+        if wrong:
+            raise UserError(_('These serials are not out on %s: %s') % (
+                self.name, ', '.join(wrong.mapped('serial_number'))))
+        source_items = self.item_ids.filtered(lambda i: i.assigned_serial_ids & serials)
+        if source_items.filtered('kit_item_id'):
+            raise UserError(_('Kit components cannot be transferred on their own.'))
+
+        # Close this project's intervals (billing reads the serial dates)
+        serials.write({'actual_return_date': transfer_date})
+        invoice = self._create_partial_return_invoice(serials, transfer_date)
+        # The serials leave the source lines in the same write that shrinks
+        # them, so quantities keep matching; emptied lines are removed. When
+        # the whole rental moves, the lines stay as the record of what was
+        # booked (a project keeps at least one) and the project is closed below.
+        emptied = source_items.filtered(lambda i: not i.assigned_serial_ids - serials)
+        whole_rental = emptied == self.item_ids
+        commands = []
+        for item in source_items:
+            leaving = item.assigned_serial_ids & serials
+            if whole_rental:
+                commands.append((1, item.id, {'assigned_serial_ids': [(3, s.id) for s in leaving]}))
+            elif item in emptied:
+                commands.append((2, item.id))
+            else:
+                commands.append((1, item.id, {
+                    'assigned_serial_ids': [(3, s.id) for s in leaving],
+                    'quantity': item.quantity - len(leaving),
+                }))
+        self.write({'item_ids': commands})
+
+        # Open the target's intervals, replacing units it still had reserved
+        Item = self.env['otk.rental.project.item']
+        released = self.env['otk.rental.equipment.serial']
+        for equipment in serials.equipment_id:
+            moved = serials.filtered(lambda s: s.equipment_id == equipment)
+            item = target.item_ids.filtered(lambda i: i.equipment_id == equipment and not i.kit_item_id)[:1]
+            if not item:
+                Item.create({
+                    'project_id': target.id,
+                    'equipment_id': equipment.id,
+                    'quantity': len(moved),
+                    'assigned_serial_ids': [(6, 0, moved.ids)],
+                })._lock_prices()
+                continue
+            replaced = item.assigned_serial_ids.filtered(lambda s: s.status == 'reserved')[:len(moved)]
+            released |= replaced
+            vals = {'assigned_serial_ids': [(3, s.id) for s in replaced] + [(4, s.id) for s in moved]}
+            if len(moved) > len(replaced):
+                vals['quantity'] = item.quantity + len(moved) - len(replaced)
+            item.write(vals)
+        released._transition(
+            'available',
+            {'current_project_id': False},
+            notes=f'Replaced by a serial transferred from project {self.name}',
+        )
+
+        # The target's rental starts now: its other reserved lines are picked
+        # up (the transferred serials are already rented and left as they are)
+        if target.state == 'reserved':
+            target.action_start_rental()
+
+        # Rental days of the closed interval count towards usage, and a new rental starts
+        serials.flush_recordset(['actual_pickup_date', 'last_rental_date', 'usage_days', 'usage_count'])
+        self.env.cr.execute("""
+            UPDATE otk_rental_equipment_serial
+               SET usage_days = COALESCE(usage_days, 0)
+                                + GREATEST(%(date)s - COALESCE(actual_pickup_date, last_rental_date, %(date)s), 0),
+                   usage_count = COALESCE(usage_count, 0) + 1,
+                   last_rental_date = %(date)s
+             WHERE id = ANY(%(ids)s)
+        """, {'date': transfer_date, 'ids': serials.ids})
+        serials.invalidate_recordset(['usage_days', 'usage_count', 'last_rental_date'])
+        serials.write({
+            'current_project_id': target.id,
+            'actual_pickup_date': transfer_date,
+            'actual_return_date': False,
+        })
+
+        self.env['otk.rental.project.item.status'].create([{
+            'project_id': target.id,
+            'equipment_id': serial.equipment_id.id,
+            'serial_id': serial.id,
+            'quantity': 1,
+            'status': 'rented',
+            'notes': f'Serial {serial.serial_number} transferred from project {self.name} on {transfer_date}'
+        } for serial in serials])
+
+        # Nothing left on site: the source rental is over. Quantity-tracked
+        # lines cannot be transferred, so they keep the rental open until
+        # they come back through the return wizard.
+        on_site = self.env['otk.rental.equipment.serial'].search_count([
+            ('current_project_id', '=', self.id),
+            ('status', 'in', ['reserved', 'rented']),
+        ], limit=1)
+        quantity_lines = self.item_ids.filtered(
+            lambda i: not i.equipment_has_serials and not i.equipment_is_kit and i.quantity)
+        if not on_site and not quantity_lines:
+            self.action_complete_return()
+            self.actual_return_date = transfer_date
+        return invoice
+
+    def action_transfer_serials(self):
+        """Open the serial transfer wizard"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Transfer to Another Project'),
+            'res_model': 'otk.rental.transfer.wizard',
+            'view_mode': 'form',
+            'views': [(False, 'form')],
+            'target': 'new',
+            'context': {
+                'default_project_id': self.id,
+            }
+        }
+
+    def action_join_waitlist(self):
+        """Queue draft lines that are missing serials for the next returns"""
+        for project in self:
+            if project.state != 'draft':
+                raise UserError(_('Only draft projects can join the waitlist.'))
+        entries = self.env['otk.rental.waitlist']._enqueue(self.item_ids)
+        if not entries:
+            raise UserError(_('All serialized lines already have their serials assigned.'))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Waitlist'),
+            'res_model': 'otk.rental.waitlist',
+            'view_mode': 'list',
+            'domain': [('project_id', 'in', self.ids)],
+        }
+
     def action_cancel(self):
         """Cancel the project"""
         for project in self:
             if project.state == 'ongoing':
                 raise UserError(_('Cannot cancel ongoing rental. Please return equipment first.'))
             
-            # Release reserved serials
-            for item in project.item_ids:
-                item.action_release_serials()
+            # Only a reservation has serials and ledger quantities to give back
+            if project.state == 'reserved':
+                for item in project.item_ids:
+                    item.action_release_serials()
+            elif project.state == 'draft':
+                # Serials the waitlist already handed to the draft
+                project.item_ids._release_waitlisted_serials()
             
             project.write({'state': 'cancelled'})
 
@@ -358,13 +823,17 @@ class OtkRentalProject(models.Model):
         for project in self:
             # Release reserved serials if going back to draft from reserved state
             if project.state == 'reserved':
+                self.env['otk.rental.stock.move']._record(project.item_ids, 'release')
                 for item in project.item_ids:
                     # Change serials back to available
-                    item.assigned_serial_ids.write({
-                        'status': 'available',
-                        'current_project_id': False
-                    })
+                    item.assigned_serial_ids._transition(
+                        'available',
+                        {'current_project_id': False},
+                        notes=f'Reservation of {project.name} set back to draft',
+                    )
             
+            # Prices follow the rate cards again until the next reservation
+            project.item_ids.write({'price_locked': False, 'price_snapshot_date': False})
             project.write({'state': 'draft'})
         
             # return {
@@ -378,6 +847,66 @@ class OtkRentalProject(models.Model):
             #     }
             # }
 
+    # Quote Methods
+
+    @api.model
+    def _get_quote(self, partner, start_date, end_date, lines):
+        """
+        Price and check availability of a basket without creating any record.
+
+        Args:
+            partner: res.partner record (may be empty)
+            start_date, end_date: rental period
+            lines: list of (equipment record, quantity)
+
+        Returns:
+            dict with per-line prices and availability, and the quote total
+        """
+        duration = (end_date - start_date).days
+        RateCard = self.env['otk.rental.rate.card']
+        equipment = self.env['otk.rental.equipment'].union(*(eq for eq, qty in lines))
+        equipment.fetch(['name', 'code', 'has_serials', 'is_kit', 'daily_rate', 'weekly_rate', 'monthly_rate'])
+
+        # One query for the availability of the whole basket (plus kits and ledger-tracked lines)
+        available = equipment.filtered('has_serials')._get_available_quantities(start_date, end_date)
+        kits = equipment.filtered('is_kit')
+        if kits:
+            available.update(kits._get_kit_available_quantities(start_date, end_date))
+        quantity_tracked = equipment.filtered(lambda e: not e.has_serials and not e.is_kit)
+        if quantity_tracked:
+            available.update(quantity_tracked._get_ledger_available_quantities(start_date, end_date))
+
+        # Serialized quantities are checked per equipment across duplicate lines
+        requested = defaultdict(int)
+        for eq, qty in lines:
+            requested[eq.id] += qty
+
+        quote_lines = []
+        for eq, qty in lines:
+            unit_price, rate_card = RateCard._get_unit_price(eq, duration, partner=partner, date=start_date)
+            available_qty = available.get(eq.id)
+            quote_lines.append({
+                'equipment_id': eq.id,
+                'code': eq.code,
+                'name': eq.name,
+                'quantity': qty,
+                'unit_price': unit_price,
+                'subtotal': unit_price * qty,
+                'rate_card_id': rate_card.id or None,
+                'available_quantity': available_qty,
+                'available': available_qty is None or available_qty >= requested[eq.id],
+            })
+
+        return {
+            'partner_id': partner.id or None,
+            'start_date': start_date,
+            'end_date': end_date,
+            'duration_days': duration,
+            'lines': quote_lines,
+            'total': sum(line['subtotal'] for line in quote_lines),
+            'available': all(line['available'] for line in quote_lines),
+        }
+
     # Invoice Methods
 
     def action_create_invoice(self):
@@ -390,18 +919,8 @@ class OtkRentalProject(models.Model):
         if not self.item_ids:
             raise UserError(_('Cannot create invoice without rental items.'))
         
-        # Prepare invoice lines
-        invoice_lines = self._prepare_invoice_lines()
-        
         # Create invoice
-        invoice = self.env['account.move'].create({
-            'move_type': 'out_invoice',
-            'partner_id': self.partner_id.id,
-            'invoice_date': fields.Date.today(),
-            'invoice_origin': self.name,
-            'invoice_line_ids': invoice_lines,
-            'narration': self.internal_notes
-        })
+        invoice = self.env['account.move'].create(self._prepare_invoice_vals())
         
         self.write({
             'invoice_id': invoice.id,
@@ -431,79 +950,560 @@ class OtkRentalProject(models.Model):
             'state': 'returned'
         })
 
-    def _prepare_invoice_lines(self):
+    def _prepare_invoice_vals(self):
+        """Values for the customer invoice of this project"""
+        self.ensure_one()
+        return {
+            'move_type': 'out_invoice',
+            'partner_id': self.partner_id.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_origin': self.name,
+            'invoice_line_ids': self._prepare_invoice_lines(),
+            'narration': self.internal_notes
+        }
+
+    def _create_invoices_batch(self):
         """
-        Prepare invoice lines based on actual serial pickup/return dates.
-        Groups lines by: equipment + daily_rate + date range.
-        Each line shows serials, dates, quantity, rate, and total.
+        Invoice a batch of returned projects.
+        Serial and equipment data is prefetched for the whole batch and all
+        invoices are created with one multi-create. A project that fails is
+        rolled back to its savepoint and reported (log + chatter) without
+        rolling back the others.
+        
+        Returns:
+            tuple: (created account.move records, {project_id: error message})
+        """
+        failures = {}
+        self._prefetch_invoice_data()
+        
+        vals_by_projects = {}
+        for project in self:
+            try:
+                # A failed query must not abort the transaction for the next projects
+                with self.env.cr.savepoint():
+                    project._check_invoiceable()
+                    vals_by_projects[project] = project._prepare_invoice_vals()
+            except Exception as e:
+                failures[project.id] = str(e)
+        
+        invoices = self._link_final_invoices(self._create_invoice_moves(vals_by_projects, failures))
+        self._report_invoicing_failures(failures)
+        return invoices, failures
+
+    def _create_consolidated_invoices(self):
+        """
+        Invoice a batch of returned projects with one invoice per customer.
+        Each project gets its own section on the customer's invoice.
+        
+        Returns:
+            tuple: (created account.move records, {project_id: error message})
         """
+        failures = {}
+        self._prefetch_invoice_data()
+        
+        vals_by_projects = {}
+        for projects in self.grouped('partner_id').values():
+            try:
+                with self.env.cr.savepoint():
+                    for project in projects:
+                        project._check_invoiceable()
+                    vals_by_projects[projects] = projects._prepare_consolidated_invoice_vals()
+            except Exception as e:
+                failures.update(dict.fromkeys(projects.ids, str(e)))
+        
+        invoices = self._link_final_invoices(self._create_invoice_moves(vals_by_projects, failures))
+        self._report_invoicing_failures(failures)
+        return invoices, failures
+
+    def _prepare_consolidated_invoice_vals(self):
+        """Values for one invoice covering all projects of a single customer"""
+        partner = self.partner_id
+        partner.ensure_one()
+        
         lines = []
+        for project in self.sorted(lambda p: (p.start_date, p.name)):
+            section = project.name
+            if project.reference:
+                section += f" — {project.reference}"
+            section += f" ({project.start_date.strftime('%d/%m/%Y')} → {project.end_date.strftime('%d/%m/%Y')})"
+            lines.append((0, 0, {
+                'display_type': 'line_section',
+                'name': section,
+            }))
+            lines += project._prepare_invoice_lines()
         
-        # Step 1: Collect all returned/rented serials with actual dates
-        serial_data = []
-        for item in self.item_ids:
-            for serial in item.assigned_serial_ids:
-                # Skip if never picked up
-                if not serial.actual_pickup_date:
-                    continue
-                # Use actual return date, or project end/actual return if not set
-                return_date = serial.actual_return_date or self.actual_return_date or self.end_date
-                pickup_date = serial.actual_pickup_date
-                
-                if not pickup_date or not return_date:
-                    continue
-                    
-                days = (return_date - pickup_date).days  # inclusive
-                if days <= 0:
-                    days = 1
-                    
-                daily_rate = item.equipment_id.daily_rate or 0.0
-                
-                serial_data.append({
-                    'serial': serial,
-                    'equipment': item.equipment_id,
-                    'daily_rate': daily_rate,
-                    'pickup_date': pickup_date,
-                    'return_date': return_date,
-                    'days': days,
-                    'line_total': daily_rate * days,
+        return {
+            'move_type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_origin': ', '.join(self.mapped('name')),
+            'invoice_line_ids': lines,
+        }
+
+    def _prefetch_invoice_data(self):
+        """
+        Prefetch the project and equipment fields read while invoicing.
+        Serial data itself is aggregated in SQL by _read_invoice_line_groups.
+        """
+        self.fetch(['name', 'partner_id', 'billing_cursor_date', 'actual_return_date', 'end_date',
+                    'late_fee_amount', 'damage_fee', 'discount_amount', 'internal_notes'])
+        self.item_ids.equipment_id.fetch(['name'])
+
+    def _check_invoiceable(self):
+        self.ensure_one()
+        if self.invoice_id:
+            raise UserError(_('Invoice already exists for this project.'))
+        if not self.item_ids:
+            raise UserError(_('Cannot create invoice without rental items.'))
+
+    def _create_invoice_moves(self, vals_by_projects, failures):
+        """
+        Create the invoices with one multi-create.
+        If the batch fails, each invoice is retried on its own so one bad entry
+        doesn't block the others; errors are added to `failures`.
+        
+        Args:
+            vals_by_projects (dict): project recordset -> account.move values
+            failures (dict): project_id -> error message, updated in place
+        
+        Returns:
+            list: (project recordset, created account.move) pairs
+        """
+        Move = self.env['account.move']
+        invoiced = []
+        if not vals_by_projects:
+            return invoiced
+        
+        try:
+            with self.env.cr.savepoint():
+                invoices = Move.create(list(vals_by_projects.values()))
+            invoiced = list(zip(vals_by_projects, invoices))
+        except Exception:
+            for projects, vals in vals_by_projects.items():
+                try:
+                    with self.env.cr.savepoint():
+                        invoiced.append((projects, Move.create(vals)))
+                except Exception as e:
+                    failures.update(dict.fromkeys(projects.ids, str(e)))
+        
+        return invoiced
+
+    def _link_final_invoices(self, invoiced):
+        """Attach final invoices to their projects and mark them invoiced"""
+        for projects, invoice in invoiced:
+            projects.write({
+                'invoice_id': invoice.id,
+                'state': 'invoiced'
+            })
+        return self.env['account.move'].union(*(invoice for _projects, invoice in invoiced))
+
+    def _report_invoicing_failures(self, failures):
+        # Flagged projects are left out of the automatic runs until edited,
+        # so they neither block the queue nor post the same error every run
+        self.browse(list(failures)).write({'invoicing_failed_date': fields.Datetime.now()})
+        for project in self.browse(list(failures)):
+            _logger.warning("Automatic invoicing failed for %s: %s", project.name, failures[project.id])
+            project.message_post(body=_('Automatic invoicing failed: %s', failures[project.id]))
+
+    def action_create_invoices_batch(self):
+        """Invoice the selected returned projects in one batch (list view action)"""
+        projects = self.filtered(lambda p: p.state == 'returned' and not p.invoice_id)
+        if not projects:
+            raise UserError(_('Select at least one returned project without invoice.'))
+        
+        invoices, failures = projects._create_invoices_batch()
+        
+        message = _('%s invoice(s) created.', len(invoices))
+        if failures:
+            message += ' ' + _('%s project(s) failed, see their chatter for details.', len(failures))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Batch Invoicing'),
+                'message': message,
+                'type': 'warning' if failures else 'success',
+                'sticky': bool(failures),
+            }
+        }
+
+    @api.model
+    def _cron_auto_create_invoices(self, limit=200):
+        """Invoice returned, uninvoiced projects when auto-invoicing is enabled"""
+        if not self.env['otk.rental.settings'].get('auto_create_invoice'):
+            return
+        
+        # Customers on consolidated billing are invoiced by the periodic run
+        domain = [
+            ('state', '=', 'returned'),
+            ('invoice_id', '=', False),
+            ('invoicing_failed_date', '=', False),
+            ('partner_id.otk_rental_billing_mode', '!=', 'consolidated'),
+        ]
+        projects = self.search(domain, order='actual_return_date, id', limit=limit)
+        if not projects:
+            return
+        
+        invoices, failures = projects._create_invoices_batch()
+        _logger.info(
+            "Automatic invoicing: %d invoice(s) created, %d project(s) failed",
+            len(invoices), len(failures)
+        )
+        
+        # Failed projects stay 'returned' but are flagged out of the domain
+        remaining = self.search_count(domain)
+        if remaining > 0:
+            self.env['ir.cron']._notify_progress(done=len(projects), remaining=remaining)
+
+    def _create_cycle_invoices(self):
+        """
+        Invoice the billing cycle that just closed (billing cursor up to the
+        next billing date) for each project, then move the cursor forward.
+        Customers on consolidated billing get one invoice for all their due
+        cycles, one section per project. Cycles without billable serial-days
+        only move the cursor.
+        
+        Returns:
+            tuple: (created account.move records, {project_id: error message})
+        """
+        failures = {}
+        self._prefetch_invoice_data()
+        
+        periods = {}
+        nothing_to_bill = self.browse()
+        for project in self:
+            try:
+                # A failed query must not abort the transaction for the next projects
+                with self.env.cr.savepoint():
+                    date_from = project.billing_cursor_date or project.start_date
+                    date_to = project.next_billing_date
+                    lines = project._prepare_invoice_lines(date_from, date_to)
+            except Exception as e:
+                failures[project.id] = str(e)
+                continue
+            if lines:
+                periods[project] = (lines, date_from, date_to)
+            else:
+                nothing_to_bill |= project
+        
+        vals_by_projects = {}
+        for partner, projects in self.browse().union(*periods).grouped('partner_id').items():
+            if partner.otk_rental_billing_mode == 'consolidated':
+                vals_by_projects[projects] = projects._prepare_consolidated_cycle_invoice_vals(periods)
+            else:
+                for project in projects:
+                    vals_by_projects[project] = project._prepare_cycle_invoice_vals(*periods[project])
+        
+        invoiced = self._create_invoice_moves(vals_by_projects, failures)
+        for projects, invoice in invoiced:
+            for project in projects:
+                project.write({
+                    'billing_cursor_date': project.next_billing_date,
+                    'cycle_invoice_ids': [(4, invoice.id)]
                 })
+        for project in nothing_to_bill:
+            project.billing_cursor_date = project.next_billing_date
+        
+        self._report_invoicing_failures(failures)
+        return self.env['account.move'].union(*(invoice for _projects, invoice in invoiced)), failures
+
+    @api.model
+    def _format_billing_period(self, date_from, date_to):
+        """Billed days of a cycle, date_to being the first day of the next one"""
+        return f"{date_from.strftime('%d/%m/%Y')} → {(date_to - timedelta(days=1)).strftime('%d/%m/%Y')}"
 
-        # Step 2: Group by (equipment, daily_rate, pickup_date, return_date)
-        from collections import defaultdict
-        groups = defaultdict(list)
-        for data in serial_data:
-            key = (
-                data['equipment'].id,
-                round(data['daily_rate'], 2),  # avoid float precision issues
-                data['pickup_date'],
-                data['return_date']
+    def _prepare_cycle_invoice_vals(self, lines, date_from, date_to):
+        """Values for the invoice of one billing cycle"""
+        self.ensure_one()
+        return {
+            'move_type': 'out_invoice',
+            'partner_id': self.partner_id.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_origin': f"{self.name} ({self._format_billing_period(date_from, date_to)})",
+            'invoice_line_ids': lines,
+        }
+
+    def _prepare_consolidated_cycle_invoice_vals(self, periods):
+        """
+        Values for one invoice covering the due cycles of all projects of a
+        single customer.
+        
+        Args:
+            periods (dict): project -> (invoice lines, date_from, date_to)
+        """
+        partner = self.partner_id
+        partner.ensure_one()
+        
+        lines = []
+        for project in self.sorted(lambda p: (p.start_date, p.name)):
+            project_lines, date_from, date_to = periods[project]
+            section = project.name
+            if project.reference:
+                section += f" — {project.reference}"
+            section += f" ({self._format_billing_period(date_from, date_to)})"
+            lines.append((0, 0, {
+                'display_type': 'line_section',
+                'name': section,
+            }))
+            lines += project_lines
+        
+        return {
+            'move_type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_origin': ', '.join(self.mapped('name')),
+            'invoice_line_ids': lines,
+        }
+
+    def _create_partial_return_invoice(self, serials, return_date):
+        """
+        Invoice the serials of one partial return event right away.
+        They are then remembered as billed and left out of later cycle and
+        final invoices.
+        
+        Returns:
+            account.move: the created invoice, or an empty recordset when
+            the returned serials have nothing left to bill
+        """
+        self.ensure_one()
+        serials -= self.billed_serial_ids
+        lines = self._prepare_invoice_lines(serial_ids=serials.ids)
+        invoice = self.env['account.move']
+        if lines:
+            invoice = invoice.create({
+                'move_type': 'out_invoice',
+                'partner_id': self.partner_id.id,
+                'invoice_date': fields.Date.today(),
+                'invoice_origin': f"{self.name} (return {return_date.strftime('%d/%m/%Y')})",
+                'invoice_line_ids': lines,
+            })
+        
+        vals = {'billed_serial_ids': [(4, serial_id) for serial_id in serials.ids]}
+        if invoice:
+            vals['partial_invoice_ids'] = [(4, invoice.id)]
+        self.write(vals)
+        return invoice
+
+    @api.model
+    def _cron_bill_cycles(self, limit=200):
+        """
+        Recurring billing run.
+        Only ongoing projects whose next cycle is due are touched; projects
+        that are several cycles behind catch up one cycle per pass.
+        Customers on consolidated billing get one invoice per pass.
+        """
+        domain = [
+            ('state', '=', 'ongoing'),
+            ('billing_cycle', '!=', 'none'),
+            ('next_billing_date', '<=', fields.Date.today()),
+            ('invoicing_failed_date', '=', False),
+        ]
+        projects = self.search(domain, order='next_billing_date, id', limit=limit)
+        if not projects:
+            return
+        # Bill all due cycles of a consolidated customer together, not split across passes
+        consolidated = projects.partner_id.filtered(lambda p: p.otk_rental_billing_mode == 'consolidated')
+        if consolidated:
+            projects |= self.search(domain + [('partner_id', 'in', consolidated.ids)])
+        
+        invoices, failures = projects._create_cycle_invoices()
+        _logger.info(
+            "Billing cycles: %d project(s) processed, %d invoice(s) created, %d failed",
+            len(projects), len(invoices), len(failures)
+        )
+        
+        # Failed projects are flagged out of the domain until edited
+        remaining = self.search_count(domain)
+        if remaining > 0:
+            self.env['ir.cron']._notify_progress(done=len(projects), remaining=remaining)
+
+    @api.model
+    def _cron_consolidated_invoicing(self, partner_limit=100):
+        """
+        Periodic run for customers on consolidated billing: all their
+        returned, uninvoiced projects go on a single invoice.
+        """
+        domain = [
+            ('state', '=', 'returned'),
+            ('invoice_id', '=', False),
+            ('invoicing_failed_date', '=', False),
+            ('partner_id.otk_rental_billing_mode', '=', 'consolidated'),
+        ]
+        groups = self._read_group(domain, ['partner_id'], ['id:recordset'], limit=partner_limit)
+        if not groups:
+            return
+        
+        projects = self.union(*(group_projects for _partner, group_projects in groups))
+        invoices, failures = projects._create_consolidated_invoices()
+        _logger.info(
+            "Consolidated invoicing: %d invoice(s) created for %d project(s), %d project(s) failed",
+            len(invoices), len(projects), len(failures)
+        )
+        
+        if len(groups) == partner_limit:
+            # There may be more customers waiting, run again soon (failed
+            # customers are flagged out of the domain, so this batch won't repeat)
+            self.env['ir.cron']._notify_progress(done=len(projects), remaining=1)
+
+    def _read_invoice_line_groups(self, date_from=None, date_to=None, serial_ids=None, sample_size=3):
+        """
+        Group the picked-up serials of this project by
+        (equipment, daily rate, pickup date, return date) with one SQL aggregate.
+        Day counting and period clipping happen in the database, and only the
+        first `sample_size` serial numbers of each group are returned for the
+        line description. Serials already billed at a partial return are skipped.
+        Kits are billed as the kit equipment, counting the lead component's
+        serials divided by its units per kit.
+        
+        The daily rate is the line's unit price (locked at booking) spread over
+        the booked duration, so rate changes after booking are not billed.
+        It is kept at full precision; callers round the billed amount only.
+        Same-day bookings have no duration to spread over and use the
+        equipment's daily rate.
+        
+        Args:
+            date_from (date): Clip pickup dates to this date (inclusive)
+            date_to (date): Clip return dates to this date (exclusive)
+            serial_ids (list): Restrict to these serials (partial return)
+            sample_size (int): Serial numbers kept per group
+        
+        Returns:
+            list: dicts with equipment_id, rate, pickup_date, return_date,
+                  qty, days and serials (sample), in item order
+        """
+        self.ensure_one()
+        self.env['otk.rental.project.item'].flush_model([
+            'project_id', 'equipment_id', 'sequence', 'assigned_serial_ids',
+            'kit_item_id', 'kit_component_qty', 'kit_lead', 'unit_price',
+        ])
+        self.env['otk.rental.equipment.serial'].flush_model(['serial_number', 'actual_pickup_date', 'actual_return_date', 'sequence'])
+        self.env['otk.rental.equipment'].flush_model(['daily_rate'])
+        self.flush_recordset(['billed_serial_ids', 'duration_days'])
+        
+        # GREATEST/LEAST ignore NULL, so a missing bound simply means "no clipping"
+        self.env.cr.execute("""
+            WITH periods AS (
+                SELECT e.id AS equipment_id,
+                       CASE WHEN p.duration_days > 0
+                            THEN COALESCE(kit.unit_price, i.unit_price, 0)::numeric / p.duration_days
+                            ELSE ROUND(COALESCE(e.daily_rate, 0)::numeric, 2)
+                       END AS rate,
+                       1.0 / GREATEST(COALESCE(i.kit_component_qty, 1), 1) AS weight,
+                       GREATEST(s.actual_pickup_date, %(date_from)s::date) AS pickup_date,
+                       LEAST(COALESCE(s.actual_return_date, %(fallback_return)s::date), %(date_to)s::date) AS return_date,
+                       s.serial_number,
+                       i.sequence AS item_sequence,
+                       i.id AS item_id,
+                       s.sequence AS serial_sequence
+                  FROM otk_rental_project_item i
+                  JOIN otk_rental_project p ON p.id = i.project_id
+                  JOIN otk_rental_project_item_serial_rel rel ON rel.item_id = i.id
+                  JOIN otk_rental_equipment_serial s ON s.id = rel.serial_id
+                  LEFT JOIN otk_rental_project_item kit ON kit.id = i.kit_item_id
+                  JOIN otk_rental_equipment e ON e.id = COALESCE(kit.equipment_id, i.equipment_id)
+                 WHERE i.project_id = %(project_id)s
+                   AND (i.kit_item_id IS NULL OR i.kit_lead)
+                   AND s.actual_pickup_date IS NOT NULL
+                   AND (%(serial_ids)s::int[] IS NULL OR s.id = ANY(%(serial_ids)s::int[]))
+                   AND NOT EXISTS (
+                       SELECT 1
+                         FROM otk_rental_project_billed_serial_rel billed
+                        WHERE billed.project_id = i.project_id
+                          AND billed.serial_id = s.id
+                   )
+            ), ranked AS (
+                SELECT periods.*,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY equipment_id, rate, pickup_date, return_date
+                           ORDER BY serial_sequence, serial_number
+                       ) AS rn
+                  FROM periods
+                 WHERE return_date IS NOT NULL
+                   AND (NOT %(clipped)s OR return_date > pickup_date)
             )
-            groups[key].append(data)
+            SELECT equipment_id,
+                   rate,
+                   pickup_date,
+                   return_date,
+                   SUM(weight) AS qty,
+                   GREATEST(return_date - pickup_date, 1) AS days,
+                   ARRAY_AGG(serial_number ORDER BY rn) FILTER (WHERE rn <= %(sample_size)s) AS serials
+              FROM ranked
+             GROUP BY equipment_id, rate, pickup_date, return_date
+             ORDER BY MIN(item_sequence), MIN(item_id), pickup_date, return_date
+        """, {
+            'project_id': self.id,
+            'date_from': date_from or None,
+            'date_to': date_to or None,
+            'fallback_return': self.actual_return_date or date_to or self.end_date or None,
+            'clipped': bool(date_from or date_to),
+            'serial_ids': list(serial_ids) if serial_ids is not None else None,
+            'sample_size': sample_size,
+        })
+        
+        return [{
+            'equipment_id': equipment_id,
+            'rate': float(rate),
+            'pickup_date': pickup_date,
+            'return_date': return_date,
+            'qty': int(qty) if qty == int(qty) else float(qty),
+            'days': days,
+            'serials': serials or [],
+        } for equipment_id, rate, pickup_date, return_date, qty, days, serials in self.env.cr.fetchall()]
 
+    def _prepare_invoice_lines(self, date_from=None, date_to=None, serial_ids=None):
+        """
+        Prepare invoice lines based on actual serial pickup/return dates.
+        Groups lines by: equipment + daily_rate + date range.
+        Each line shows serials, dates, quantity, rate, and total.
+        
+        Args:
+            date_from (date): Only bill serial-days from this date on.
+                Defaults to the billing cursor, so days already invoiced by
+                billing cycles are not billed twice.
+            date_to (date): Only bill serial-days before this date (billing
+                cycle end).
+            serial_ids (list): Only bill these serials (partial return).
+        
+        Extra charges (late, damage, discount) are only added on the final
+        invoice, i.e. when neither date_to nor serial_ids is given.
+        """
+        self.ensure_one()
+        lines = []
+        if date_from is None:
+            date_from = self.billing_cursor_date
+        
+        # Step 1-2: Group serials by (equipment, daily_rate, pickup_date, return_date) in SQL
+        groups = self._read_invoice_line_groups(date_from, date_to, serial_ids)
+        equipments = self.env['otk.rental.equipment'].browse([g['equipment_id'] for g in groups])
+        equipments.fetch(['name'])
+        
         # Step 3: Generate invoice lines
-        for (equip_id, rate, p_date, r_date), group in groups.items():
-            equipment = group[0]['equipment']
-            serials = [g['serial'].serial_number for g in group]
-            qty = len(group)
-            days = group[0]['days']
-            total = sum(g['line_total'] for g in group)
-
+        for group in groups:
+            equipment = equipments.browse(group['equipment_id'])
+            rate = group['rate']
+            p_date, r_date = group['pickup_date'], group['return_date']
+            qty = group['qty']
+            days = group['days']
+            
             # Build descriptive name
-            serial_list = ", ".join(serials[:3]) + ("..." if len(serials) > 3 else "")
+            serial_list = ", ".join(group['serials']) + ("..." if qty > len(group['serials']) else "")
             date_range = f"{p_date.strftime('%d/%m/%Y')} → {r_date.strftime('%d/%m/%Y')}"
-            name = f"{equipment.name} — Serials: {serial_list} ({date_range}) ×{qty} × {days} days × {rate}/day"
-
+            name = f"{equipment.name} — Serials: {serial_list} ({date_range}) ×{qty} × {days} days × {rate:.2f}/day"
+            
+            # Price of one unit for the interval, rounded once: a full booking
+            # bills exactly its locked unit price
+            price_unit = round(rate * days, 2)
             lines.append((0, 0, {
                 'name': name,
-                'quantity': qty * days,
-                'price_unit': rate,  # Odoo expects unit price
-                'price_subtotal': total,
-                # Optional: link to serials for traceability
-                # 'analytic_distribution': {'serial_ids': [s['serial'].id for s in group]}
+                'quantity': qty,
+                'price_unit': price_unit,
+                'price_subtotal': price_unit * qty,
             }))
 
-        # Step 4: Add non-serial charges (late, damage, discount)
+        # Step 4: Add non-serial charges (late, damage, discount) on the final invoice
+        if date_to or serial_ids is not None:
+            return lines
         if self.late_fee_amount > 0:
             lines.append((0, 0, {
                 'name': f'Late Fee ({self.days_overdue} days overdue)',
@@ -526,16 +1526,25 @@ class OtkRentalProject(models.Model):
         return lines
 
     def action_view_invoice(self):
-        """Open the related invoice"""
+        """Open the related invoice(s), including billing cycle invoices"""
         self.ensure_one()
-        if not self.invoice_id:
+        invoices = self.invoice_id | self.cycle_invoice_ids | self.partial_invoice_ids
+        if not invoices:
             raise UserError(_('No invoice found for this project.'))
         
+        if len(invoices) > 1:
+            return {
+                'type': 'ir.actions.act_window',
+                'name': _('Invoices'),
+                'res_model': 'account.move',
+                'view_mode': 'list,form',
+                'domain': [('id', 'in', invoices.ids)],
+            }
         return {
             'type': 'ir.actions.act_window',
             'name': _('Invoice'),
             'res_model': 'account.move',
-            'res_id': self.invoice_id.id,
+            'res_id': invoices.id,
             'view_mode': 'form',
             'views': [(False, 'form')],
         }
@@ -583,18 +1592,3 @@ class OtkRentalProject(models.Model):
                 'default_project_id': self.id,
             }
         }
-
-    @api.depends('item_ids.assigned_serial_ids.rental_charge')
-    def _compute_amounts(self):
-        """Recalculate total based on actual serial charges"""
-        for project in self:
-            # Sum all serial rental charges
-            all_serials = project.item_ids.mapped('assigned_serial_ids')
-            project.total_amount = sum(all_serials.mapped('rental_charge'))
-
-            project.grand_total = (
-                project.total_amount +
-                project.late_fee_amount +
-                project.damage_fee -
-                project.discount_amount
-            )
\ No newline at end of file
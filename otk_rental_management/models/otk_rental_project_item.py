@@ -10,6 +10,7 @@
 # History logging - Log all serial status changes
 # Quantity matching - Ensures serials match quantity for serialized items
 # Smart buttons - View/manage assigned serials
+# Kits - Kit lines expand into component lines holding the serials, priced at kit level
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
@@ -51,6 +52,37 @@ class OtkRentalProjectItem(models.Model):
         related='equipment_id.has_serials',
         readonly=True
     )
+    equipment_is_kit = fields.Boolean(
+        'Is a Kit',
+        related='equipment_id.is_kit',
+        readonly=True
+    )
+    
+    # Kit expansion (component lines hold the serials, the kit line holds the price)
+    kit_item_id = fields.Many2one(
+        'otk.rental.project.item',
+        'Kit Line',
+        ondelete='cascade',
+        index=True,
+        readonly=True,
+        copy=False
+    )
+    kit_component_ids = fields.One2many(
+        'otk.rental.project.item',
+        'kit_item_id',
+        string='Kit Components'
+    )
+    kit_component_qty = fields.Integer(
+        'Units per Kit',
+        readonly=True,
+        copy=False
+    )
+    kit_lead = fields.Boolean(
+        'Lead Component',
+        readonly=True,
+        copy=False,
+        help='Serials of the lead component drive kit billing'
+    )
     
     # Quantity and Serials
     quantity = fields.Integer(
@@ -85,6 +117,26 @@ class OtkRentalProjectItem(models.Model):
         readonly=False,
         help='Price per unit for the rental period'
     )
+    rate_card_id = fields.Many2one(
+        'otk.rental.rate.card',
+        'Rate Card',
+        compute='_compute_unit_price',
+        store=True,
+        readonly=True,
+        ondelete='set null',
+        help='Rate card the unit price was taken from. Empty when equipment rates were used.'
+    )
+    price_locked = fields.Boolean(
+        'Price Locked',
+        readonly=True,
+        copy=False,
+        help='Unit price was snapshotted at booking and is no longer recomputed'
+    )
+    price_snapshot_date = fields.Datetime(
+        'Price Snapshot Date',
+        readonly=True,
+        copy=False
+    )
     subtotal = fields.Float(
         'Subtotal',
         compute='_compute_subtotal',
@@ -117,29 +169,28 @@ class OtkRentalProjectItem(models.Model):
             else:
                 item.serial_numbers_text = ''
     
-    @api.depends('equipment_id', 'project_id.duration_days')
+    @api.depends('equipment_id', 'project_id.duration_days', 'project_id.partner_id',
+                 'project_id.start_date', 'price_locked', 'kit_item_id')
     def _compute_unit_price(self):
-        """Calculate unit price based on rental duration and equipment rates"""
+        """Calculate unit price from the rate cards, falling back to equipment rates"""
+        RateCard = self.env['otk.rental.rate.card']
         for item in self:
-            if not item.equipment_id or not item.project_id:
+            # Price snapshot taken at booking: only an explicit reprice changes it
+            if item.price_locked:
+                continue
+            # Kit components are included in the kit line price
+            if not item.equipment_id or not item.project_id or item.kit_item_id:
                 item.unit_price = 0.0
+                item.rate_card_id = False
                 continue
-            
-            duration = item.project_id.duration_days
-            equipment = item.equipment_id
-            
-            # Determine best rate based on duration
-            if duration >= 30 and equipment.monthly_rate:
-                # Use monthly rate
-                months = duration / 30.0
-                item.unit_price = equipment.monthly_rate * months
-            elif duration >= 7 and equipment.weekly_rate:
-                # Use weekly rate
-                weeks = duration / 7.0
-                item.unit_price = equipment.weekly_rate * weeks
-            else:
-                # Use daily rate
-                item.unit_price = equipment.daily_rate * duration
+
+            project = item.project_id
+            item.unit_price, item.rate_card_id = RateCard._get_unit_price(
+                item.equipment_id,
+                project.duration_days,
+                partner=project.partner_id,
+                date=project.start_date,
+            )
     
     @api.depends('quantity', 'unit_price')
     def _compute_subtotal(self):
@@ -171,7 +222,7 @@ class OtkRentalProjectItem(models.Model):
         """Check availability when equipment is selected"""
         if self.equipment_id:
             # Check if enough stock is available
-            if self.equipment_has_serials:
+            if self.equipment_has_serials or self.equipment_is_kit:
                 available = self.equipment_id.available_stock
                 if self.quantity > available:
                     return {
@@ -182,10 +233,21 @@ class OtkRentalProjectItem(models.Model):
                             ) % (available, self.quantity)
                         }
                     }
+            if self.equipment_has_serials:
+                return self._get_pickup_location_warning()
     
     @api.onchange('quantity')
     def _onchange_quantity(self):
         """Warn if quantity exceeds available stock"""
+        if self.equipment_id and self.equipment_is_kit and self.quantity > self.equipment_id.available_stock:
+            return {
+                'warning': {
+                    'title': _('Insufficient Stock'),
+                    'message': _(
+                        'Only %d kit(s) available. You requested %d.'
+                    ) % (self.equipment_id.available_stock, self.quantity)
+                }
+            }
         if self.equipment_id and self.equipment_has_serials:
             available = self.equipment_id.available_stock
             if self.quantity > available:
@@ -197,6 +259,7 @@ class OtkRentalProjectItem(models.Model):
                         ) % (available, self.quantity)
                     }
                 }
+            warning = self._get_pickup_location_warning()
             # NEW: Auto-assign serials if in draft and we have enough
             if self.project_state == 'draft' and self.quantity > 0:
                 # Check if we need to adjust assignments
@@ -210,6 +273,33 @@ class OtkRentalProjectItem(models.Model):
                     # Need fewer serials - remove excess
                     serials_to_remove = self.assigned_serial_ids[:current_count - self.quantity]
                     self.assigned_serial_ids = [(3, serial.id) for serial in serials_to_remove]    
+            return warning
+
+    def _get_pickup_location_warning(self):
+        """
+        Warn when the project's pickup depot cannot cover this serialized line
+        for the rental dates. Allocation then takes the rest from other depots.
+        """
+        project = self.project_id
+        location = project.pickup_location_id
+        if not (location and project.start_date and project.end_date and self.quantity > 0):
+            return None
+        available = self.equipment_id._origin._get_available_quantities(
+            project.start_date, project.end_date, exclude_project_ids=project._origin.ids, by_location=True)
+        local_ids = set(self.env['stock.location'].search([('id', 'child_of', location.id)]).ids)
+        local = sum(qty for (_equipment_id, location_id), qty in available.items() if location_id in local_ids)
+        if self.quantity <= local:
+            return None
+        return {
+            'warning': {
+                'title': _('Stock at Other Depots'),
+                'message': _(
+                    'Only %(local)d unit(s) are free at %(location)s for these dates. '
+                    'The other %(missing)d will be allocated from other depots.',
+                    local=local, location=location.display_name, missing=self.quantity - local,
+                )
+            }
+        }
     
     # Serial Management Methods
     
@@ -236,156 +326,240 @@ class OtkRentalProjectItem(models.Model):
         if needed <= 0:
             return  # We have enough or too many
         
-        # Get available serials (not already assigned to this item)
-        available_serials = self.equipment_id.serial_ids.filtered(
-            lambda s: (s.status == 'available' or s.status == 'returned') and s.id not in current_assigned.ids
-        )
+        # Pick free serials (not already assigned to this item) with the allocation strategy
+        Serial = self.env['otk.rental.equipment.serial']
+        location = self.project_id.pickup_location_id
+        serials_to_assign = Serial._allocate(self.equipment_id, needed, exclude=current_assigned, location=location)
         
-        if len(available_serials) < needed:
+        if len(serials_to_assign) < needed:
             # Not enough available - check if we should auto-generate
             if self.equipment_id.auto_generate_serials:
-                shortage = needed - len(available_serials)
-                for i in range(shortage):
-                    self.env['otk.rental.equipment.serial'].create({
-                        'equipment_id': self.equipment_id.id,
-                        'status': 'available'
-                    })
-                # Refresh available serials
-                available_serials = self.equipment_id.serial_ids.filtered(
-                    lambda s: (s.status == 'available' or s.status == 'returned') and s.id not in current_assigned.ids
-                )
-        
-        # Assign serials (take first N available)
-        serials_to_assign = available_serials[:needed]
+                shortage = needed - len(serials_to_assign)
+                serials_to_assign |= Serial.create([{
+                    'equipment_id': self.equipment_id.id,
+                    'location_id': location.id,
+                    'status': 'available'
+                } for i in range(shortage)])
         
         if serials_to_assign:
             # Add to assigned serials (using command 4 to link)
             self.assigned_serial_ids = [(4, serial.id) for serial in serials_to_assign]
 
+    def _lock_prices(self):
+        """Snapshot the current unit price so later rate changes don't affect the booking"""
+        self.filtered(lambda item: not item.price_locked).write({
+            'price_locked': True,
+            'price_snapshot_date': fields.Datetime.now(),
+        })
+
+    def _reprice(self):
+        """Recompute unit prices from the current rate cards, keeping locked lines locked"""
+        locked = self.filtered('price_locked')
+        self.write({'price_locked': False})
+        self.flush_recordset(['unit_price', 'rate_card_id'])
+        locked._lock_prices()
+
+    def action_reprice(self):
+        """Explicitly reprice lines from the current rate cards"""
+        if any(state not in ('draft', 'reserved') for state in self.mapped('project_state')):
+            raise UserError(_('Only draft or reserved project lines can be repriced.'))
+        self._reprice()
+
+    def write(self, vals):
+        result = super().write(vals)
+        # Keep expanded component quantities in line with the kit quantity
+        if 'quantity' in vals:
+            for component in self.kit_component_ids:
+                component.quantity = component.kit_item_id.quantity * component.kit_component_qty
+        return result
+
+    def _reserve_kit(self):
+        """
+        Expand a kit line into component lines and reserve their serials in one
+        batch: one create for the component lines, one allocation query per
+        component, one write for all serial statuses and one history create.
+        """
+        self.ensure_one()
+        if self.kit_component_ids:
+            # Already expanded (project reset to draft): reserve the existing components
+            for component in self.kit_component_ids:
+                component.action_reserve_serials()
+            return
+        
+        kit_lines = self.equipment_id.kit_line_ids
+        if not kit_lines:
+            raise UserError(_('Kit %s has no components.') % self.equipment_id.name)
+        # Kit billing counts the lead's serials, so the lead must be serialized
+        lead = kit_lines.filtered(lambda line: line.component_id.has_serials)[:1]
+        if not lead:
+            raise UserError(_('Kit %s has no serialized component to bill it by.') % self.equipment_id.name)
+        
+        components = self.create([{
+            'project_id': self.project_id.id,
+            'equipment_id': line.component_id.id,
+            'quantity': self.quantity * line.quantity,
+            'kit_item_id': self.id,
+            'kit_component_qty': line.quantity,
+            'kit_lead': line == lead,
+            'sequence': self.sequence,
+        } for line in kit_lines])
+        # Quantity-tracked components are reserved on the ledger, like plain lines
+        self.env['otk.rental.stock.move']._record(components.filtered(lambda c: not c.equipment_has_serials), 'reservation')
+        
+        # Allocate serials for every serialized component
+        Serial = self.env['otk.rental.equipment.serial']
+        location = self.project_id.pickup_location_id
+        allocations = []
+        shortages = []
+        for component in components.filtered('equipment_has_serials'):
+            serials = Serial._allocate(component.equipment_id, component.quantity, location=location)
+            missing = component.quantity - len(serials)
+            if missing and component.equipment_id.auto_generate_serials:
+                serials |= Serial.create([{
+                    'equipment_id': component.equipment_id.id,
+                    'location_id': location.id,
+                    'status': 'available'
+                } for i in range(missing)])
+            elif missing:
+                shortages.append('%s (%d/%d)' % (component.equipment_id.name, len(serials), component.quantity))
+            allocations.append((component, serials))
+        
+        if shortages:
+            raise UserError(_(
+                'Insufficient serials for kit %s: %s. Please add more serials or enable auto-generation.'
+            ) % (self.equipment_id.name, ', '.join(shortages)))
+        
+        all_serials = Serial.union(*(serials for component, serials in allocations))
+        all_serials._transition(
+            'reserved',
+            {'current_project_id': self.project_id.id},
+            project=self.project_id,
+            notes=lambda serial: f'Serial {serial.serial_number} reserved for kit {self.equipment_id.name} in project {self.project_id.name}',
+        )
+        self.write({'kit_component_ids': [
+            (1, component.id, {'assigned_serial_ids': [(6, 0, serials.ids)]})
+            for component, serials in allocations
+        ]})
+
     def action_reserve_serials(self):
         """Reserve/assign serials for this item"""
         self.ensure_one()
         
-        if not self.equipment_has_serials:
-            return  # Nothing to do for non-serialized items
+        if self.equipment_is_kit:
+            return self._reserve_kit()
         
-        # Check if already has serials assigned
-        if self.assigned_serial_ids:
-            # Update status to reserved
-            self.assigned_serial_ids.write({
-                'status': 'reserved',
-                'current_project_id': self.project_id.id
-            })
+        if not self.equipment_has_serials:
+            # Non-serialized items only move quantities on the ledger
+            self.env['otk.rental.stock.move']._record(self, 'reservation')
             return
         
-        # Need to assign new serials
+        # Pick free serials with the allocation strategy. Lines partly served
+        # by the waitlist (or with serials picked in draft) are topped up.
         equipment = self.equipment_id
+        assigned = self.assigned_serial_ids
+        needed = self.quantity - len(assigned)
+        Serial = self.env['otk.rental.equipment.serial']
+        location = self.project_id.pickup_location_id
+        serials_to_assign = Serial._allocate(equipment, needed, exclude=assigned, location=location)
         
-        # Get available serials
-        available_serials = equipment.serial_ids.filtered(lambda s: s.status == 'available' or s.status == 'returned')
-        
-        if len(available_serials) < self.quantity:
+        if len(serials_to_assign) < needed:
             # Check if we should auto-generate
             if equipment.auto_generate_serials:
                 # Generate missing serials
-                needed = self.quantity - len(available_serials)
-                for i in range(needed):
-                    self.env['otk.rental.equipment.serial'].create({
-                        'equipment_id': equipment.id,
-                        'status': 'available'
-                    })
-                # Re-fetch available serials
-                available_serials = equipment.serial_ids.filtered(lambda s: s.status == 'available' or s.status == 'returned')
+                serials_to_assign |= Serial.create([{
+                    'equipment_id': equipment.id,
+                    'location_id': location.id,
+                    'status': 'available'
+                } for i in range(needed - len(serials_to_assign))])
             else:
                 raise UserError(_(
                     'Insufficient serials for %s. Need %d, found %d. Please add more serials or enable auto-generation.'
-                ) % (equipment.name, self.quantity, len(available_serials)))
-        
-        # Assign serials (take first N available)
-        serials_to_assign = available_serials[:self.quantity]
+                ) % (equipment.name, self.quantity, len(assigned) + len(serials_to_assign)))
         
-        # Update serials
-        serials_to_assign.write({
-            'status': 'reserved',
-            'current_project_id': self.project_id.id
-        })
+        # Update serials (and log status history); waitlisted ones are already reserved
+        (assigned | serials_to_assign).filtered(
+            lambda serial: serial.status != 'reserved' or serial.current_project_id != self.project_id
+        )._transition(
+            'reserved',
+            {'current_project_id': self.project_id.id},
+            project=self.project_id,
+            notes=lambda serial: f'Serial {serial.serial_number} reserved for project {self.project_id.name}',
+        )
         
         # Link to this item
-        self.assigned_serial_ids = [(6, 0, serials_to_assign.ids)]
-        
-        # Log status history
-        for serial in serials_to_assign:
-            self.env['otk.rental.project.item.status'].create({
-                'project_id': self.project_id.id,
-                'equipment_id': self.equipment_id.id,
-                'serial_id': serial.id,
-                'quantity': 1,
-                'status': 'reserved',
-                'notes': f'Serial {serial.serial_number} reserved for project {self.project_id.name}'
-            })
+        if serials_to_assign:
+            self.assigned_serial_ids = [(4, serial.id) for serial in serials_to_assign]
     
     def action_start_rental(self):
         """Change serial status from reserved to rented"""
         self.ensure_one()
         
         if not self.equipment_has_serials:
+            self.env['otk.rental.stock.move']._record(self, 'pickup')
             return
         
-        self.assigned_serial_ids.write({'status': 'rented'})
-        
-        # Log status change
-        for serial in self.assigned_serial_ids:
-            self.env['otk.rental.project.item.status'].create({
-                'project_id': self.project_id.id,
-                'equipment_id': self.equipment_id.id,
-                'serial_id': serial.id,
-                'quantity': 1,
-                'status': 'rented',
-                'notes': f'Rental started for serial {serial.serial_number}'
-            })
+        # Serials transferred in from another project are already out
+        self.assigned_serial_ids.filtered(lambda s: s.status != 'rented')._transition(
+            'rented',
+            project=self.project_id,
+            notes=lambda serial: f'Rental started for serial {serial.serial_number}',
+        )
     
     def action_complete_return(self):
         """Mark serials as returned and available"""
         self.ensure_one()
         
         if not self.equipment_has_serials:
+            self.env['otk.rental.stock.move']._record(self, 'return')
             return
         
-        # Change status to returned, then available
-        self.assigned_serial_ids.write({
-            'status': 'returned',
-            'current_project_id': False
-        })
-        
-        # Log return
-        for serial in self.assigned_serial_ids:
-            self.env['otk.rental.project.item.status'].create({
-                'project_id': self.project_id.id,
-                'equipment_id': self.equipment_id.id,
-                'serial_id': serial.id,
-                'quantity': 1,
-                'status': 'returned',
-                'notes': f'Serial {serial.serial_number} returned'
-            })
+        # Change status to returned, then available; serials already handled
+        # by a partial return (damaged, under repair...) keep their status
+        self.assigned_serial_ids.filtered(lambda s: s.status in ('reserved', 'rented'))._transition(
+            'returned',
+            {'current_project_id': False},
+            project=self.project_id,
+            notes=lambda serial: f'Serial {serial.serial_number} returned',
+        )
         
         # Set to available after a brief moment (simulating inspection)
         # In real scenario, this might be done manually after inspection
-        self.assigned_serial_ids.write({'status': 'available'})
+        self.assigned_serial_ids.filtered(lambda s: s.status == 'returned')._transition('available')
     
     def action_release_serials(self):
         """Release serials (cancel reservation)"""
         self.ensure_one()
         
         if not self.equipment_has_serials:
+            self.env['otk.rental.stock.move']._record(self, 'release')
             return
         
-        self.assigned_serial_ids.write({
-            'status': 'available',
-            'current_project_id': False
-        })
+        self.assigned_serial_ids._transition(
+            'available',
+            {'current_project_id': False},
+            notes=lambda serial: f'Serial {serial.serial_number} released from project {self.project_id.name}',
+        )
         
         self.assigned_serial_ids = [(5, 0, 0)]  # Unlink all
     
+    def _release_waitlisted_serials(self):
+        """Give back the serials the waitlist reserved on draft lines (line deleted or cancelled)"""
+        for item in self.filtered(lambda i: i.project_state == 'draft'):
+            serials = item.assigned_serial_ids.filtered(
+                lambda serial: serial.status == 'reserved' and serial.current_project_id == item.project_id)
+            if not serials:
+                continue
+            serials._transition(
+                'available',
+                {'current_project_id': False},
+                notes=lambda serial: f'Serial {serial.serial_number} released from draft project {item.project_id.name}',
+            )
+            item.assigned_serial_ids = [(3, serial.id) for serial in serials]
+
+    def unlink(self):
+        self._release_waitlisted_serials()
+        return super().unlink()
+    
     def action_view_serials(self):
         """View assigned serials"""
         self.ensure_one()
@@ -0,0 +1,218 @@
+# Key Features:
+
+# Tiered durations - Different prices from a minimum number of rental days
+# Overrides - Per equipment or per category (incl. parent categories), optionally per customer
+# Validity dates - Rate cards only apply to bookings starting in their window
+# Indexed lookup - One SQL query per (equipment, customer, duration, date)
+# Transaction cache - Repeated lookups in the same transaction hit memory
+# Fallback - Equipment daily/weekly/monthly rates when no rate card matches
+# Batched repricing - Explicit action to reprice open project lines
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from odoo.osv import expression
+
+# Days per pricing period, used to prorate a period price over the duration
+PERIOD_DAYS = {
+    'day': 1.0,
+    'week': 7.0,
+    'month': 30.0,
+}
+
+LOOKUP_CACHE_KEY = 'otk.rental.rate.card.lookup'
+
+
+class OtkRentalRateCard(models.Model):
+    _name = 'otk.rental.rate.card'
+    _description = 'Rental Rate Card'
+    _order = 'sequence, min_days desc, id'
+
+    name = fields.Char('Description')
+    sequence = fields.Integer('Sequence', default=10)
+    active = fields.Boolean('Active', default=True)
+
+    # Scope (equipment takes precedence over category)
+    equipment_id = fields.Many2one(
+        'otk.rental.equipment',
+        'Equipment',
+        ondelete='cascade',
+        index=True
+    )
+    category_id = fields.Many2one(
+        'otk.rental.equipment.category',
+        'Category',
+        ondelete='cascade',
+        index=True,
+        help='Applies to all equipment in this category and its sub-categories'
+    )
+    partner_id = fields.Many2one(
+        'res.partner',
+        'Customer',
+        ondelete='cascade',
+        index=True,
+        help='Customer-specific price. Leave empty for the general rate card.'
+    )
+
+    # Tier
+    min_days = fields.Integer(
+        'From (Days)',
+        default=0,
+        required=True,
+        help='Applies to rentals of at least this many days'
+    )
+    period = fields.Selection([
+        ('day', 'Per Day'),
+        ('week', 'Per Week'),
+        ('month', 'Per Month')
+    ], string='Price Per', default='day', required=True)
+    price = fields.Float('Price', required=True)
+
+    # Validity
+    date_start = fields.Date('Valid From')
+    date_end = fields.Date('Valid Until')
+
+    def init(self):
+        # Covers the price lookup: scope columns + tier
+        tools.create_index(
+            self._cr,
+            'otk_rental_rate_card_lookup_index',
+            self._table,
+            ['equipment_id', 'category_id', 'partner_id', 'min_days'],
+            where='active',
+        )
+
+    @api.constrains('equipment_id', 'category_id')
+    def _check_scope(self):
+        for card in self:
+            if not card.equipment_id and not card.category_id:
+                raise ValidationError(_('A rate card must apply to an equipment or a category.'))
+
+    @api.constrains('date_start', 'date_end')
+    def _check_dates(self):
+        for card in self:
+            if card.date_start and card.date_end and card.date_end < card.date_start:
+                raise ValidationError(_('Valid Until cannot be before Valid From.'))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._clear_lookup_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._clear_lookup_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self._clear_lookup_cache()
+        return super().unlink()
+
+    # Price Engine
+
+    @api.model
+    def _clear_lookup_cache(self):
+        self.env.cr.precommit.data.pop(LOOKUP_CACHE_KEY, None)
+
+    @api.model
+    def _get_unit_price(self, equipment, duration, partner=None, date=None):
+        """
+        Resolve the price of one unit of equipment for the given duration.
+
+        Returns:
+            tuple: (unit price, matching rate card or empty recordset)
+        """
+        if not equipment:
+            return 0.0, self.browse()
+
+        partner_id = partner.commercial_partner_id.id if partner else False
+        date = date or fields.Date.context_today(self)
+
+        # Per-transaction cache: cleared at commit/rollback and on rate card changes
+        cache = self.env.cr.precommit.data.setdefault(LOOKUP_CACHE_KEY, {})
+        key = (equipment.id, partner_id, duration, date)
+        if key not in cache:
+            card = self._lookup(equipment, duration, partner_id, date)
+            if card:
+                price = card.price * duration / PERIOD_DAYS[card.period]
+            else:
+                price = self._get_equipment_list_price(equipment, duration)
+            cache[key] = (price, card.id)
+
+        price, card_id = cache[key]
+        return price, self.browse(card_id)
+
+    @api.model
+    def _lookup(self, equipment, duration, partner_id, date):
+        """
+        Most specific active rate card for this booking:
+        customer before general, equipment before category, highest tier first.
+        """
+        # Equipment categories and all their parents
+        category_ids = {
+            int(category_id)
+            for path in equipment.category_ids.mapped('parent_path') if path
+            for category_id in path.rstrip('/').split('/')
+        }
+
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id
+              FROM otk_rental_rate_card
+             WHERE active
+               AND (equipment_id = %(equipment_id)s OR category_id = ANY(%(category_ids)s))
+               AND (partner_id IS NULL OR partner_id = %(partner_id)s)
+               AND min_days <= %(duration)s
+               AND (date_start IS NULL OR date_start <= %(date)s)
+               AND (date_end IS NULL OR date_end >= %(date)s)
+             ORDER BY partner_id IS NULL, equipment_id IS NULL, min_days DESC, sequence, id
+             LIMIT 1
+        """, {
+            'equipment_id': equipment.id,
+            'category_ids': list(category_ids),
+            'partner_id': partner_id or None,
+            'duration': duration,
+            'date': date,
+        })
+        row = self.env.cr.fetchone()
+        return self.browse(row[0] if row else [])
+
+    @api.model
+    def _get_equipment_list_price(self, equipment, duration):
+        """Price from the equipment's own daily/weekly/monthly rates"""
+        # Determine best rate based on duration
+        if duration >= 30 and equipment.monthly_rate:
+            # Use monthly rate
+            return equipment.monthly_rate * duration / PERIOD_DAYS['month']
+        if duration >= 7 and equipment.weekly_rate:
+            # Use weekly rate
+            return equipment.weekly_rate * duration / PERIOD_DAYS['week']
+        # Use daily rate
+        return equipment.daily_rate * duration
+
+    # Actions
+
+    def _get_open_project_items(self):
+        """Draft and reserved project lines these rate cards may apply to"""
+        domain = [('project_state', 'in', ['draft', 'reserved'])]
+        scope = []
+        if self.equipment_id:
+            scope.append([('equipment_id', 'in', self.equipment_id.ids)])
+        if self.category_id:
+            scope.append([('equipment_id.category_ids', 'child_of', self.category_id.ids)])
+        return self.env['otk.rental.project.item'].search(
+            expression.AND([domain, expression.OR(scope)]) if scope else domain
+        )
+
+    def action_reprice_open_items(self):
+        """Explicitly reprice the open project lines covered by these rate cards"""
+        items = self._get_open_project_items()
+        items._reprice()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Repricing Done'),
+                'message': _('%s project line(s) repriced.', len(items)),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
@@ -0,0 +1,124 @@
+# Key Features:
+
+# Single query - All otk_rental.* parameters fetched at once
+# Typed values - Booleans, integers and floats parsed with sensible defaults
+# ormcache - Settings loaded once and shared until a parameter changes
+# Invalidation - Cleared when an otk_rental.* config parameter is created, written or deleted
+
+from odoo import models, api, tools
+from odoo.tools import frozendict
+
+SETTINGS_PREFIX = 'otk_rental.'
+
+# Parameter name (without prefix) -> (type, default)
+# Defaults mirror the ones declared on res.config.settings
+SETTINGS_SPEC = {
+    # Late fees
+    'default_late_fee_enabled': (bool, False),
+    'late_fee_daily_rate': (float, 0.0),
+    'late_fee_percentage': (float, 0.0),
+    'late_fee_calculation_method': (str, 'maximum'),
+    # Serials
+    'auto_generate_serials': (bool, False),
+    'serial_prefix': (str, 'SN'),
+    'serial_allocation_strategy': (str, 'sequence'),
+    # Projects
+    'default_rental_duration': (int, 7),
+    'require_signature': (bool, True),
+    'require_photos': (bool, False),
+    # Notifications
+    'send_reminder_email': (bool, True),
+    'reminder_days_before': (int, 2),
+    'send_overdue_email': (bool, True),
+    # Invoicing
+    'auto_create_invoice': (bool, False),
+    'invoice_partial_returns': (bool, False),
+    'invoice_include_late_fees': (bool, True),
+    # Stock
+    'warn_low_stock': (bool, True),
+    'low_stock_threshold': (int, 3),
+    'hold_ttl_minutes': (int, 15),
+    # Damage assessment
+    'damage_minor_threshold': (float, 100.0),
+    'damage_moderate_threshold': (float, 500.0),
+}
+
+
+def _parse_value(value_type, raw, default):
+    """Convert a stored ir.config_parameter string to its typed value"""
+    if raw is None or raw == '':
+        return default
+    if value_type is bool:
+        return str(raw).strip().lower() in ('true', '1', 'yes')
+    try:
+        return value_type(raw)
+    except (TypeError, ValueError):
+        return default
+
+
+class OtkRentalSettings(models.AbstractModel):
+    _name = 'otk.rental.settings'
+    _description = 'Rental Settings Accessor'
+
+    @api.model
+    @tools.ormcache()
+    def _get_settings(self):
+        """
+        Fetch every otk_rental.* parameter in a single query.
+        Cached until an otk_rental.* config parameter changes (see
+        IrConfigParameter below).
+        """
+        self.env['ir.config_parameter'].flush_model(['key', 'value'])
+        self.env.cr.execute(
+            "SELECT key, value FROM ir_config_parameter WHERE key LIKE %s",
+            [SETTINGS_PREFIX.replace('_', '\\_') + '%'],
+        )
+        raw_values = {
+            key[len(SETTINGS_PREFIX):]: value
+            for key, value in self.env.cr.fetchall()
+        }
+        
+        return frozendict({
+            name: _parse_value(value_type, raw_values.get(name), default)
+            for name, (value_type, default) in SETTINGS_SPEC.items()
+        })
+
+    @api.model
+    def get(self, name):
+        """Return the typed value of a single otk_rental.* setting"""
+        return self._get_settings()[name]
+
+    @api.model
+    def _invalidate(self):
+        """Drop the cached settings, in this worker and (through the registry signal) the others"""
+        self.env.registry.clear_cache()
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    def _is_rental_setting(self, vals_list=()):
+        """Whether these parameters, or the given values, are otk_rental.* settings"""
+        keys = self.mapped('key') + [vals.get('key') or '' for vals in vals_list]
+        return any(key.startswith(SETTINGS_PREFIX) for key in keys)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if records._is_rental_setting():
+            self.env['otk.rental.settings']._invalidate()
+        return records
+
+    def write(self, vals):
+        rental_setting = self._is_rental_setting([vals])
+        result = super().write(vals)
+        if rental_setting:
+            self.env['otk.rental.settings']._invalidate()
+        return result
+
+    def unlink(self):
+        rental_setting = self._is_rental_setting()
+        result = super().unlink()
+        if rental_setting:
+            self.env['otk.rental.settings']._invalidate()
+        return result
@@ -0,0 +1,201 @@
+# Key Features:
+
+# Append-only ledger - Quantity moves for non-serialized equipment, never edited or deleted
+# Buckets - Each move changes on hand, reserved and/or rented quantities
+# Snapshots - Periodic balance rows so balances never sum the whole history
+# O(1) balances - Latest snapshot + moves after it, in one query
+# Nightly cron - One INSERT ... SELECT rolls balances forward for active equipment
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+# Bucket deltas per unit of quantity, per move type
+MOVE_DELTAS = {
+    'receipt': (1, 0, 0),
+    'reservation': (0, 1, 0),
+    'release': (0, -1, 0),
+    'pickup': (0, -1, 1),
+    'return': (0, 0, -1),
+    'writeoff': (-1, 0, 0),
+}
+
+
+class OtkRentalStockMove(models.Model):
+    _name = 'otk.rental.stock.move'
+    _description = 'Rental Quantity Ledger Move'
+    _order = 'id desc'
+
+    equipment_id = fields.Many2one(
+        'otk.rental.equipment',
+        'Equipment',
+        required=True,
+        ondelete='restrict',
+        index=True,
+        domain=[('has_serials', '=', False), ('is_kit', '=', False)]
+    )
+    date = fields.Datetime('Date', required=True, default=fields.Datetime.now, index=True)
+    move_type = fields.Selection([
+        ('receipt', 'Receipt'),
+        ('reservation', 'Reservation'),
+        ('release', 'Reservation Released'),
+        ('pickup', 'Pickup'),
+        ('return', 'Return'),
+        ('writeoff', 'Write-off')
+    ], string='Type', required=True)
+    quantity = fields.Integer('Quantity', required=True, default=1)
+
+    # Signed bucket changes, derived from type and quantity at creation
+    on_hand_delta = fields.Integer('On Hand', readonly=True)
+    reserved_delta = fields.Integer('Reserved', readonly=True)
+    rented_delta = fields.Integer('Rented', readonly=True)
+
+    project_id = fields.Many2one('otk.rental.project', 'Project', index=True, ondelete='restrict')
+    item_id = fields.Many2one('otk.rental.project.item', 'Project Line', index=True, ondelete='set null')
+    notes = fields.Char('Notes')
+
+    def init(self):
+        # Moves after a snapshot, per equipment
+        tools.create_index(self._cr, 'otk_rental_stock_move_equipment_id_id_index', self._table, ['equipment_id', 'id'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('quantity', 1) <= 0:
+                raise UserError(_('Ledger move quantity must be positive.'))
+            on_hand, reserved, rented = MOVE_DELTAS[vals['move_type']]
+            quantity = vals.get('quantity', 1)
+            vals.update({
+                'on_hand_delta': on_hand * quantity,
+                'reserved_delta': reserved * quantity,
+                'rented_delta': rented * quantity,
+            })
+        return super().create(vals_list)
+
+    def write(self, vals):
+        raise UserError(_('Ledger moves cannot be modified. Record a correcting move instead.'))
+
+    def unlink(self):
+        raise UserError(_('Ledger moves cannot be deleted. Record a correcting move instead.'))
+
+    @api.model
+    def _record(self, items, move_type):
+        """Record one move per quantity-tracked project line"""
+        items = items.filtered(lambda i: not i.equipment_has_serials and not i.equipment_is_kit and i.quantity)
+        if not items:
+            return self.browse()
+        # Only equipment already on the ledger (i.e. with a receipt) is quantity-tracked
+        tracked = self.env['otk.rental.stock.snapshot']._get_balances(items.equipment_id.ids)
+        items = items.filtered(lambda i: i.equipment_id.id in tracked)
+        return self.create([{
+            'equipment_id': item.equipment_id.id,
+            'move_type': move_type,
+            'quantity': item.quantity,
+            'project_id': item.project_id.id,
+            'item_id': item.id,
+        } for item in items])
+
+
+class OtkRentalStockSnapshot(models.Model):
+    _name = 'otk.rental.stock.snapshot'
+    _description = 'Rental Quantity Ledger Snapshot'
+    _order = 'equipment_id, last_move_id desc'
+
+    equipment_id = fields.Many2one('otk.rental.equipment', 'Equipment', required=True, ondelete='cascade', readonly=True)
+    date = fields.Datetime('Date', required=True, readonly=True)
+    last_move_id = fields.Integer('Last Move', required=True, readonly=True,
+                                  help='Balances include all moves up to this one')
+    on_hand = fields.Integer('On Hand', readonly=True)
+    reserved = fields.Integer('Reserved', readonly=True)
+    rented = fields.Integer('Rented', readonly=True)
+
+    def init(self):
+        # Latest snapshot per equipment
+        tools.create_index(
+            self._cr, 'otk_rental_stock_snapshot_equipment_last_move_index', self._table,
+            ['equipment_id', 'last_move_id DESC'],
+        )
+
+    @api.model
+    def _get_balances(self, equipment_ids, at=None):
+        """
+        Ledger balances per equipment: latest snapshot + moves after it.
+        With `at`, the balances as of that datetime.
+
+        Returns:
+            dict: {equipment_id: (on_hand, reserved, rented)} for equipment with ledger history
+        """
+        if not equipment_ids:
+            return {}
+        self.env['otk.rental.stock.move'].flush_model()
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT e.id,
+                   COALESCE(snap.on_hand, 0) + COALESCE(delta.on_hand, 0),
+                   COALESCE(snap.reserved, 0) + COALESCE(delta.reserved, 0),
+                   COALESCE(snap.rented, 0) + COALESCE(delta.rented, 0)
+              FROM unnest(%(equipment_ids)s::int[]) AS e(id)
+              LEFT JOIN LATERAL (
+                    SELECT on_hand, reserved, rented, last_move_id
+                      FROM otk_rental_stock_snapshot
+                     WHERE equipment_id = e.id
+                       AND (%(at)s::timestamp IS NULL OR date <= %(at)s::timestamp)
+                     ORDER BY last_move_id DESC
+                     LIMIT 1
+              ) snap ON TRUE
+              LEFT JOIN LATERAL (
+                    SELECT SUM(on_hand_delta) AS on_hand,
+                           SUM(reserved_delta) AS reserved,
+                           SUM(rented_delta) AS rented,
+                           COUNT(*) AS moves
+                      FROM otk_rental_stock_move
+                     WHERE equipment_id = e.id
+                       AND id > COALESCE(snap.last_move_id, 0)
+                       AND (%(at)s::timestamp IS NULL OR date <= %(at)s::timestamp)
+              ) delta ON TRUE
+             WHERE snap.last_move_id IS NOT NULL OR delta.moves > 0
+        """, {'equipment_ids': list(equipment_ids), 'at': at})
+        return {
+            equipment_id: (on_hand, reserved, rented)
+            for equipment_id, on_hand, reserved, rented in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _cron_snapshot_ledger(self):
+        """
+        Roll balances forward for every equipment with moves since its last snapshot.
+
+        Move ids are drawn before commit, so a move committed after the
+        snapshot could have an id below its cutoff and be skipped by every
+        later balance. The snapshot is therefore written in its own
+        transaction whose first statement locks the ledger in SHARE mode: it
+        waits for transactions still writing moves to commit and holds new
+        writers back until the snapshot is committed. The transaction only
+        takes its view of the data after the lock.
+        """
+        self.env['otk.rental.stock.move'].flush_model()
+        self.flush_model()
+        with self.env.registry.cursor() as cr:
+            cr.execute("LOCK TABLE otk_rental_stock_move IN SHARE MODE")
+            cr.execute("""
+                INSERT INTO otk_rental_stock_snapshot
+                       (equipment_id, date, last_move_id, on_hand, reserved, rented,
+                        create_uid, create_date, write_uid, write_date)
+                SELECT m.equipment_id,
+                       NOW() AT TIME ZONE 'UTC',
+                       MAX(m.id),
+                       COALESCE(MAX(snap.on_hand), 0) + SUM(m.on_hand_delta),
+                       COALESCE(MAX(snap.reserved), 0) + SUM(m.reserved_delta),
+                       COALESCE(MAX(snap.rented), 0) + SUM(m.rented_delta),
+                       %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+                  FROM otk_rental_stock_move m
+                  LEFT JOIN LATERAL (
+                        SELECT on_hand, reserved, rented, last_move_id
+                          FROM otk_rental_stock_snapshot
+                         WHERE equipment_id = m.equipment_id
+                         ORDER BY last_move_id DESC
+                         LIMIT 1
+                  ) snap ON TRUE
+                 WHERE m.id > COALESCE(snap.last_move_id, 0)
+                 GROUP BY m.equipment_id
+            """, {'uid': self.env.uid})
+        self.invalidate_model()
@@ -0,0 +1,156 @@
+# Key Features:
+
+# Waitlist queue - Draft project lines waiting for serials of an equipment
+# Fair ordering - Served by priority, then request time
+# Return hook - Serials freed by a full or partial return are reserved for waiting lines in the same transaction
+# Batched pass - One search for the queue, one assignment write per served line
+# Notifications - The owner of each served project gets one message listing what arrived
+
+from collections import defaultdict
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+
+class OtkRentalWaitlist(models.Model):
+    _name = 'otk.rental.waitlist'
+    _description = 'Rental Equipment Waitlist'
+    _order = 'priority desc, request_date, id'
+
+    item_id = fields.Many2one(
+        'otk.rental.project.item',
+        'Project Line',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    project_id = fields.Many2one(related='item_id.project_id', store=True, index=True)
+    partner_id = fields.Many2one(related='item_id.project_id.partner_id', string='Customer')
+    equipment_id = fields.Many2one(related='item_id.equipment_id', store=True)
+    quantity = fields.Integer('Missing Quantity', required=True, default=1,
+                              help='Serials still needed by the project line')
+    priority = fields.Selection([
+        ('0', 'Normal'),
+        ('1', 'Urgent'),
+    ], string='Priority', default='0', required=True)
+    request_date = fields.Datetime('Requested On', required=True, default=fields.Datetime.now, readonly=True)
+    state = fields.Selection([
+        ('waiting', 'Waiting'),
+        ('allocated', 'Allocated'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='waiting', required=True)
+    allocated_date = fields.Datetime('Allocated On', readonly=True)
+
+    def init(self):
+        # Queue of an equipment, in serving order
+        tools.create_index(
+            self._cr, 'otk_rental_waitlist_queue_index', self._table,
+            ['equipment_id', 'priority DESC', 'request_date', 'id'],
+            where="state = 'waiting'",
+        )
+
+    @api.model
+    def _enqueue(self, items):
+        """Queue draft serialized lines for the serials they are still missing"""
+        items = items.filtered(lambda i: i.equipment_has_serials and not i.equipment_is_kit)
+        waiting = self.search([('item_id', 'in', items.ids), ('state', '=', 'waiting')])
+        queued = {entry.item_id.id: entry for entry in waiting}
+        vals_list = []
+        for item in items:
+            if item.project_state != 'draft':
+                raise UserError(_('Only draft projects can join the waitlist.'))
+            missing = item.quantity - len(item.assigned_serial_ids)
+            if missing <= 0:
+                continue
+            if item.id in queued:
+                queued[item.id].quantity = missing
+            else:
+                vals_list.append({'item_id': item.id, 'quantity': missing})
+        return waiting | self.create(vals_list)
+
+    @api.model
+    def _allocate_freed(self, serials):
+        """
+        Hand freshly freed serials to waiting draft lines, in queue order.
+
+        Called from the return paths in the same transaction, once per return
+        with all the freed serials. Units guaranteed to checkout holds over a
+        waiting project's dates are left free.
+
+        Returns:
+            otk.rental.waitlist entries that received serials
+        """
+        serials = serials.filtered(lambda s: s.active and s.status in ('available', 'returned'))
+        if not serials:
+            return self.browse()
+        entries = self.search([
+            ('equipment_id', 'in', serials.equipment_id.ids),
+            ('state', '=', 'waiting'),
+        ])
+        if not entries:
+            return self.browse()
+
+        # Projects that left draft no longer wait
+        stale = entries.filtered(lambda e: e.project_id.state != 'draft')
+        stale.write({'state': 'cancelled'})
+        entries -= stale
+
+        # Same equipment locking as holds, so a concurrent hold cannot count them too
+        serials.equipment_id._lock_for_allocation()
+        pools = defaultdict(list)
+        for serial in serials:
+            pools[serial.equipment_id.id].append(serial.id)
+
+        served = self.browse()
+        now = fields.Datetime.now()
+        Serial = self.env['otk.rental.equipment.serial']
+        for entry in entries:
+            pool = pools[entry.equipment_id.id]
+            if not pool:
+                continue
+            project = entry.project_id
+            free = entry.equipment_id._get_available_quantities(project.start_date, project.end_date)
+            count = min(entry.quantity, free[entry.equipment_id.id])
+            if not count:
+                continue
+            taken, pools[entry.equipment_id.id] = pool[:count], pool[count:]
+            # Reserved for the waiting project so allocation cannot hand them to another one
+            Serial.browse(taken)._transition(
+                'reserved',
+                {'current_project_id': project.id},
+                project=project,
+                notes=lambda serial: f'Serial {serial.serial_number} reserved for waitlisted project {project.name}',
+            )
+            entry.item_id.assigned_serial_ids = [(4, serial_id) for serial_id in taken]
+            remaining = entry.quantity - len(taken)
+            entry.write({
+                'quantity': remaining or entry.quantity,
+                'state': 'waiting' if remaining else 'allocated',
+                'allocated_date': now if not remaining else False,
+            })
+            served |= entry
+
+        served._notify_owners()
+        return served
+
+    def _notify_owners(self):
+        """One message per project, addressed to whoever created it"""
+        for project in self.project_id:
+            entries = self.filtered(lambda e: e.project_id == project)
+            lines = Markup('').join(
+                Markup('<li>%s: %s</li>') % (
+                    entry.equipment_id.display_name,
+                    _('complete') if entry.state == 'allocated' else _('%d still missing', entry.quantity),
+                )
+                for entry in entries
+            )
+            project.message_post(
+                body=Markup('%s<ul>%s</ul>') % (_('Returned equipment was allocated from the waitlist:'), lines),
+                partner_ids=project.create_uid.partner_id.ids,
+                subtype_xmlid='mail.mt_comment',
+            )
+
+    def action_cancel(self):
+        self.write({'state': 'cancelled'})
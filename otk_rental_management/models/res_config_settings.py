@@ -12,6 +12,8 @@
 
 from odoo import models, fields, api
 
+from .otk_rental_equipment_serial import ALLOCATION_STRATEGIES
+
 
 # Extend res.company model
 class ResCompany(models.Model):
@@ -89,6 +91,13 @@ class ResConfigSettings(models.TransientModel):
         default='SN',
         help='Prefix for auto-generated serial numbers (e.g., SN-EQUIP-0001)'
     )
+    otk_rental_serial_allocation_strategy = fields.Selection(
+        ALLOCATION_STRATEGIES,
+        string='Serial Allocation',
+        config_parameter='otk_rental.serial_allocation_strategy',
+        default='sequence',
+        help='Which free serials are picked when serials are assigned automatically'
+    )
     
     # Project Settings
     otk_rental_default_rental_duration = fields.Integer(
@@ -135,6 +144,12 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='otk_rental.auto_create_invoice',
         help='Automatically create invoice when equipment is returned'
     )
+    otk_rental_invoice_partial_returns = fields.Boolean(
+        'Invoice Partial Returns Immediately',
+        config_parameter='otk_rental.invoice_partial_returns',
+        help='Create an invoice for the returned serials at each partial return '
+             'instead of waiting for the final project invoice'
+    )
     otk_rental_invoice_include_late_fees = fields.Boolean(
         'Include Late Fees in Invoice',
         config_parameter='otk_rental.invoice_include_late_fees',
@@ -155,6 +170,12 @@ class ResConfigSettings(models.TransientModel):
         default=3,
         help='Minimum available units before showing low stock warning'
     )
+    otk_rental_hold_ttl_minutes = fields.Integer(
+        'Checkout Hold Duration',
+        config_parameter='otk_rental.hold_ttl_minutes',
+        default=15,
+        help='Minutes equipment stays held for a customer checking out before it is released'
+    )
     
     # Damage Assessment Settings
     otk_rental_damage_minor_threshold = fields.Float(
@@ -178,4 +199,4 @@ class ResConfigSettings(models.TransientModel):
         elif self.otk_rental_late_fee_percentage and not self.otk_rental_late_fee_daily_rate:
             self.otk_rental_late_fee_calculation_method = 'percentage'
         elif self.otk_rental_late_fee_daily_rate and self.otk_rental_late_fee_percentage:
-            self.otk_rental_late_fee_calculation_method = 'maximum'
\ No newline at end of file
+            self.otk_rental_late_fee_calculation_method = 'maximum'
@@ -0,0 +1,19 @@
+# Key Features:
+
+# Billing mode - Invoice each rental project separately or consolidate
+#                all returned projects of the customer into one periodic invoice
+
+from odoo import models, fields
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+    
+    otk_rental_billing_mode = fields.Selection([
+        ('per_project', 'One Invoice per Project'),
+        ('consolidated', 'Consolidated Periodic Invoice')
+    ], string='Rental Billing Mode',
+       default='per_project',
+       help='Consolidated: all returned rental projects of this customer are '
+            'grouped on one invoice (one section per project) by the periodic '
+            'invoicing run instead of being invoiced one by one.')
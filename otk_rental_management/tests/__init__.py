@@ -0,0 +1,5 @@
+from . import test_api_auth
+from . import test_performance_budgets
+from . import test_rental_holds
+from . import test_rental_kits
+from . import test_serial_transitions
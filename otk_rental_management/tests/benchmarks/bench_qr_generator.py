@@ -0,0 +1,222 @@
+# Key Features:
+
+# Standalone - Loads models/qr_generator.py by path, no Odoo instance or database needed
+# Matrix - generate_qr_code and QRCodeGenerator x QR versions 2-20 x 300-1080 px, generate_qr_code with/without logo
+#          (QRCodeGenerator.generate does not draw the logo, so it has no logo axis)
+# Metrics - Renders per second, peak traced memory of one render (tracemalloc) and PNG bytes per case
+#           Pillow's pixel buffers are allocated outside Python and not traced; the worker's RSS is reported for reference
+# JSON results - Written to --output so runs can be compared between versions
+# Regression thresholds - --baseline fails the run when a case is slower, heavier or bigger than allowed
+#
+# Usage:
+#   python otk_rental_management/tests/benchmarks/bench_qr_generator.py --output qr-1.0.4.json
+#   python otk_rental_management/tests/benchmarks/bench_qr_generator.py --baseline qr-1.0.4.json
+
+import argparse
+import base64
+import importlib.util
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+QR_GENERATOR_PATH = Path(__file__).resolve().parents[2] / 'models' / 'qr_generator.py'
+
+VERSIONS = (2, 5, 10, 15, 20)
+SIZES = (300, 600, 1080)
+ENTRY_POINTS = ('generate_qr_code', 'QRCodeGenerator')
+# Entry points that draw the logo (QRCodeGenerator.generate has _add_logo disabled)
+LOGO_ENTRY_POINTS = ('generate_qr_code',)
+
+# Allowed change against the baseline before a case counts as a regression
+DEFAULT_MAX_SLOWDOWN = 0.15
+DEFAULT_MAX_MEMORY_GROWTH = 0.25
+# Traced peaks are deterministic up to interpreter details; smaller growth is not flagged
+MEMORY_GROWTH_FLOOR_KB = 64
+MEMORY_METRIC = 'tracemalloc_peak'
+DEFAULT_MAX_PNG_GROWTH = 0.05
+
+
+def load_qr_generator():
+    """Import qr_generator.py on its own (the addon package imports Odoo)"""
+    spec = importlib.util.spec_from_file_location('otk_qr_generator', QR_GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_payload(qrcode, version):
+    """Serial-style payload just long enough to need the given QR version (error correction H)"""
+    length = 1
+    while True:
+        payload = 'SN-' + ''.join('0123456789ABCDEFabcdef'[i % 22] for i in range(length))
+        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H, border=0)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        if qr.version >= version:
+            return payload, qr.version
+        length += 1
+
+
+def make_logo():
+    """Deterministic 256 px RGBA logo"""
+    from PIL import Image, ImageDraw
+    logo = Image.new('RGBA', (256, 256), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(logo)
+    draw.ellipse([8, 8, 248, 248], fill=(200, 30, 40, 255))
+    draw.rectangle([88, 64, 168, 192], fill=(255, 255, 255, 255))
+    buffer = io.BytesIO()
+    logo.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_once(module, entry, payload, size, logo):
+    """One render as the module does it; returns the PNG bytes"""
+    if entry == 'generate_qr_code':
+        result = module.generate_qr_code(payload, logo_binary=logo, size=size)
+        if not result:
+            raise RuntimeError('generate_qr_code failed (see log)')
+        return base64.b64decode(result)
+    img = module.QRCodeGenerator(payload, logo_path=logo, output_size=size).generate()
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def run_case(case):
+    """Worker entry point: measure one case in a fresh process so peak RSS is its own"""
+    module = load_qr_generator()
+    logo = make_logo() if case['logo'] else None
+    payload, version = make_payload(module.qrcode, case['version'])
+    # Warm-up render (codec setup) is neither timed nor traced
+    png = render_once(module, case['entry'], payload, case['size'], logo)
+
+    # Peak of one traced render, outside the timed loop (tracing slows allocations down)
+    tracemalloc.start()
+    render_once(module, case['entry'], payload, case['size'], logo)
+    _current, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rounds = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while rounds < case['min_rounds'] or elapsed < case['min_time']:
+        png = render_once(module, case['entry'], payload, case['size'], logo)
+        rounds += 1
+        elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        **{key: case[key] for key in ('name', 'entry', 'size', 'logo')},
+        'version': version,
+        'payload_bytes': len(payload),
+        'rounds': rounds,
+        'renders_per_second': round(rounds / elapsed, 3),
+        'mean_ms': round(elapsed / rounds * 1000, 3),
+        'peak_memory_kb': round(traced_peak / 1024),
+        # ru_maxrss is in KiB on Linux; informative only, too noisy to compare
+        'peak_rss_kb': peak_rss,
+        'png_bytes': len(png),
+    }
+
+
+def build_cases(args):
+    return [{
+        'name': f"{entry}/v{version}/{size}px/{'logo' if logo else 'plain'}",
+        'entry': entry,
+        'version': version,
+        'size': size,
+        'logo': logo,
+        'min_rounds': args.min_rounds,
+        'min_time': args.min_time,
+    } for entry in ENTRY_POINTS
+      for version in args.versions
+      for size in args.sizes
+      for logo in ((False, True) if entry in LOGO_ENTRY_POINTS else (False,))]
+
+
+def compare(results, baseline, args):
+    """Cases of this run that regressed against the baseline run, as messages"""
+    previous = {result['name']: result for result in baseline['results']}
+    # Baselines measured with another memory metric are not comparable on memory
+    same_memory_metric = baseline['meta'].get('memory_metric') == MEMORY_METRIC
+    regressions = []
+    for result in results:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        if result['renders_per_second'] < before['renders_per_second'] * (1 - args.max_slowdown):
+            regressions.append('%s: %.1f renders/s, baseline %.1f' % (
+                result['name'], result['renders_per_second'], before['renders_per_second']))
+        if same_memory_metric and result['peak_memory_kb'] > max(
+                before['peak_memory_kb'] * (1 + args.max_memory_growth),
+                before['peak_memory_kb'] + MEMORY_GROWTH_FLOOR_KB):
+            regressions.append('%s: peak memory %d KiB, baseline %d KiB' % (
+                result['name'], result['peak_memory_kb'], before['peak_memory_kb']))
+        if result['png_bytes'] > before['png_bytes'] * (1 + args.max_png_growth):
+            regressions.append('%s: PNG %d bytes, baseline %d bytes' % (
+                result['name'], result['png_bytes'], before['png_bytes']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark models/qr_generator.py without Odoo')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', type=Path, help='Previous results JSON to check for regressions')
+    parser.add_argument('--versions', type=int, nargs='+', default=list(VERSIONS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--min-rounds', type=int, default=5, help='Renders per case at least (default: %(default)s)')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds per case at least (default: %(default)s)')
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN)
+    parser.add_argument('--max-memory-growth', type=float, default=DEFAULT_MAX_MEMORY_GROWTH)
+    parser.add_argument('--max-png-growth', type=float, default=DEFAULT_MAX_PNG_GROWTH)
+    args = parser.parse_args(argv)
+
+    module = load_qr_generator()
+    import PIL
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pillow': PIL.__version__,
+            'qrcode': getattr(module.qrcode, '__version__', None),
+            'min_rounds': args.min_rounds,
+            'min_time': args.min_time,
+            'memory_metric': MEMORY_METRIC,
+        },
+        'results': [],
+    }
+
+    # One short-lived worker per case: ru_maxrss never goes down within a process
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, build_cases(args)):
+            report['results'].append(result)
+            print('%-45s %9.1f renders/s %8.1f ms %8d KiB %8d B' % (
+                result['name'], result['renders_per_second'], result['mean_ms'],
+                result['peak_memory_kb'], result['png_bytes']))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n')
+        print(f'Results written to {args.output}')
+
+    if args.baseline:
+        regressions = compare(report['results'], json.loads(args.baseline.read_text()), args)
+        if regressions:
+            print('\nRegressions against %s:' % args.baseline)
+            for message in regressions:
+                print('  ' + message)
+            return 1
+        print(f'No regression against {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
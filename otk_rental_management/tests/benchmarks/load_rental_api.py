@@ -0,0 +1,300 @@
+# Key Features:
+
+# Scanner devices - N threads, each a depot scanner with its own keep-alive connection
+# Realistic pacing - Exponential think time between scans, devices ramp up gradually
+# Workflow mix - Serial lookups, quick rent and matching quick return, project list
+# Targets - Read once from the database loaded by `odoo-bin otk_rental_dataset` (needs psycopg2)
+# Report - p50/p95/p99 latency, throughput and error rate per route, printed and saved as JSON
+# Deterministic - The same --seed gives every device the same sequence of actions and targets
+#
+# Usage (against a local server started on the synthetic dataset, e.g. `odoo-bin -d bench --workers 4`):
+#   OTK_RENTAL_API_KEY=... python otk_rental_management/tests/benchmarks/load_rental_api.py \
+#       --url http://localhost:8069 --dsn dbname=bench --devices 40 --duration 300 --output load.json
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+# Action -> share of the scans a device performs
+DEFAULT_MIX = {'lookup': 0.6, 'rent': 0.15, 'return': 0.15, 'project_list': 0.1}
+
+# Route templates the results are grouped by
+ROUTES = {
+    'lookup': 'GET /api/rental/serial/<serial_number>',
+    'rent': 'POST /api/rental/serial/rent',
+    'return': 'POST /api/rental/serial/return',
+    'project_list': 'GET /api/rental/project/list',
+}
+
+# Serial numbers sampled for lookups
+LOOKUP_SAMPLE = 5000
+
+
+def load_targets(dsn, seed):
+    """
+    Serial numbers to scan and (serial, project) pairs to rent, from the database.
+
+    Rent targets are available serials whose equipment is on a line of an
+    ongoing project, which is what the quick rent endpoint accepts.
+    """
+    import psycopg2
+
+    rng = random.Random(seed)
+    with psycopg2.connect(dsn) as connection, connection.cursor() as cr:
+        cr.execute("SELECT serial_number FROM otk_rental_equipment_serial WHERE active ORDER BY id")
+        serials = [row[0] for row in cr.fetchall()]
+        cr.execute("""
+            SELECT i.equipment_id, array_agg(DISTINCT i.project_id ORDER BY i.project_id)
+              FROM otk_rental_project_item i
+              JOIN otk_rental_project p ON p.id = i.project_id
+             WHERE p.state = 'ongoing'
+             GROUP BY i.equipment_id
+        """)
+        projects = dict(cr.fetchall())
+        cr.execute("""
+            SELECT serial_number, equipment_id
+              FROM otk_rental_equipment_serial
+             WHERE active AND status = 'available' AND equipment_id = ANY(%s)
+             ORDER BY id
+        """, [list(projects)])
+        rentable = [(serial_number, rng.choice(projects[equipment_id])) for serial_number, equipment_id in cr.fetchall()]
+    if not serials:
+        sys.exit('No serials found: load the synthetic dataset first (odoo-bin otk_rental_dataset)')
+    rng.shuffle(rentable)
+    return rng.sample(serials, min(LOOKUP_SAMPLE, len(serials))), rentable
+
+
+class Stats:
+    """Latencies and errors per route, shared by all devices"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+
+    def record(self, route, seconds, error=None):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            if error:
+                self.errors[route] += 1
+                if len(self.error_samples[route]) < 5:
+                    self.error_samples[route].append(error)
+
+    def report(self, elapsed):
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            routes[route] = {
+                'requests': count,
+                'errors': self.errors[route],
+                'error_rate': round(self.errors[route] / count, 4),
+                'throughput_rps': round(count / elapsed, 2),
+                'mean_ms': round(sum(latencies) / count * 1000, 1),
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+                'max_ms': round(latencies[-1] * 1000, 1),
+                'error_samples': self.error_samples[route],
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        return {
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'routes': routes,
+        }
+
+
+def percentile(ordered, rank):
+    """Nearest-rank percentile of sorted seconds, in milliseconds"""
+    index = min(len(ordered), max(1, math.ceil(rank / 100 * len(ordered)))) - 1
+    return round(ordered[index] * 1000, 1)
+
+
+class ScannerDevice(threading.Thread):
+    """One scanner: think, pick an action from the mix, call the API, repeat until the deadline"""
+
+    def __init__(self, number, args, lookups, rentable, rentable_lock, stats, start_at, deadline):
+        super().__init__(name=f'scanner-{number}', daemon=True)
+        self.rng = random.Random(args.seed * 1000 + number)
+        self.args = args
+        self.lookups = lookups
+        self.rentable = rentable
+        self.rentable_lock = rentable_lock
+        self.stats = stats
+        self.start_at = start_at
+        self.deadline = deadline
+        self.rented = []
+        self.connection = None
+        url = urlsplit(args.url)
+        self.host, self.port, self.https = url.hostname, url.port, url.scheme == 'https'
+        self.actions, self.weights = zip(*args.mix.items())
+
+    def run(self):
+        time.sleep(max(0.0, self.start_at - time.monotonic()))
+        while True:
+            think = max(self.args.min_think_time, self.rng.expovariate(1 / self.args.think_time))
+            if time.monotonic() + think >= self.deadline:
+                break
+            time.sleep(think)
+            getattr(self, '_do_' + self.rng.choices(self.actions, weights=self.weights)[0])()
+        # Hand back what this device still holds so the next run starts from the same fleet
+        while self.rented:
+            self._do_return(record=False)
+
+    def _request(self, action, method, path, payload=None, record=True):
+        body = json.dumps(payload) if payload is not None else None
+        headers = {'X-Api-Key': self.args.api_key, 'Connection': 'keep-alive'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            if self.connection is None:
+                connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self.connection = connection_class(self.host, self.port, timeout=self.args.timeout)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            raw = response.read()
+            if response.status >= 400:
+                error = f'HTTP {response.status}: {raw[:200].decode(errors="replace")}'
+            else:
+                result = json.loads(raw)
+                if result.get('status') != 'success':
+                    error = result.get('message') or 'error response'
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            error = f'{type(e).__name__}: {e}'
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+        if record:
+            self.stats.record(ROUTES[action], time.perf_counter() - started, error)
+        return None if error else result
+
+    def _do_lookup(self):
+        serial_number = self.rng.choice(self.lookups)
+        self._request('lookup', 'GET', '/api/rental/serial/' + quote(serial_number, safe=''))
+
+    def _do_rent(self):
+        with self.rentable_lock:
+            target = self.rentable.popleft() if self.rentable else None
+        if not target:
+            return self._do_lookup()
+        serial_number, project_id = target
+        if self._request('rent', 'POST', '/api/rental/serial/rent', {
+            'serial_number': serial_number,
+            'project_id': project_id,
+        }):
+            self.rented.append(target)
+        else:
+            with self.rentable_lock:
+                self.rentable.append(target)
+
+    def _do_return(self, record=True):
+        if not self.rented:
+            return self._do_rent()
+        target = self.rented.pop(self.rng.randrange(len(self.rented)))
+        if self._request('return', 'POST', '/api/rental/serial/return', {
+            'serial_number': target[0],
+            'damage_status': 'available',
+        }, record=record):
+            with self.rentable_lock:
+                self.rentable.append(target)
+
+    def _do_project_list(self):
+        self._request('project_list', 'GET', '/api/rental/project/list')
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        action, _sep, weight = part.partition('=')
+        if action not in ROUTES:
+            raise argparse.ArgumentTypeError(f'Unknown action {action!r} (expected {", ".join(ROUTES)})')
+        mix[action] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the /api/rental endpoints with simulated scanners')
+    parser.add_argument('--url', default='http://localhost:8069', help='Odoo server (default: %(default)s)')
+    parser.add_argument('--dsn', required=True, help='libpq connection string of the server database, read for targets')
+    parser.add_argument('--api-key', default=os.environ.get('OTK_RENTAL_API_KEY'),
+                        help='API key of the scanner user (default: $OTK_RENTAL_API_KEY)')
+    parser.add_argument('--devices', type=int, default=20, help='Simulated scanner devices (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=120, help='Seconds of load (default: %(default)s)')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds to start all devices (default: %(default)s)')
+    parser.add_argument('--think-time', type=float, default=3.0, help='Mean seconds between scans (default: %(default)s)')
+    parser.add_argument('--min-think-time', type=float, default=0.3)
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds (default: %(default)s)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Action weights, e.g. lookup=0.6,rent=0.15,return=0.15,project_list=0.1')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or OTK_RENTAL_API_KEY)')
+
+    lookups, rentable = load_targets(args.dsn, args.seed)
+    print(f'{len(lookups)} serials to look up, {len(rentable)} rentable serials on ongoing projects')
+
+    stats = Stats()
+    rentable = deque(rentable)
+    rentable_lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+    devices = [
+        ScannerDevice(number, args, lookups, rentable, rentable_lock, stats,
+                      started + args.ramp_up * number / max(args.devices, 1), deadline)
+        for number in range(args.devices)
+    ]
+    for device in devices:
+        device.start()
+    for device in devices:
+        device.join()
+    elapsed = time.monotonic() - started
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'url': args.url,
+            'devices': args.devices,
+            'duration': args.duration,
+            'ramp_up': args.ramp_up,
+            'think_time': args.think_time,
+            'mix': args.mix,
+            'seed': args.seed,
+            'elapsed': round(elapsed, 1),
+        },
+        **stats.report(elapsed),
+    }
+
+    print('%-42s %8s %7s %8s %8s %8s %8s' % ('route', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for route, row in report['routes'].items():
+        print('%-42s %8d %6.1f%% %8.2f %8.1f %8.1f %8.1f' % (
+            route, row['requests'], row['error_rate'] * 100, row['throughput_rps'],
+            row['p50_ms'], row['p95_ms'], row['p99_ms']))
+    print(f"total: {report['requests']} requests, {report['errors']} errors, {report['throughput_rps']} req/s")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+            output.write('\n')
+        print(f'Report written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Key Features:
+
+# Scaled fixtures - One serialized equipment and one project per fleet size (1, 10 and 500 serials)
+# Query counting - SQL statements issued by a flow, read from the cursor around a full flush
+# Wall time - Elapsed time of the same run
+# Budgets - Ceiling at the smallest size, bounded growth from 10 to 500 (sub-linear scaling)
+
+import time
+
+from odoo import fields
+from odoo.addons.base.tests.common import DISABLED_MAIL_CONTEXT
+from odoo.tests.common import TransactionCase
+
+# Fleet sizes every flow is measured at
+SCALES = (1, 10, 500)
+
+# 1x1 transparent PNG for the required signature fields
+SIGNATURE = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+
+# Flow -> (max queries for 1 serial, max extra queries from 10 to 500 serials, max seconds for 500 serials)
+# A flow touching each serial with its own statements grows by 490+ queries and fails the second bound.
+QUERY_BUDGETS = {
+    'action_reserve': (80, 40, 15.0),
+    'action_start_rental': (40, 25, 10.0),
+    'pickup_wizard': (70, 40, 15.0),
+    'return_wizard': (90, 50, 15.0),
+    'partial_return_wizard': (90, 50, 15.0),
+    'prepare_invoice_lines': (20, 5, 5.0),
+    'api_equipment_details': (40, 20, 5.0),
+    'api_project_list': (25, 10, 5.0),
+    'api_quote': (40, 10, 5.0),
+}
+
+
+class RentalPerformanceCase(TransactionCase):
+    """Fixtures and measuring helpers for the query-count budget tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Mail tracking writes one message per tracked record by design; it is
+        # left out so the budgets measure the rental code itself
+        cls.env = cls.env(context=dict(cls.env.context, **DISABLED_MAIL_CONTEXT))
+        cls.partner = cls.env['res.partner'].create({'name': 'Budget Customer'})
+        cls.equipment = {}
+        for scale in SCALES:
+            equipment = cls.env['otk.rental.equipment'].create({
+                'name': f'Budget Equipment x{scale}',
+                'code': f'BUDGET{scale}',
+                'has_serials': True,
+                'daily_rate': 10.0,
+            })
+            cls.env['otk.rental.equipment.serial'].create([{
+                'equipment_id': equipment.id,
+                'serial_number': f'BUDGET{scale}-{index:04d}',
+            } for index in range(scale)])
+            cls.equipment[scale] = equipment
+
+    def _create_project(self, scale, state='draft'):
+        """A project renting the whole fleet of the given size, brought to `state`"""
+        today = fields.Date.today()
+        project = self.env['otk.rental.project'].create({
+            'partner_id': self.partner.id,
+            'start_date': today,
+            'end_date': fields.Date.add(today, days=7),
+            'item_ids': [(0, 0, {
+                'equipment_id': self.equipment[scale].id,
+                'quantity': scale,
+            })],
+        })
+        if state in ('reserved', 'ongoing'):
+            project.action_reserve()
+        if state == 'ongoing':
+            project.action_start_rental()
+            project.item_ids.assigned_serial_ids.write({'actual_pickup_date': today})
+        return project
+
+    def _measure(self, func):
+        """
+        Run func with a cold cache and return (queries, seconds, result).
+        Pending writes are flushed before and after so deferred SQL is counted.
+        """
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries_before = self.env.cr.sql_log_count
+        started = time.perf_counter()
+        result = func()
+        self.env.flush_all()
+        elapsed = time.perf_counter() - started
+        return self.env.cr.sql_log_count - queries_before, elapsed, result
+
+    def _assert_budget(self, flow, measures):
+        """
+        Check {scale: (queries, seconds)} against QUERY_BUDGETS[flow].
+        """
+        base_queries, growth_queries, max_seconds = QUERY_BUDGETS[flow]
+        summary = ', '.join(f'{scale}: {queries} queries/{seconds:.2f}s' for scale, (queries, seconds) in sorted(measures.items()))
+        queries_1 = measures[1][0]
+        self.assertLessEqual(
+            queries_1, base_queries,
+            f'{flow} issues {queries_1} queries for one serial (budget {base_queries}). {summary}',
+        )
+        growth = measures[500][0] - measures[10][0]
+        self.assertLessEqual(
+            growth, growth_queries,
+            f'{flow} no longer scales: 10 -> 500 serials adds {growth} queries (budget {growth_queries}). {summary}',
+        )
+        self.assertLessEqual(
+            measures[500][1], max_seconds,
+            f'{flow} takes {measures[500][1]:.2f}s for 500 serials (budget {max_seconds}s). {summary}',
+        )
@@ -0,0 +1,58 @@
+from odoo.tests import HttpCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRentalApiAuth(HttpCase):
+    """X-Api-Key authentication of the REST API (Odoo API keys, stored hashed)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scanner = new_test_user(
+            cls.env, login='rental_scanner',
+            groups='base.group_user,otk_rental_management.group_otk_rental_user',
+        )
+        # sudo: persistent keys need no expiration date (the expired one is backdated below)
+        ApiKeys = cls.env['res.users.apikeys'].with_user(cls.scanner).sudo()
+        cls.key = ApiKeys._generate('rpc', 'Scanner', False)
+        cls.expired_key = ApiKeys._generate('rpc', 'Old Scanner', False)
+        cls.env.cr.execute("""
+            UPDATE res_users_apikeys
+               SET expiration_date = NOW() AT TIME ZONE 'UTC' - INTERVAL '1 day'
+             WHERE user_id = %s AND name = 'Old Scanner'
+        """, [cls.scanner.id])
+        cls.equipment = cls.env['otk.rental.equipment'].create({
+            'name': 'Auth Test Speaker',
+            'code': 'AUTH1',
+            'has_serials': True,
+            'daily_rate': 12.5,
+            'weekly_rate': 60.0,
+        })
+
+    def _get_equipment(self, key=None):
+        headers = {'X-Api-Key': key} if key is not None else {}
+        return self.url_open(f'/api/rental/equipment/{self.equipment.id}', headers=headers)
+
+    def test_valid_key(self):
+        response = self._get_equipment(self.key)
+        self.assertEqual(response.status_code, 200, response.text)
+        data = response.json()['data']
+        self.assertEqual(data['rate_day'], 12.5)
+        self.assertEqual(data['rate_week'], 60.0)
+        self.assertTrue(data['is_serialized'])
+
+    def test_invalid_key(self):
+        response = self._get_equipment(self.key[:-4] + 'zzzz')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_expired_key(self):
+        self.assertEqual(self._get_equipment(self.expired_key).status_code, 401)
+
+    def test_missing_key(self):
+        self.assertEqual(self._get_equipment().status_code, 401)
+
+    def test_equipment_list(self):
+        response = self.url_open('/api/rental/equipment/list', headers={'X-Api-Key': self.key})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertIn(self.equipment.id, [eq['id'] for eq in response.json()['data']])
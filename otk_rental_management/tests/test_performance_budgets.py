@@ -0,0 +1,143 @@
+import json
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import HttpCase, tagged
+
+from odoo.addons.otk_rental_management.controllers.main import RentalAPI, _quote_cache, _route_metrics
+from .common import RentalPerformanceCase, SCALES, SIGNATURE
+
+
+@tagged('post_install', '-at_install', 'otk_rental_performance')
+class TestRentalFlowBudgets(RentalPerformanceCase):
+    """Query-count and wall-time budgets of the reservation lifecycle"""
+
+    def _measure_scales(self, flow, prepare, run):
+        """prepare(scale) -> record, run(record) is measured; budgets checked on all scales"""
+        measures = {}
+        for scale in SCALES:
+            record = prepare(scale)
+            queries, seconds, _result = self._measure(lambda: run(record))
+            measures[scale] = (queries, seconds)
+        self._assert_budget(flow, measures)
+        return measures
+
+    def test_action_reserve(self):
+        self._measure_scales(
+            'action_reserve',
+            lambda scale: self._create_project(scale),
+            lambda project: project.action_reserve(),
+        )
+
+    def test_action_start_rental(self):
+        self._measure_scales(
+            'action_start_rental',
+            lambda scale: self._create_project(scale, 'reserved'),
+            lambda project: project.action_start_rental(),
+        )
+
+    def test_pickup_wizard(self):
+        def prepare(scale):
+            project = self._create_project(scale, 'reserved')
+            return self.env['otk.rental.pickup.wizard'].with_context(default_project_id=project.id).create({
+                'pickup_signature': SIGNATURE,
+            })
+        self._measure_scales('pickup_wizard', prepare, lambda wizard: wizard.action_confirm_pickup())
+
+    def test_return_wizard(self):
+        def prepare(scale):
+            project = self._create_project(scale, 'ongoing')
+            return self.env['otk.rental.return.wizard'].with_context(default_project_id=project.id).create({})
+        self._measure_scales('return_wizard', prepare, lambda wizard: wizard.action_complete_return())
+
+    def test_partial_return_wizard(self):
+        def prepare(scale):
+            project = self._create_project(scale, 'ongoing')
+            return self.env['otk.rental.partial.return.wizard'].with_context(default_project_id=project.id).create({
+                'return_signature': SIGNATURE,
+                'create_invoice': False,
+            })
+        self._measure_scales('partial_return_wizard', prepare, lambda wizard: wizard.action_confirm_return())
+
+    def test_prepare_invoice_lines(self):
+        measures = {}
+        for scale in SCALES:
+            project = self._create_project(scale, 'ongoing')
+            queries, seconds, lines = self._measure(lambda: project._prepare_invoice_lines())
+            self.assertTrue(lines, 'Picked-up serials should produce invoice lines')
+            measures[scale] = (queries, seconds)
+        self._assert_budget('prepare_invoice_lines', measures)
+
+    def test_flows_end_in_expected_states(self):
+        """The measured flows must still do their job at the largest scale"""
+        project = self._create_project(SCALES[-1], 'ongoing')
+        serials = project.item_ids.assigned_serial_ids
+        self.assertEqual(len(serials), SCALES[-1])
+        self.assertEqual(set(serials.mapped('status')), {'rented'})
+        self.assertEqual(len(serials.status_history_ids), 2 * SCALES[-1], 'One reserved and one rented row per serial')
+
+
+@tagged('post_install', '-at_install', 'otk_rental_performance')
+class TestRentalApiBudgets(RentalPerformanceCase, HttpCase):
+    """Query-count and wall-time budgets of the main REST endpoints"""
+
+    def setUp(self):
+        super().setUp()
+        # Budgets cover the endpoint logic, not API key verification
+        self.startPatcher(patch.object(RentalAPI, '_check_auth', return_value=None))
+        _quote_cache.clear()
+
+    def _request(self, url, payload=None):
+        if payload is None:
+            response = self.url_open(url)
+        else:
+            response = self.url_open(url, data=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()['status'], 'success', response.text)
+        return response
+
+    def test_api_equipment_details(self):
+        measures = {}
+        for scale in SCALES:
+            url = f'/api/rental/equipment/{self.equipment[scale].id}'
+            queries, seconds, _response = self._measure(lambda: self._request(url))
+            measures[scale] = (queries, seconds)
+        self._assert_budget('api_equipment_details', measures)
+
+    def test_api_project_list(self):
+        measures = {}
+        created = 0
+        for scale in SCALES:
+            # Grow the project table to `scale` projects
+            for _index in range(scale - created):
+                self._create_project(1)
+            created = scale
+            queries, seconds, _response = self._measure(lambda: self._request('/api/rental/project/list'))
+            measures[scale] = (queries, seconds)
+        self._assert_budget('api_project_list', measures)
+
+    def test_api_quote(self):
+        today = fields.Date.today()
+        measures = {}
+        for scale in SCALES:
+            payload = {
+                'partner_id': self.partner.id,
+                'start_date': str(today),
+                'end_date': str(fields.Date.add(today, days=7)),
+                'lines': [{'equipment_id': self.equipment[scale].id, 'quantity': scale}],
+            }
+            queries, seconds, response = self._measure(lambda: self._request('/api/rental/quote', payload))
+            self.assertTrue(response.json()['data']['available'])
+            measures[scale] = (queries, seconds)
+        self._assert_budget('api_quote', measures)
+
+    def test_api_instrumentation(self):
+        """Every route reports its timings in Server-Timing and in the worker histogram"""
+        url = f'/api/rental/equipment/{self.equipment[SCALES[0]].id}'
+        count = _route_metrics.get('equipment_details', {}).get('count', 0)
+        response = self._request(url)
+        timing = response.headers['Server-Timing']
+        for metric in ('app;dur=', 'sql;dur=', 'json;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertEqual(_route_metrics['equipment_details']['count'], count + 1)
+        self.assertGreater(_route_metrics['equipment_details']['bytes'], 0)
@@ -0,0 +1,69 @@
+from odoo import fields
+from odoo.addons.base.tests.common import DISABLED_MAIL_CONTEXT
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRentalHoldConversion(TransactionCase):
+    """Checkout holds turned into reserved projects"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **DISABLED_MAIL_CONTEXT))
+        cls.partner = cls.env['res.partner'].create({'name': 'Hold Customer'})
+        cls.equipment = cls.env['otk.rental.equipment'].create({
+            'name': 'Hold Equipment',
+            'code': 'HOLD1',
+            'has_serials': True,
+            'daily_rate': 10.0,
+        })
+        cls.serial = cls.env['otk.rental.equipment.serial'].create({
+            'equipment_id': cls.equipment.id,
+            'serial_number': 'HOLD1-0001',
+        })
+        cls.today = fields.Date.today()
+
+    def _hold(self, quantity):
+        Hold = self.env['otk.rental.hold']
+        return Hold.create({
+            'partner_id': self.partner.id,
+            'equipment_id': self.equipment.id,
+            'quantity': quantity,
+            'start_date': self.today,
+            'end_date': fields.Date.add(self.today, days=3),
+            'expires_at': Hold._get_expiry(),
+        })
+
+    def test_convert_reserves_and_releases(self):
+        holds = self._hold(1)
+        project = holds._convert_to_reservation()
+        self.assertEqual(project.state, 'reserved')
+        self.assertEqual(project.item_ids.assigned_serial_ids, self.serial)
+        self.assertFalse(holds.exists(), 'Converted holds are released')
+
+    def test_failed_reservation_rolls_back(self):
+        # Two units held, one serial: the reservation cannot allocate them
+        holds = self._hold(2)
+        Project = self.env['otk.rental.project']
+        projects_before = Project.search_count([])
+        with self.assertRaises(UserError):
+            holds._convert_to_reservation()
+        self.assertEqual(Project.search_count([]), projects_before, 'No orphan draft project is left')
+        self.assertTrue(holds.exists(), 'The holds survive a failed conversion')
+        self.assertEqual(self.serial.status, 'available')
+
+    def test_reservation_leaves_held_units(self):
+        # The only serial is held for another checkout: a direct booking cannot take it
+        holds = self._hold(1)
+        project = self.env['otk.rental.project'].create({
+            'partner_id': self.partner.id,
+            'start_date': self.today,
+            'end_date': fields.Date.add(self.today, days=1),
+            'item_ids': [(0, 0, {'equipment_id': self.equipment.id, 'quantity': 1})],
+        })
+        with self.assertRaises(UserError):
+            project.action_reserve()
+        self.assertEqual(self.serial.status, 'available')
+        self.assertEqual(holds._convert_to_reservation().item_ids.assigned_serial_ids, self.serial)
@@ -0,0 +1,59 @@
+from odoo import fields
+from odoo.addons.base.tests.common import DISABLED_MAIL_CONTEXT
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRentalKitLead(TransactionCase):
+    """The lead component that kit billing counts"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **DISABLED_MAIL_CONTEXT))
+        Equipment = cls.env['otk.rental.equipment']
+        cls.partner = cls.env['res.partner'].create({'name': 'Kit Customer'})
+        cls.cable = Equipment.create({'name': 'Kit Cable', 'code': 'KITCABLE', 'has_serials': False, 'daily_rate': 1.0})
+        cls.camera = Equipment.create({'name': 'Kit Camera', 'code': 'KITCAM', 'has_serials': True, 'daily_rate': 20.0})
+        cls.env['otk.rental.equipment.serial'].create([{
+            'equipment_id': cls.camera.id,
+            'serial_number': f'KITCAM-{index}',
+        } for index in range(2)])
+
+    def _project(self, kit):
+        today = fields.Date.today()
+        return self.env['otk.rental.project'].create({
+            'partner_id': self.partner.id,
+            'start_date': today,
+            'end_date': fields.Date.add(today, days=3),
+            'item_ids': [(0, 0, {'equipment_id': kit.id, 'quantity': 1})],
+        })
+
+    def _kit(self, code, components):
+        return self.env['otk.rental.equipment'].create({
+            'name': f'Kit {code}',
+            'code': code,
+            'is_kit': True,
+            'daily_rate': 50.0,
+            'kit_line_ids': [(0, 0, {
+                'component_id': component.id,
+                'quantity': quantity,
+                'sequence': sequence,
+            }) for sequence, (component, quantity) in enumerate(components)],
+        })
+
+    def test_lead_is_first_serialized_component(self):
+        # The non-serialized cable comes first but has no serials to count
+        kit = self._kit('KITLEAD', [(self.cable, 3), (self.camera, 2)])
+        project = self._project(kit)
+        project.action_reserve()
+        components = project.item_ids.kit_component_ids
+        self.assertEqual(components.filtered('kit_lead').equipment_id, self.camera)
+        self.assertEqual(len(components.filtered('kit_lead')), 1)
+
+    def test_kit_without_serialized_component(self):
+        kit = self._kit('KITNOSERIAL', [(self.cable, 1)])
+        project = self._project(kit)
+        with self.assertRaises(UserError):
+            project.action_reserve()
@@ -0,0 +1,86 @@
+from odoo import fields
+from odoo.addons.base.tests.common import DISABLED_MAIL_CONTEXT
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSerialTransitions(TransactionCase):
+    """Serial lifecycle enforced by the transition engine"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **DISABLED_MAIL_CONTEXT))
+        partner = cls.env['res.partner'].create({'name': 'Transition Customer'})
+        cls.equipment = cls.env['otk.rental.equipment'].create({
+            'name': 'Transition Equipment',
+            'code': 'TRANS1',
+            'has_serials': True,
+            'daily_rate': 10.0,
+        })
+        today = fields.Date.today()
+        cls.project_a, cls.project_b = cls.env['otk.rental.project'].create([{
+            'partner_id': partner.id,
+            'start_date': today,
+            'end_date': fields.Date.add(today, days=2),
+            'item_ids': [(0, 0, {'equipment_id': cls.equipment.id, 'quantity': 1})],
+        } for _index in range(2)])
+
+    def setUp(self):
+        super().setUp()
+        self.serial = self.env['otk.rental.equipment.serial'].create({
+            'equipment_id': self.equipment.id,
+            'serial_number': 'TRANS1-0001',
+        })
+
+    def test_rent_goes_through_reserved(self):
+        with self.assertRaises(UserError):
+            self.serial._transition('rented')
+        self.serial._transition('reserved', {'current_project_id': self.project_a.id})
+        self.serial._transition('rented')
+        self.assertEqual(self.serial.status, 'rented')
+
+    def test_return_goes_through_returned(self):
+        self.serial._transition('reserved', {'current_project_id': self.project_a.id})
+        self.serial._transition('rented')
+        with self.assertRaises(UserError):
+            self.serial._transition('available', {'current_project_id': False})
+        self.serial._transition('returned', {'current_project_id': False})
+        self.serial._transition('available')
+        self.assertEqual(self.serial.status, 'available')
+
+    def test_reserved_serial_cannot_change_project(self):
+        self.serial._transition('reserved', {'current_project_id': self.project_a.id})
+        # Reserving again for the same project is a no-op
+        self.serial._transition('reserved', {'current_project_id': self.project_a.id})
+        with self.assertRaises(UserError):
+            self.serial._transition('reserved', {'current_project_id': self.project_b.id})
+        self.assertEqual(self.serial.current_project_id, self.project_a)
+
+    def _waitlist_to_draft(self):
+        # What the waitlist does with a freed serial
+        self.serial._transition('reserved', {'current_project_id': self.project_a.id})
+        self.project_a.item_ids.assigned_serial_ids = [(4, self.serial.id)]
+
+    def test_waitlisted_serial_is_not_available(self):
+        self._waitlist_to_draft()
+        available = self.equipment._get_available_quantities(self.project_a.start_date, self.project_a.end_date)
+        self.assertEqual(available[self.equipment.id], 0)
+
+    def test_draft_cancel_releases_waitlisted_serial(self):
+        self._waitlist_to_draft()
+        self.project_a.action_cancel()
+        self.assertEqual(self.serial.status, 'available')
+        self.assertFalse(self.serial.current_project_id)
+
+    def test_reserve_tops_up_waitlisted_line(self):
+        self._waitlist_to_draft()
+        second = self.env['otk.rental.equipment.serial'].create({
+            'equipment_id': self.equipment.id,
+            'serial_number': 'TRANS1-0002',
+        })
+        self.project_a.item_ids.quantity = 2
+        self.project_a.action_reserve()
+        self.assertEqual(self.project_a.item_ids.assigned_serial_ids, self.serial | second)
+        self.assertEqual(second.status, 'reserved')
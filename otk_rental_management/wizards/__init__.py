@@ -4,4 +4,5 @@ from . import serial_delete_confirm_wizard
 from . import serial_selection_wizard  # NEW - Add this line
 from . import otk_rental_pickup_wizard  # NEW
 from . import otk_rental_partial_return_wizard  # NEW
-from . import add_signature_wizard  # ADD THIS LINE
\ No newline at end of file
+from . import add_signature_wizard  # ADD THIS LINE
+from . import otk_rental_transfer_wizard
@@ -46,6 +46,11 @@ class OtkRentalPartialReturnWizard(models.TransientModel):
     )
 
     notes = fields.Text('Return Notes')
+    create_invoice = fields.Boolean(
+        'Invoice This Return',
+        default=lambda self: self.env['otk.rental.settings'].get('invoice_partial_returns'),
+        help='Create an invoice now for the serials returned in this batch only'
+    )
     # Overall assessment
     has_damage = fields.Boolean('Has Damage')
     total_damage_fee = fields.Float(
@@ -136,9 +141,15 @@ class OtkRentalPartialReturnWizard(models.TransientModel):
             'ip_address': ip_address,
         })
         
-        # Process each return
-        for line in lines_to_return:
-            line.action_process_return(self.return_date)
+        # Process each return (undamaged serials in one batch)
+        lines_to_return._process_returns(self.return_date)
+        
+        # Serials back in good condition go to draft projects waiting for them
+        self.env['otk.rental.waitlist']._allocate_freed(lines_to_return.serial_id)
+        
+        # Bill this return event on its own, from the returned serials only
+        if self.create_invoice:
+            self.project_id._create_partial_return_invoice(lines_to_return.serial_id, self.return_date)
         
         # Check if all items returned
         remaining_rented = self.env['otk.rental.equipment.serial'].search_count([
@@ -237,12 +248,10 @@ class OtkRentalPartialReturnWizardLine(models.TransientModel):
             self.damage_fee = 0.0
         elif self.condition == 'minor_damage':
             # Suggest minor damage fee from settings
-            param = self.env['ir.config_parameter'].sudo()
-            self.damage_fee = float(param.get_param('otk_rental.damage_minor_threshold', 100))
+            self.damage_fee = self.env['otk.rental.settings'].get('damage_minor_threshold')
         elif self.condition == 'damaged':
             # Suggest moderate damage fee from settings
-            param = self.env['ir.config_parameter'].sudo()
-            self.damage_fee = float(param.get_param('otk_rental.damage_moderate_threshold', 500))
+            self.damage_fee = self.env['otk.rental.settings'].get('damage_moderate_threshold')
         elif self.condition == 'lost':
             # Suggest full equipment value
             if self.equipment_id:
@@ -252,6 +261,26 @@ class OtkRentalPartialReturnWizardLine(models.TransientModel):
         if self.condition != 'good':
             self.wizard_id.has_damage = True
 
+    def _process_returns(self, return_date):
+        """Process these return lines; serials back in good condition share one transition"""
+        plain = self.filtered(lambda line: line.condition == 'good' and not (line.damage_description or line.damage_fee))
+        for line in self - plain:
+            line.action_process_return(return_date)
+        if plain:
+            wizard = plain.wizard_id[:1]
+            lines_by_serial = {line.serial_id.id: line for line in plain}
+            plain.serial_id._transition(
+                'returned',
+                {'actual_return_date': return_date, 'current_project_id': False},
+                project=wizard.project_id,
+                notes=lambda serial: 'Returned on {}. Condition: good. Days rented: {}. Charge: ${}'.format(
+                    return_date, lines_by_serial[serial.id].rental_days, lines_by_serial[serial.id].rental_charge),
+                history_vals={
+                    'signature': wizard.return_signature,
+                    'repair_cost_estimate': 0.0,
+                },
+            )
+
     def action_process_return(self, return_date):
         """Process this return line"""
         self.ensure_one()
@@ -266,26 +295,23 @@ class OtkRentalPartialReturnWizardLine(models.TransientModel):
         else:  # lost
             new_status = 'disposed'
         
-        # Update serial
-        self.serial_id.write({
-            'status': new_status,
-            'actual_return_date': return_date,
-            'current_project_id': False if new_status in ['returned', 'disposed'] else self.serial_id.current_project_id.id
-        })
+        # Update serial and log status history
+        self.serial_id._transition(
+            new_status,
+            {
+                'actual_return_date': return_date,
+                'current_project_id': False if new_status in ['returned', 'disposed'] else self.serial_id.current_project_id.id
+            },
+            project=self.wizard_id.project_id,
+            notes=f'Returned on {return_date}. Condition: {self.condition}. Days rented: {self.rental_days}. Charge: ${self.rental_charge}',
+            history_vals={
+                'signature': self.wizard_id.return_signature,
+                'damage_description': self.damage_description,
+                'damage_severity': 'minor' if self.condition == 'minor_damage' else 'severe' if self.condition in ['damaged', 'lost'] else None,
+                'repair_cost_estimate': self.damage_fee
+            },
+        )
         
         # Update wizard's has_damage flag
         if self.condition != 'good':
-            self.wizard_id.has_damage = True
-
-        # Log status history
-        self.env['otk.rental.project.item.status'].create({
-            'project_id': self.wizard_id.project_id.id,
-            'equipment_id': self.equipment_id.id,
-            'serial_id': self.serial_id.id,
-            'status': new_status,
-            'signature': self.wizard_id.return_signature,
-            'notes': f'Returned on {return_date}. Condition: {self.condition}. Days rented: {self.rental_days}. Charge: ${self.rental_charge}',
-            'damage_description': self.damage_description,
-            'damage_severity': 'minor' if self.condition == 'minor_damage' else 'severe' if self.condition in ['damaged', 'lost'] else None,
-            'repair_cost_estimate': self.damage_fee
-        })
\ No newline at end of file
+            self.wizard_id.has_damage = True
\ No newline at end of file
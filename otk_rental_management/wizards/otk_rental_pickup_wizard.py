@@ -104,9 +104,8 @@ class OtkRentalPickupWizard(models.TransientModel):
             'ip_address': ip_address,
         })
 
-        # Process each return
-        for line in lines_to_pickup:
-            line.action_process_pickup(self.pickup_date)
+        # Mark all picked-up serials rented in one batch
+        lines_to_pickup._process_pickup(self.pickup_date)
         
         # Update project state if first pickup
         if self.project_id.state == 'reserved':
@@ -162,47 +161,18 @@ class OtkRentalPickupWizardLine(models.TransientModel):
     def action_process_pickup(self, pickup_date):
         """Process this pickup line"""
         self.ensure_one()
-
-        # Get equipment_id from serial (safer approach)
-        equipment_id = self.serial_id.equipment_id.id
-        
-        # ✅ ADD DEBUGGING - Print values to server log
-        import logging
-        _logger = logging.getLogger(__name__)
-        
-        _logger.info(f"=== PICKUP DEBUG ===")
-        _logger.info(f"wizard_id: {self.wizard_id.id}")
-        _logger.info(f"project_id: {self.wizard_id.project_id.id}")
-        _logger.info(f"serial_id: {self.serial_id.id}")
-        _logger.info(f"equipment_id (direct): {equipment_id}")
-        _logger.info(f"equipment_id.id: {self.equipment_id.id if self.equipment_id else 'NONE'}")
-        _logger.info(f"serial equipment: {self.serial_id.equipment_id.id if self.serial_id and self.serial_id.equipment_id else 'NONE'}")
-        
-        # Update serial
-        self.serial_id.write({
-            'status': 'rented',
-            'actual_pickup_date': pickup_date
-        })
-            
-        # Prepare status creation values
-        status_vals = {
-            'project_id': self.wizard_id.project_id.id,
-            'equipment_id': equipment_id,
-            'serial_id': self.serial_id.id,
-            'status': 'rented',
-            'signature': self.wizard_id.pickup_signature,
-            'notes': f'Picked up on {pickup_date}. Notes: {self.wizard_id.notes or ""}'
-        }
-        
-        _logger.info(f"Status vals: {status_vals}")
-        
-        # Log status history
-        try:
-            status_record = self.env['otk.rental.project.item.status'].create(status_vals)
-            _logger.info(f"Status record created: {status_record.id}")
-        except Exception as e:
-            _logger.error(f"ERROR creating status: {str(e)}")
-            raise
+        self._process_pickup(pickup_date)
+
+    def _process_pickup(self, pickup_date):
+        """Mark the serials of these lines rented, with one history row each"""
+        wizard = self.wizard_id[:1]
+        self.serial_id._transition(
+            'rented',
+            {'actual_pickup_date': pickup_date},
+            project=wizard.project_id,
+            notes=f'Picked up on {pickup_date}. Notes: {wizard.notes or ""}',
+            history_vals={'signature': wizard.pickup_signature},
+        )
 
         # Log status history
         # self.env['rental.project.item.status'].create({
@@ -117,9 +117,8 @@ class OtkRentalReturnWizard(models.TransientModel):
             'return_photos': [(6, 0, self.return_photos.ids)]
         })
         
-        # Process each return line
-        for line in self.item_line_ids:
-            line.action_process_return()
+        # Process each return line (undamaged serials in one batch)
+        self.item_line_ids._process_returns()
         
         # Mark project as returned
         self.project_id.action_complete_return()
@@ -211,12 +210,10 @@ class OtkRentalReturnWizardLine(models.TransientModel):
             self.damage_fee = 0.0
         elif self.condition == 'minor_damage':
             # Suggest minor damage fee from settings
-            param = self.env['ir.config_parameter'].sudo()
-            self.damage_fee = float(param.get_param('otk_rental.damage_minor_threshold', 100))
+            self.damage_fee = self.env['otk.rental.settings'].get('damage_minor_threshold')
         elif self.condition == 'damaged':
             # Suggest moderate damage fee from settings
-            param = self.env['ir.config_parameter'].sudo()
-            self.damage_fee = float(param.get_param('otk_rental.damage_moderate_threshold', 500))
+            self.damage_fee = self.env['otk.rental.settings'].get('damage_moderate_threshold')
         elif self.condition == 'lost':
             # Suggest full equipment value
             if self.equipment_id:
@@ -226,6 +223,22 @@ class OtkRentalReturnWizardLine(models.TransientModel):
         if self.condition != 'good':
             self.wizard_id.has_damage = True
 
+    def _process_returns(self):
+        """Process these return lines; serials back in good condition share one transition"""
+        plain = self.filtered(lambda line: line.serial_id and line.condition == 'good' and not (
+            line.damage_description or line.damage_fee or line.photo_ids))
+        for line in self - plain:
+            line.action_process_return()
+        if plain:
+            condition_label = dict(self._fields['condition'].selection).get('good')
+            plain.serial_id._transition(
+                'returned',
+                {'current_project_id': False},
+                project=plain.wizard_id[:1].project_id,
+                notes=f"Returned in {condition_label} condition",
+                history_vals={'repair_cost_estimate': 0.0},
+            )
+
     def action_process_return(self):
         """Process this return line"""
         self.ensure_one()
@@ -248,14 +261,6 @@ class OtkRentalReturnWizardLine(models.TransientModel):
             else:
                 new_status = 'returned'
             
-            # Update serial status
-            self.serial_id.write({
-                'status': new_status,
-                'current_project_id': False if new_status in ['returned', 'disposed'] else self.wizard_id.project_id.id
-            })
-            
-            _logger.info(f"Updated serial {self.serial_id.serial_number} status to: {new_status}")
-            
             # Determine damage severity
             damage_severity = None
             if self.condition == 'minor_damage':
@@ -271,18 +276,21 @@ class OtkRentalReturnWizardLine(models.TransientModel):
             if self.damage_fee > 0:
                 notes += f"\nDamage fee: ${self.damage_fee}"
             
-            # Create status history
-            self.env['otk.rental.project.item.status'].create({
-                'project_id': self.wizard_id.project_id.id,
-                'equipment_id': self.equipment_id.id,
-                'serial_id': self.serial_id.id,
-                'status': new_status,
-                'notes': notes,
-                'damage_description': self.damage_description,
-                'damage_severity': damage_severity,
-                'repair_cost_estimate': self.damage_fee if self.damage_fee > 0 else 0.0,
-                'photo_ids': [(6, 0, self.photo_ids.ids)] if self.photo_ids else False
-            })
+            # Update serial status and log status history
+            self.serial_id._transition(
+                new_status,
+                {'current_project_id': False if new_status in ['returned', 'disposed'] else self.wizard_id.project_id.id},
+                project=self.wizard_id.project_id,
+                notes=notes,
+                history_vals={
+                    'damage_description': self.damage_description,
+                    'damage_severity': damage_severity,
+                    'repair_cost_estimate': self.damage_fee if self.damage_fee > 0 else 0.0,
+                    'photo_ids': [(6, 0, self.photo_ids.ids)] if self.photo_ids else False
+                },
+            )
+            
+            _logger.info(f"Updated serial {self.serial_id.serial_number} status to: {new_status}")
             
             _logger.info(f"Created status history for serial {self.serial_id.serial_number}")
         
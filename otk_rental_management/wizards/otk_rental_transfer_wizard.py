@@ -0,0 +1,51 @@
+from odoo import models, fields, api, _
+
+
+class OtkRentalTransferWizard(models.TransientModel):
+    _name = 'otk.rental.transfer.wizard'
+    _description = 'Project to Project Serial Transfer Wizard'
+
+    project_id = fields.Many2one(
+        'otk.rental.project',
+        'From Project',
+        required=True,
+        readonly=True
+    )
+    target_project_id = fields.Many2one(
+        'otk.rental.project',
+        'To Project',
+        required=True,
+        domain="[('state', 'in', ['reserved', 'ongoing']), ('id', '!=', project_id)]"
+    )
+    transfer_date = fields.Date(
+        'Transfer Date',
+        required=True,
+        default=fields.Date.today
+    )
+    serial_ids = fields.Many2many(
+        'otk.rental.equipment.serial',
+        string='Serials to Transfer',
+        domain="[('current_project_id', '=', project_id), ('status', '=', 'rented')]"
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        project_id = res.get('project_id') or self.env.context.get('default_project_id')
+        if project_id and 'serial_ids' in fields_list:
+            # Everything out on site is proposed; uncheck what stays
+            res['serial_ids'] = [(6, 0, self.env['otk.rental.equipment.serial'].search([
+                ('current_project_id', '=', project_id),
+                ('status', '=', 'rented'),
+            ]).ids)]
+        return res
+
+    def action_confirm_transfer(self):
+        self.ensure_one()
+        self.project_id._transfer_serials(self.serial_ids, self.target_project_id, self.transfer_date)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'otk.rental.project',
+            'res_id': self.target_project_id.id,
+            'view_mode': 'form',
+        }